@@ -0,0 +1,157 @@
+# app/core/audit.py
+# 管理 / モデレーション操作の監査ログ（audit_logs）を非同期にまとめて書き込む。
+# - record() はキューに積むだけ。エンドポイントの応答に INSERT の時間を乗せない
+# - 書き込みスレッドが最初の 1 件から AUDIT_FLUSH_INTERVAL 秒待つか AUDIT_BATCH_SIZE 件貯まったら
+#   まとめて INSERT（executemany）
+# - キューは AUDIT_QUEUE_SIZE 件まで。満杯なら最大 AUDIT_PUT_TIMEOUT 秒だけ待ち（背圧）、
+#   それでも空かなければ捨てて dropped として数える。捨てた / 書けなかった行はログに残す
+# - created_at は record() を呼んだ時刻（書き込んだ時刻ではない）
+# - 停止時はキューに残っている分を書き切ってから終わる
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.metrics import AUDIT_EVENTS
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "1").lower() not in ("0", "false", "no")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+AUDIT_PUT_TIMEOUT = float(os.getenv("AUDIT_PUT_TIMEOUT", "0.1"))
+AUDIT_WRITE_RETRIES = int(os.getenv("AUDIT_WRITE_RETRIES", "3"))
+
+
+class AuditWriter:
+    def __init__(self) -> None:
+        self._queue: queue.Queue[dict] = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    # --------------------------------------------------
+    # 記録（リクエストスレッド / ジョブから呼ばれる）
+    # --------------------------------------------------
+
+    def record(
+        self,
+        action: str,
+        target_type: str,
+        target_id: int | None = None,
+        *,
+        actor_id: int | None = None,
+        meta: dict[str, Any] | None = None,
+    ) -> bool:
+        """監査ログを 1 件積む。キューが空かず捨てた場合は False。"""
+        if not AUDIT_ENABLED:
+            return False
+        row = {
+            "actor_id": actor_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "meta": meta,
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put(row, timeout=AUDIT_PUT_TIMEOUT)
+        except queue.Full:
+            self._drop([row], "queue full")
+            return False
+        AUDIT_EVENTS.labels("queued").inc()
+        return True
+
+    def _drop(self, rows: list[dict], reason: str) -> None:
+        self.dropped += len(rows)
+        AUDIT_EVENTS.labels("dropped").inc(len(rows))
+        for row in rows:
+            logger.error("Audit log dropped (%s): %s", reason, json.dumps(row, default=str, ensure_ascii=False))
+
+    # --------------------------------------------------
+    # 書き込み
+    # --------------------------------------------------
+
+    def _take_batch(self, linger: float) -> list[dict]:
+        """最初の 1 件が来てから linger 秒（または AUDIT_BATCH_SIZE 件）まで集める。"""
+        try:
+            batch = [self._queue.get(timeout=linger) if linger > 0 else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + linger
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows: list[dict]) -> None:
+        from sqlalchemy import insert
+
+        from app.database import engine
+        from src.models.audit_log import AuditLog
+
+        for attempt in range(AUDIT_WRITE_RETRIES + 1):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__), rows)
+            except Exception:
+                if attempt >= AUDIT_WRITE_RETRIES:
+                    logger.exception("Audit log write failed")
+                    self._drop(rows, "write failed")
+                    return
+                logger.warning("Audit log write failed; retrying", exc_info=True)
+                time.sleep(min(0.5 * 2 ** attempt, 5.0))
+            else:
+                AUDIT_EVENTS.labels("written").inc(len(rows))
+                return
+
+    def flush(self) -> int:
+        """キューに残っている分をすべて書き込む。書き込もうとした件数を返す。"""
+        total = 0
+        while True:
+            batch = self._take_batch(linger=0)
+            if not batch:
+                return total
+            self._write(batch)
+            total += len(batch)
+
+    # --------------------------------------------------
+    # バックグラウンドスレッド
+    # --------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """スレッドを止め、残りを書き切る。"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+        if self.dropped:
+            logger.warning("Audit writer dropped %d rows in total", self.dropped)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._take_batch(linger=AUDIT_FLUSH_INTERVAL)
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    logger.exception("Audit writer crashed")
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,252 @@
+# app/core/cdn.py
+# CDN 向けのキャッシュヘッダ（Cache-Control / サロゲートキー）と、書き込み時のパージ。
+# - 匿名で見られる GET（記事一覧 / 記事詳細 / 関連記事 / コメント一覧 / タグ一覧）だけが public。
+#   set_public_cache() を呼ばなかったレスポンスは CacheControlMiddleware が no-store にする
+# - ログイン状態で中身が変わるもの（記事詳細: 下書きは作者 / 管理者だけ見える）は、
+#   セッションクッキー付きのリクエストには private, no-store を返す
+#   （CDN 側でもセッションクッキー付きはキャッシュを素通りさせる設定にしておくこと）
+# - サロゲートキー:
+#     articles           記事一覧（記事の作成 / 更新 / 削除 / タグ付けでパージ）
+#     article-<id>       記事詳細、一覧・コメント一覧の中のその記事
+#     comments-<id>      その記事のコメント一覧
+#     user-<id>          その人の記事 / コメントを含むもの（ユーザーデータ削除でパージ）
+#     tags / tag-<id>    タグ一覧
+#     related-<id>       その記事の関連記事一覧（app/core/related.py が計算し直したときにパージ）
+#   いいね数 / 閲覧数の変化ではパージしない（CDN_S_MAXAGE 秒だけ古い値が見える）
+# - 記事詳細は CDN に当たるとオリジンに届かないので、閲覧数は GET では数えない。
+#   クライアントが表示時に POST /v1/articles/{id}/views（no-store）を送り、そちらで数える
+# - 書き込み側は purge() を直接呼ばずに app/core/invalidation.py の invalidate() を使う
+#   （プロセス内のキャッシュ / ほかのワーカーにも同じキーで届く）
+# - パージは CDN_PURGER で選ぶ: log（ログに出すだけ。既定）/ memory（テスト用に記録するだけ）/ fastly
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+CDN_S_MAXAGE = int(os.getenv("CDN_S_MAXAGE", "60"))
+CDN_STALE_WHILE_REVALIDATE = int(os.getenv("CDN_STALE_WHILE_REVALIDATE", "300"))
+CDN_STALE_IF_ERROR = int(os.getenv("CDN_STALE_IF_ERROR", "86400"))
+CDN_SURROGATE_KEY_HEADER = os.getenv("CDN_SURROGATE_KEY_HEADER", "Surrogate-Key")
+# サロゲートキーのヘッダの上限。超える分（一覧の中の個々の記事 / 著者）は付けない
+CDN_SURROGATE_KEY_MAX_BYTES = int(os.getenv("CDN_SURROGATE_KEY_MAX_BYTES", "8192"))
+CDN_PURGER = os.getenv("CDN_PURGER", "log").lower()
+CDN_PURGE_LINGER = float(os.getenv("CDN_PURGE_LINGER", "0.5"))
+FASTLY_SERVICE_ID = os.getenv("FASTLY_SERVICE_ID", "")
+FASTLY_API_TOKEN = os.getenv("FASTLY_API_TOKEN", "")
+
+SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "session")
+
+NO_STORE = "private, no-store"
+
+
+# --------------------------------------------------
+# キャッシュヘッダ
+# --------------------------------------------------
+
+def article_keys(article_id: int, author_id: int | None = None) -> list[str]:
+    keys = [f"article-{article_id}"]
+    if author_id is not None:
+        keys.append(f"user-{author_id}")
+    return keys
+
+
+def has_session(request) -> bool:
+    return bool(request.cookies.get(SESSION_COOKIE_NAME))
+
+
+def set_public_cache(response, keys: Iterable[str], *, request=None):
+    """
+    CDN にキャッシュさせる。request を渡すと、セッションクッキー付きなら private, no-store にする
+    （ログイン状態で中身が変わるレスポンスのときに渡す）。
+    keys は大事なもの（コレクションのキー）を先に並べる。上限を超えた後ろの分は付けない。
+    """
+    if request is not None and has_session(request):
+        response.headers["Cache-Control"] = NO_STORE
+        return response
+
+    response.headers["Cache-Control"] = (
+        f"public, max-age=0, s-maxage={CDN_S_MAXAGE}, "
+        f"stale-while-revalidate={CDN_STALE_WHILE_REVALIDATE}, stale-if-error={CDN_STALE_IF_ERROR}"
+    )
+    picked: list[str] = []
+    seen: set[str] = set()
+    size = 0
+    for key in keys:
+        if key in seen:
+            continue
+        if size + len(key) + 1 > CDN_SURROGATE_KEY_MAX_BYTES:
+            break
+        seen.add(key)
+        picked.append(key)
+        size += len(key) + 1
+    if picked:
+        response.headers[CDN_SURROGATE_KEY_HEADER] = " ".join(picked)
+    return response
+
+
+# --------------------------------------------------
+# パージ
+# --------------------------------------------------
+
+class Purger:
+    """サロゲートキー単位で CDN のキャッシュを消す。既定では何もしない。"""
+
+    def purge(self, keys: Iterable[str]) -> None:
+        pass
+
+    def purge_all(self) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class LogPurger(Purger):
+    """CDN 無しの環境用。パージするはずだったキーをログに出すだけ。"""
+
+    def purge(self, keys: Iterable[str]) -> None:
+        logger.info("CDN purge: %s", " ".join(sorted(set(keys))))
+
+    def purge_all(self) -> None:
+        logger.info("CDN purge: *")
+
+
+class MemoryPurger(Purger):
+    """テスト / ローカル確認用。パージのイベントを events に順に記録する（全消しは "*"）。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.events: list[frozenset[str] | str] = []
+
+    def purge(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self.events.append(frozenset(keys))
+
+    def purge_all(self) -> None:
+        with self._lock:
+            self.events.append("*")
+
+    def purged_keys(self) -> set[str]:
+        with self._lock:
+            return {k for e in self.events if e != "*" for k in e}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.events.clear()
+
+
+class FastlyPurger(Purger):
+    """
+    Fastly のサロゲートキーパージ API を呼ぶ。
+    リクエストのスレッドではキューに積むだけで、送信スレッドが CDN_PURGE_LINGER 秒ぶんのキーを
+    まとめて 1 回の API 呼び出しにする（失敗はログに残して捨てる。s-maxage で自然に切れる）。
+    """
+
+    _ALL = "*"
+
+    def __init__(self, service_id: str, api_token: str) -> None:
+        self.service_id = service_id
+        self.api_token = api_token
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def purge(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._queue.put(key)
+
+    def purge_all(self) -> None:
+        self._queue.put(self._ALL)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cdn-purger", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self._send(self._drain(linger=0))
+
+    def _drain(self, linger: float) -> set[str]:
+        try:
+            keys = {self._queue.get(timeout=linger) if linger > 0 else self._queue.get_nowait()}
+        except queue.Empty:
+            return set()
+        deadline = time.monotonic() + linger
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                keys.add(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                return keys
+
+    def _send(self, keys: set[str]) -> None:
+        if not keys:
+            return
+        import httpx
+
+        base = f"https://api.fastly.com/service/{self.service_id}"
+        headers = {"Fastly-Key": self.api_token, "Accept": "application/json"}
+        try:
+            if self._ALL in keys:
+                httpx.post(f"{base}/purge_all", headers=headers, timeout=5).raise_for_status()
+                return
+            # 1 回 256 キーまで
+            ordered = sorted(keys)
+            for i in range(0, len(ordered), 256):
+                httpx.post(
+                    f"{base}/purge",
+                    headers={**headers, "Surrogate-Key": " ".join(ordered[i:i + 256])},
+                    timeout=5,
+                ).raise_for_status()
+        except Exception:
+            logger.exception("CDN purge failed: %s", " ".join(sorted(keys)))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._send(self._drain(linger=CDN_PURGE_LINGER))
+
+
+def _make_purger() -> Purger:
+    if CDN_PURGER == "fastly":
+        if not (FASTLY_SERVICE_ID and FASTLY_API_TOKEN):
+            logger.warning("CDN_PURGER=fastly but FASTLY_SERVICE_ID / FASTLY_API_TOKEN are not set; purges are only logged")
+            return LogPurger()
+        return FastlyPurger(FASTLY_SERVICE_ID, FASTLY_API_TOKEN)
+    if CDN_PURGER == "memory":
+        return MemoryPurger()
+    if CDN_PURGER in ("", "none", "off"):
+        return Purger()
+    return LogPurger()
+
+
+purger: Purger = _make_purger()
+
+
+def set_purger(p: Purger) -> Purger:
+    """パージ先を差し替える（テストで MemoryPurger を入れるなど）。前のものを返す。"""
+    global purger
+    previous, purger = purger, p
+    return previous
+
+
+def purge(*keys: str) -> None:
+    """書き込みをコミットした後に呼ぶ。"""
+    if keys:
+        purger.purge(keys)
+
+
+def purge_all() -> None:
+    purger.purge_all()
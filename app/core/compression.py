@@ -0,0 +1,149 @@
+# app/core/compression.py
+# レスポンス圧縮（gzip / brotli）と、記事詳細の圧縮済みボディのキャッシュ。
+# - 圧縮するのは COMPRESS_MIN_BYTES 以上で Content-Type が COMPRESS_TYPES のものだけ。
+#   COMPRESS_OFFLOAD_BYTES 以上はスレッドプールで圧縮する
+# - brotli はパッケージ（brotli）が入っているときだけ使う。無ければ gzip のみ
+# - 記事詳細はエンドポイントが set_cache_key() でキー（記事 ID）と版（updated_at）を渡す。
+#   同じ版・同じ中身なら前回圧縮したバイト列を使い回す
+#   （いいね数 / コメント数は updated_at を変えずに増えるので、中身のダイジェストも一緒に比べる）
+# - キャッシュはプロセス内の LRU で、COMPRESS_CACHE_MAX_BYTES（圧縮後のサイズの合計）まで
+# - 記事が更新 / 削除されたら invalidation バスの article-<id> で消す（ほかのワーカーの分も）
+# - 圧縮にかかった CPU 時間は compression_seconds{encoding}、サイズは compression_bytes_total に出る
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.invalidation import bus
+from app.core.metrics import COMPRESSION_BYTES, COMPRESSION_SECONDS, record_cache
+
+try:
+    import brotli
+except ImportError:  # 任意。無ければ gzip だけ
+    brotli = None
+
+COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1").lower() not in ("0", "false", "no")
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# これ以上のボディはスレッドプールで圧縮する（イベントループで数 MB を圧縮すると、その間ほかのリクエストが止まる）
+COMPRESS_OFFLOAD_BYTES = int(os.getenv("COMPRESS_OFFLOAD_BYTES", str(256 * 1024)))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+COMPRESS_CACHE_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Content-Type（; 以前）の前方一致
+COMPRESS_TYPES = tuple(
+    t.strip()
+    for t in os.getenv("COMPRESS_TYPES", "application/json,text/").split(",")
+    if t.strip()
+)
+
+# request.state に置くキー（set_cache_key / CompressionMiddleware の間だけで使う）
+CACHE_KEY_STATE = "compression_cache_key"
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def set_cache_key(request, key: str, version) -> None:
+    """このレスポンスの圧縮結果を key / version でキャッシュさせる（version が変われば作り直す）。"""
+    setattr(request.state, CACHE_KEY_STATE, (key, str(version)))
+
+
+def is_compressible(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(COMPRESS_TYPES)
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Accept-Encoding から使う圧縮方式を選ぶ（br を優先）。q=0 は不可として扱う。"""
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    started = time.thread_time()
+    if encoding == "br":
+        data = brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    else:
+        data = gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+    COMPRESSION_SECONDS.labels(encoding).observe(time.thread_time() - started)
+    COMPRESSION_BYTES.labels(encoding, "in").inc(len(body))
+    COMPRESSION_BYTES.labels(encoding, "out").inc(len(data))
+    return data
+
+
+class CompressedCache:
+    """(key, encoding) → (version, 元のボディのダイジェスト, 圧縮済みボディ) の LRU。"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], tuple[str, bytes, bytes]] = OrderedDict()
+        self._size = 0
+        # 無効化はバスのスレッドから来るので、辞書の操作はロックの中で（圧縮はロックの外）
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, key: str, version: str, body: bytes, encoding: str) -> bytes:
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get((key, encoding))
+            if entry is not None and entry[0] == version and entry[1] == digest:
+                self._entries.move_to_end((key, encoding))
+                hit = entry[2]
+            else:
+                hit = None
+        if hit is not None:
+            record_cache("compressed_body", True)
+            return hit
+
+        record_cache("compressed_body", False)
+        data = compress(body, encoding)
+        with self._lock:
+            self._put((key, encoding), (version, digest, data))
+        return data
+
+    def invalidate(self, keys: frozenset[str] | None) -> None:
+        """invalidation バスのハンドラ。article-<id> → article:<id> の全エンコーディングを消す。None なら全部。"""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                self._size = 0
+                return
+            wanted = {f"article:{k[len('article-'):]}" for k in keys if k.startswith("article-")}
+            if not wanted:
+                return
+            for cache_key in [ck for ck in self._entries if ck[0] in wanted]:
+                self._size -= len(self._entries.pop(cache_key)[2])
+
+    def _put(self, cache_key: tuple[str, str], entry: tuple[str, bytes, bytes]) -> None:
+        old = self._entries.pop(cache_key, None)
+        if old is not None:
+            self._size -= len(old[2])
+        if len(entry[2]) > self.max_bytes:
+            return
+        self._entries[cache_key] = entry
+        self._size += len(entry[2])
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted[2])
+
+
+compressed_cache = CompressedCache(COMPRESS_CACHE_MAX_BYTES)
+bus.register("compressed_body", compressed_cache.invalidate)
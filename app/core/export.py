@@ -0,0 +1,106 @@
+# app/core/export.py
+# 記事の NDJSON エクスポート（バックアップ / 分析 / 検索の再インデックス用）。
+# - 1 記事 = 1 行。著者・タグ・いいね数・コメント数を含める
+# - サーバーサイドカーソル（yield_per）で EXPORT_BATCH_SIZE 行ずつ読むので、件数に関係なくメモリは一定
+# - タグ / コメント数は相関サブクエリで同じ 1 本のクエリに入れる（バッチごとの追加クエリ無し）
+# - 差分モード: updated_at が since より新しく until 以下のものだけ。
+#   until は開始時の now() - EXPORT_SETTLE_SECONDS。次回は until を since に渡す
+#   （updated_at は ORM の onupdate なので、いいね数 / 閲覧数だけの変化や削除は差分に出ない）
+# - 使う側: GET /v1/admin/export/articles と python -m scripts.export_articles
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import text
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# まとめて yield / write するバイト数の目安
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+EXPORT_SETTLE_SECONDS = int(os.getenv("EXPORT_SETTLE_SECONDS", "5"))
+
+_EXPORT_SQL = """
+    SELECT
+        a.id, a.title, a.body_md, a.body_html, a.is_published,
+        a.score, a.views, a.likes_count, a.created_at, a.updated_at,
+        u.id AS author_id, u.name AS author_name, u.email AS author_email,
+        COALESCE(
+            (SELECT array_agg(t.name ORDER BY t.name)
+             FROM article_tags AS at JOIN tags AS t ON t.id = at.tag_id
+             WHERE at.article_id = a.id),
+            '{{}}'
+        ) AS tags,
+        (SELECT count(*) FROM comments AS c WHERE c.article_id = a.id) AS comments_count
+    FROM articles AS a
+    JOIN users AS u ON u.id = a.author_id
+    WHERE a.updated_at <= :until {since_filter}
+    ORDER BY a.updated_at, a.id
+"""
+
+
+def export_until(conn) -> datetime:
+    """今回のエクスポートに含める updated_at の上限（次回の since）。"""
+    return conn.execute(
+        text("SELECT now() - make_interval(secs => :s)"), {"s": EXPORT_SETTLE_SECONDS}
+    ).scalar()
+
+
+def _iso(dt: datetime | None) -> str | None:
+    return dt.isoformat() if dt else None
+
+
+def iter_article_records(conn, until: datetime, since: datetime | None = None) -> Iterator[dict]:
+    """記事を updated_at 順に 1 件ずつ dict で返す。"""
+    sql = text(_EXPORT_SQL.format(since_filter="AND a.updated_at > :since" if since is not None else ""))
+    params = {"until": until, "since": since}
+    result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(sql, params)
+    try:
+        for r in result:
+            yield {
+                "id": r.id,
+                "title": r.title,
+                "body_md": r.body_md,
+                "body_html": r.body_html,
+                "is_published": r.is_published,
+                "score": r.score,
+                "views": r.views,
+                "likes_count": r.likes_count,
+                "comments_count": r.comments_count,
+                "created_at": _iso(r.created_at),
+                "updated_at": _iso(r.updated_at),
+                "author": {"id": r.author_id, "name": r.author_name, "email": r.author_email},
+                "tags": list(r.tags),
+            }
+    finally:
+        result.close()
+
+
+def iter_ndjson_chunks(records: Iterator[dict], gzip: bool = False) -> Iterator[bytes]:
+    """dict の列を NDJSON（必要なら gzip）のバイト列にして、EXPORT_CHUNK_BYTES 程度ずつ返す。"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits=31 → gzip 形式
+    buf: list[bytes] = []
+    size = 0
+    for record in records:
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        buf.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            data = b"".join(buf)
+            buf, size = [], 0
+            if compressor is not None:
+                data = compressor.compress(data)
+                if not data:
+                    continue
+            yield data
+    data = b"".join(buf)
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def stream_articles(engine, until: datetime, since: datetime | None = None, gzip: bool = False) -> Iterator[bytes]:
+    """接続を開いてから閉じるまでを含めたストリーム（StreamingResponse / CLI 共通）。"""
+    with engine.connect() as conn:
+        yield from iter_ndjson_chunks(iter_article_records(conn, until, since), gzip=gzip)
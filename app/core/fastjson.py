@@ -0,0 +1,26 @@
+# app/core/fastjson.py
+# 記事一覧 / フィードなど件数の多いレスポンスを orjson で 1 回で JSON バイト列にする。
+# - response_model=dict / List[dict] のままだと FastAPI が全要素を検証・走査してから JSON にするので、
+#   件数に比例して CPU を食う。ここでは組み立てた dict をそのまま orjson.dumps に渡すだけ
+# - エンドポイントは Response を直接返すので、FastAPI の検証 / 変換は通らない。
+#   response_model（app/schemas/*）はスキーマ（/docs）用で、形はシリアライザ側で合わせる
+# - datetime は orjson がそのまま書ける（出力は isoformat() と同じ形）ので文字列にしなくてよい
+# - 計測は python -m bench.serialize
+from typing import Any
+
+import orjson
+from starlette.responses import Response
+
+
+class FastJSONResponse(Response):
+    """content（dict / list、または dumps 済みの bytes）を orjson で書き出すレスポンス。
+
+    Response を直接返すと route の status_code は使われないので、201 などは status_code で渡す。
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return orjson.dumps(content)
@@ -1,21 +1,39 @@
 # app/core/firebase.py
+# Firebase Admin SDK の初期化。
+# - firebase_admin の import（google-auth など込みで 100ms 以上）と認証情報の探索は、
+#   import 時ではなく最初に必要になったとき（ensure_firebase_ready）に行う
+# - 起動後のウォームアップ（app/core/warmup.py）が warm_up() を呼ぶので、普段は初回ログインも待たない
 import os
 import json
 import base64
 import logging
+import threading
+from importlib.util import find_spec
 from typing import Optional, Tuple, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# 起動後にバックグラウンドで初期化しておくか（0 なら初回ログイン時）
+FIREBASE_WARMUP = os.getenv("FIREBASE_WARMUP", "1").lower() not in ("0", "false", "no")
+
 _FBA_READY = False
+_init_lock = threading.Lock()
 firebase_app = None
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, auth as firebase_auth  # noqa: F401
-except Exception:
-    # ランタイムに SDK 自体が無い場合
-    firebase_admin = None  # type: ignore
+
+def sdk_available() -> bool:
+    """firebase_admin が入っているか（import はしない）。"""
+    return find_spec("firebase_admin") is not None
+
+
+def _import_sdk():
+    try:
+        import firebase_admin
+        from firebase_admin import credentials  # noqa: F401
+    except Exception:
+        # ランタイムに SDK 自体が無い場合
+        return None
+    return firebase_admin
 
 
 def _pick_cred_file(path: str) -> Optional[str]:
@@ -117,9 +135,11 @@ def _resolve_credentials_source() -> Tuple[Optional[str], Optional[Dict[str, Any
 def _initialize(force: bool = False) -> None:
     global _FBA_READY, firebase_app
 
+    firebase_admin = _import_sdk()
     if firebase_admin is None:
         _FBA_READY = False
         return
+    from firebase_admin import credentials
 
     if not force:
         try:
@@ -162,15 +182,31 @@ def _initialize(force: bool = False) -> None:
 
 
 def ensure_firebase_ready() -> bool:
-    global _FBA_READY, FIREBASE_READY
+    """必要なら初期化して、使える状態かを返す（初回だけ重い）。"""
     if _FBA_READY:
         return True
-    _initialize(force=True)
-    FIREBASE_READY = _FBA_READY
+    with _init_lock:
+        if not _FBA_READY:
+            _initialize()
     return _FBA_READY
 
 
-_initialize()
-FIREBASE_READY = _FBA_READY
+def get_auth():
+    """firebase_admin.auth（SDK が無ければ None）。"""
+    if _import_sdk() is None:
+        return None
+    from firebase_admin import auth
+
+    return auth
+
+
+def warm_up() -> None:
+    """起動フックから別スレッドで呼ぶ。失敗しても初回ログイン時にもう一度試す。"""
+    try:
+        ensure_firebase_ready()
+        get_auth()
+    except Exception:
+        logger.exception("Firebase warm-up failed")
+
 
-__all__ = ['firebase_app', 'firebase_auth', 'FIREBASE_READY', 'ensure_firebase_ready']
+__all__ = ['firebase_app', 'sdk_available', 'ensure_firebase_ready', 'get_auth', 'warm_up']
@@ -0,0 +1,405 @@
+# app/core/importer.py
+# 記事の一括インポート（他の Wiki からの移行用）。1 行 1 記事の NDJSON を受け取る:
+#   {"external_id": "wiki:123", "title": "...", "body_md": "...", "is_published": true,
+#    "author": {"email": "...", "name": "..."}, "tags": ["Python", "線形代数"], "created_at": "2024-04-01T00:00:00+09:00"}
+# - external_id で冪等。既にあれば中身が変わったときだけ更新し、タグは入力に合わせて付け替える
+# - 著者（email）/ タグ（name）が無ければ作る（著者は student）
+# - Markdown → HTML はプロセスプール（forkserver）で並列に変換
+# - IMPORT_BATCH_SIZE 件ずつ、users / tags / articles / article_tags を unnest で集合的に書き込む（1 バッチ 1 トランザクション）
+# - 入力やレンダリングの誤りはその行だけ errors に入れて残りは続ける。
+#   バッチの書き込み自体が失敗したら 1 件ずつやり直して、原因の行だけを落とす
+# - 使う側: POST /v1/admin/import/articles と python -m scripts.import_articles
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from sqlalchemy import text
+
+from app.core import related
+from app.core.invalidation import invalidate_all
+from app.core.universities import EMAIL_UNIVERSITY_SQL
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# 0 / 1 ならプールを使わずその場で変換する
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 結果に載せるエラーの最大件数（件数自体は failed に全部数える）
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+# 各カラムの長さ（src/models に合わせる）
+_MAX_LEN = {"external_id": 200, "title": 200, "email": 255, "name": 100, "tag": 50}
+
+
+class RecordError(ValueError):
+    external_id: str | None = None
+
+
+@dataclass
+class _Record:
+    line: int
+    external_id: str
+    title: str
+    body_md: str
+    is_published: bool
+    author_email: str
+    author_name: str
+    tags: list[str]
+    created_at: datetime | None
+    body_html: str | None = None
+
+
+@dataclass
+class ImportResult:
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def error(self, line: int, external_id: str | None, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "external_id": external_id, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+# ======================================================
+# 入力の検証
+# ======================================================
+
+def _str(obj: dict, key: str, limit: int | None = None, required: bool = True) -> str:
+    value = obj.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise RecordError(f"{key} is required")
+        return ""
+    if not isinstance(value, str):
+        raise RecordError(f"{key} must be a string")
+    value = value.strip()
+    if limit is not None and len(value) > limit:
+        raise RecordError(f"{key} is longer than {limit} characters")
+    return value
+
+
+def parse_record(line_no: int, raw: str) -> _Record:
+    try:
+        obj = json.loads(raw)
+    except ValueError as exc:
+        raise RecordError(f"invalid JSON: {exc}") from None
+    if not isinstance(obj, dict):
+        raise RecordError("record must be a JSON object")
+    try:
+        return _validate(line_no, obj)
+    except RecordError as exc:
+        exc.external_id = obj.get("external_id") if isinstance(obj.get("external_id"), str) else None
+        raise
+
+
+def _validate(line_no: int, obj: dict) -> _Record:
+
+    author = obj.get("author")
+    if not isinstance(author, dict):
+        raise RecordError("author must be an object with email")
+    email = _str(author, "email", _MAX_LEN["email"])
+    name = _str(author, "name", _MAX_LEN["name"], required=False) or email.split("@", 1)[0][: _MAX_LEN["name"]]
+
+    tags_raw = obj.get("tags") or []
+    if not isinstance(tags_raw, list) or not all(isinstance(t, str) for t in tags_raw):
+        raise RecordError("tags must be a list of strings")
+    tags: list[str] = []
+    for t in tags_raw:
+        t = t.strip()
+        if not t:
+            continue
+        if len(t) > _MAX_LEN["tag"]:
+            raise RecordError(f"tag {t[:20]!r}... is longer than {_MAX_LEN['tag']} characters")
+        if t not in tags:
+            tags.append(t)
+
+    created_at = None
+    if obj.get("created_at") is not None:
+        try:
+            created_at = datetime.fromisoformat(str(obj["created_at"]))
+        except ValueError:
+            raise RecordError("created_at must be an ISO 8601 timestamp") from None
+
+    return _Record(
+        line=line_no,
+        external_id=_str(obj, "external_id", _MAX_LEN["external_id"]),
+        title=_str(obj, "title", _MAX_LEN["title"]),
+        body_md=_str(obj, "body_md"),
+        is_published=bool(obj.get("is_published", False)),
+        author_email=email,
+        author_name=name,
+        tags=tags,
+        created_at=created_at,
+    )
+
+
+# ======================================================
+# Markdown の変換（プロセスプール）
+# ======================================================
+
+def _render(body_md: str) -> tuple[str | None, str | None]:
+    # worker プロセスで実行。例外はその記事だけの失敗として返す
+    from app.utils.markdown import render_and_sanitize
+
+    try:
+        return render_and_sanitize(body_md), None
+    except Exception as exc:
+        return None, f"markdown render failed: {exc!r}"
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if IMPORT_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # fork だと、ほかのスレッド（監査ログ / 閲覧数 / invalidation バスなど）が持っていたロック
+            # （prometheus_client / logging）を握ったままの子ができて固まることがあるので forkserver で
+            _pool = ProcessPoolExecutor(
+                max_workers=IMPORT_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _render_all(records: list[_Record]) -> list[tuple[str | None, str | None]]:
+    bodies = [r.body_md for r in records]
+    pool = _get_pool()
+    if pool is None:
+        return [_render(b) for b in bodies]
+    chunksize = max(1, len(bodies) // (IMPORT_WORKERS * 4))
+    return list(pool.map(_render, bodies, chunksize=chunksize))
+
+
+# ======================================================
+# 書き込み（集合的に）
+# ======================================================
+
+# 大学はログイン時と同じ規則でメールのドメインから（app/core/universities.py）
+_UPSERT_USERS_SQL = text(
+    f"""
+    INSERT INTO users (name, email, role, university_id)
+    SELECT DISTINCT ON (email) name, email, 'student', {EMAIL_UNIVERSITY_SQL.format(email="u.email")}
+    FROM unnest(CAST(:names AS text[]), CAST(:emails AS text[])) AS u(name, email)
+    ON CONFLICT (email) DO NOTHING
+    """
+)
+
+_UPSERT_TAGS_SQL = text(
+    """
+    INSERT INTO tags (name)
+    SELECT DISTINCT name FROM unnest(CAST(:names AS text[])) AS t(name)
+    ON CONFLICT (name) DO NOTHING
+    """
+)
+
+# 既存で中身が同じものは WHERE で弾かれて RETURNING に出てこない（= unchanged）
+_UPSERT_ARTICLES_SQL = text(
+    """
+    INSERT INTO articles (external_id, author_id, title, body_md, body_html, is_published,
+                          university_id, score, views, likes_count, created_at, updated_at)
+    SELECT v.external_id, u.id, v.title, v.body_md, v.body_html, v.is_published,
+           u.university_id, 0, 0, 0, COALESCE(v.created_at, now()), now()
+    FROM unnest(
+        CAST(:external_ids AS text[]), CAST(:emails AS text[]), CAST(:titles AS text[]),
+        CAST(:bodies_md AS text[]), CAST(:bodies_html AS text[]), CAST(:published AS boolean[]),
+        CAST(:created_ats AS timestamptz[])
+    ) AS v(external_id, email, title, body_md, body_html, is_published, created_at)
+    JOIN users AS u ON u.email = v.email
+    ON CONFLICT (external_id) DO UPDATE SET
+        author_id = EXCLUDED.author_id,
+        university_id = EXCLUDED.university_id,
+        title = EXCLUDED.title,
+        body_md = EXCLUDED.body_md,
+        body_html = EXCLUDED.body_html,
+        is_published = EXCLUDED.is_published,
+        updated_at = now()
+    WHERE (articles.author_id, articles.title, articles.body_md, articles.is_published)
+          IS DISTINCT FROM (EXCLUDED.author_id, EXCLUDED.title, EXCLUDED.body_md, EXCLUDED.is_published)
+    RETURNING external_id, (xmax = 0) AS inserted
+    """
+)
+
+_ARTICLE_IDS_SQL = text("SELECT external_id, id FROM articles WHERE external_id = ANY(CAST(:external_ids AS text[]))")
+
+# タグは入力どおりに付け替える（足りないものを足し、入力に無いものを外す）
+_ATTACH_TAGS_SQL = text(
+    """
+    INSERT INTO article_tags (article_id, tag_id)
+    SELECT p.article_id, t.id
+    FROM unnest(CAST(:article_ids AS int[]), CAST(:tag_names AS text[])) AS p(article_id, name)
+    JOIN tags AS t ON t.name = p.name
+    ON CONFLICT DO NOTHING
+    RETURNING article_id, tag_id
+    """
+)
+
+_DETACH_TAGS_SQL = text(
+    """
+    DELETE FROM article_tags AS at
+    WHERE at.article_id = ANY(CAST(:all_article_ids AS int[]))
+      AND NOT EXISTS (
+          SELECT 1
+          FROM unnest(CAST(:article_ids AS int[]), CAST(:tag_names AS text[])) AS p(article_id, name)
+          JOIN tags AS t ON t.name = p.name
+          WHERE p.article_id = at.article_id AND t.id = at.tag_id
+      )
+    RETURNING at.article_id, at.tag_id
+    """
+)
+
+
+def _write_batch(conn, records: list[_Record]) -> dict[str, str]:
+    """1 バッチを書き込み、external_id → 'created' | 'updated' | 'unchanged' を返す。"""
+    conn.execute(
+        _UPSERT_USERS_SQL,
+        {"names": [r.author_name for r in records], "emails": [r.author_email for r in records]},
+    )
+    tag_names = sorted({t for r in records for t in r.tags})
+    if tag_names:
+        conn.execute(_UPSERT_TAGS_SQL, {"names": tag_names})
+
+    changed = {
+        row.external_id: "created" if row.inserted else "updated"
+        for row in conn.execute(
+            _UPSERT_ARTICLES_SQL,
+            {
+                "external_ids": [r.external_id for r in records],
+                "emails": [r.author_email for r in records],
+                "titles": [r.title for r in records],
+                "bodies_md": [r.body_md for r in records],
+                "bodies_html": [r.body_html for r in records],
+                "published": [r.is_published for r in records],
+                "created_ats": [r.created_at for r in records],
+            },
+        )
+    }
+    ids = dict(conn.execute(_ARTICLE_IDS_SQL, {"external_ids": [r.external_id for r in records]}).all())
+
+    pairs = [(ids[r.external_id], t) for r in records for t in r.tags]
+    tag_params = {"article_ids": [a for a, _ in pairs], "tag_names": [t for _, t in pairs]}
+    touched = conn.execute(_DETACH_TAGS_SQL, {**tag_params, "all_article_ids": list(ids.values())}).all()
+    if pairs:
+        touched += conn.execute(_ATTACH_TAGS_SQL, tag_params).all()
+    # 関連記事: タグを付け外しした記事と、本文 / 公開状態が変わった記事（どちらかは区別していない）を積む
+    related.mark_dirty(
+        conn,
+        [a for a, _ in touched] + [ids[e] for e in changed],
+        [t for _, t in touched],
+    )
+
+    return {r.external_id: changed.get(r.external_id, "unchanged") for r in records}
+
+
+def _flush(engine, records: list[_Record], result: ImportResult) -> None:
+    if not records:
+        return
+
+    rendered = _render_all(records)
+    ready: list[_Record] = []
+    for r, (html, err) in zip(records, rendered):
+        if err is not None:
+            result.error(r.line, r.external_id, err)
+        else:
+            r.body_html = html
+            ready.append(r)
+    _write(engine, ready, result)
+
+
+def _write(engine, records: list[_Record], result: ImportResult) -> None:
+    if not records:
+        return
+    try:
+        with engine.begin() as conn:
+            outcome = _write_batch(conn, records)
+    except Exception as exc:
+        if len(records) == 1:
+            logger.warning("Import failed for line %d", records[0].line, exc_info=True)
+            result.error(records[0].line, records[0].external_id, f"database write failed: {exc.__class__.__name__}")
+            return
+        # どの行が原因か分からないので 1 件ずつやり直す
+        logger.warning("Import batch failed; retrying %d records one by one", len(records), exc_info=True)
+        for r in records:
+            _write(engine, [r], result)
+        return
+
+    for status in outcome.values():
+        setattr(result, status, getattr(result, status) + 1)
+
+
+def import_ndjson(engine, lines: Iterable[str | bytes], batch_size: int | None = None) -> ImportResult:
+    """NDJSON の行を順に読み込んでインポートする。空行は読み飛ばす。"""
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    result = ImportResult()
+    batch: list[_Record] = []
+    seen: set[str] = set()  # 同じバッチ内の重複 external_id（ON CONFLICT は同じ行を 2 回更新できない）
+
+    for line_no, raw in enumerate(lines, start=1):
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        if not raw.strip():
+            continue
+        result.total += 1
+        try:
+            record = parse_record(line_no, raw)
+        except RecordError as exc:
+            result.error(line_no, exc.external_id, str(exc))
+            continue
+        if record.external_id in seen:
+            # 先に同じバッチを書き切ってから、後の行で上書きする
+            _flush(engine, batch, result)
+            batch, seen = [], set()
+        batch.append(record)
+        seen.add(record.external_id)
+        if len(batch) >= batch_size:
+            _flush(engine, batch, result)
+            batch, seen = [], set()
+
+    _flush(engine, batch, result)
+    if result.created or result.updated:
+        # どの記事が変わったかは追っていないので CDN はまとめて消す
+        invalidate_all()
+    return result
+
+
+def iter_lines(data: bytes) -> Iterator[bytes]:
+    """gzip（マジックバイトで判定）なら展開して、行ごとに返す。"""
+    if data[:2] == b"\x1f\x8b":
+        import gzip
+        import io
+
+        with gzip.GzipFile(fileobj=io.BytesIO(data)) as f:
+            yield from f
+        return
+    yield from data.splitlines()
@@ -0,0 +1,235 @@
+# app/core/invalidation.py
+# 書き込み時のキャッシュ無効化。ワーカー / Pod をまたいで Postgres の LISTEN / NOTIFY で配る。
+# - 書き込み側は invalidate("article-12", "articles") のように、変わったもののキーを渡すだけ
+#   （キーは CDN のサロゲートキーと同じ。app/core/cdn.py の一覧を参照）
+#     1. このプロセスのキャッシュ（register() したハンドラ）をその場で消す
+#     2. CDN のパージを出す（cdn.purge。CDN へは書いたプロセスから 1 回だけ）
+#     3. NOTIFY でほかのワーカーに配る（送信はバスのスレッドが LISTEN 用の接続でまとめて行う）
+# - 各ワーカーのバスのスレッドが LISTEN し、届いたキーでハンドラを呼ぶ（自分が出したものは除く）
+# - 接続が切れたら張り直す。切れている間のメッセージは届かないので、張り直したら全キャッシュを捨てる
+#   送れなかったメッセージは再接続後に送る
+# - LISTEN 用の接続はプールから外した専用の 1 本（psycopg 3 が必要。psycopg2 だとバスは止まり、
+#   そのプロセスの中だけで無効化する）
+# - ペイロードは JSON {"o": 送信元, "k": [キー...]}。8000 バイトの上限を超えそうなら分割し、
+#   キーが多すぎるときは {"o": ..., "all": true}（全消し）にする
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from typing import Callable, Iterable
+
+from app.core import cdn
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_ENABLED = os.getenv("INVALIDATION_ENABLED", "1").lower() not in ("0", "false", "no")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+# LISTEN の待ち時間（秒）。送信待ちのメッセージはこの間隔でまとめて送る
+INVALIDATION_POLL_INTERVAL = float(os.getenv("INVALIDATION_POLL_INTERVAL", "0.2"))
+# 1 メッセージに入れるキーの数の上限。超えたら全消しにする
+INVALIDATION_MAX_KEYS = int(os.getenv("INVALIDATION_MAX_KEYS", "1000"))
+INVALIDATION_RECONNECT_MAX = float(os.getenv("INVALIDATION_RECONNECT_MAX", "30"))
+
+# NOTIFY のペイロード上限（8000 バイト）より少し小さく
+_MAX_PAYLOAD = 7900
+_ALL = None  # ハンドラに渡す「全部消す」
+
+# keys は消すキーの集合。None なら全部消す
+Handler = Callable[[frozenset[str] | None], None]
+
+
+class _Unsupported(Exception):
+    """LISTEN / NOTIFY が使えないドライバ。再接続しても直らないのでバスを止める。"""
+
+
+class InvalidationBus:
+    def __init__(self) -> None:
+        self.origin = uuid.uuid4().hex[:12]
+        self._handlers: list[tuple[str, Handler]] = []
+        self._outbox: queue.Queue[frozenset[str] | None] = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._sending = False
+        self.connected = False
+        self.full_flushes = 0
+
+    # --------------------------------------------------
+    # 購読 / 発行
+    # --------------------------------------------------
+
+    def register(self, name: str, handler: Handler) -> None:
+        """プロセス内キャッシュのハンドラを登録する（keys か、全消しなら None で呼ばれる）。"""
+        self._handlers.append((name, handler))
+
+    def dispatch(self, keys: frozenset[str] | None) -> None:
+        for name, handler in self._handlers:
+            try:
+                handler(keys)
+            except Exception:
+                logger.exception("Invalidation handler %s failed", name)
+
+    def publish(self, keys: Iterable[str] | None) -> None:
+        """このプロセスで消して、ほかのワーカーへ送る（送信はバスのスレッド）。"""
+        keys = frozenset(keys) if keys is not None else _ALL
+        self.dispatch(keys)
+        if self._sending:
+            self._outbox.put(keys)
+
+    # --------------------------------------------------
+    # バックグラウンドスレッド
+    # --------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._sending = True
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self._sending = False
+
+    def _connect(self):
+        from app.database import engine
+
+        raw = engine.raw_connection()
+        conn = raw.driver_connection
+        raw.detach()  # LISTEN し続けるのでプールには返さない
+        if not hasattr(conn, "notifies"):
+            conn.close()
+            raise _Unsupported(f"LISTEN/NOTIFY needs the psycopg (v3) driver, not {type(conn).__module__}")
+        conn.autocommit = True
+        conn.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+        return conn
+
+    def _run(self) -> None:
+        delay = 0.5
+        ever_connected = False
+        while not self._stop.is_set():
+            try:
+                conn = self._connect()
+            except _Unsupported as exc:
+                logger.error("Invalidation bus disabled; caches are only invalidated in this process: %s", exc)
+                self._sending = False
+                return
+            except Exception:
+                logger.warning("Invalidation bus could not connect; retrying in %.1fs", delay, exc_info=True)
+                self._stop.wait(delay)
+                delay = min(delay * 2, INVALIDATION_RECONNECT_MAX)
+                continue
+
+            self.connected = True
+            delay = 0.5
+            if ever_connected:
+                # 切れている間に来たメッセージは取りこぼしているかもしれない
+                logger.warning("Invalidation bus reconnected; flushing local caches")
+                self.full_flushes += 1
+                self.dispatch(_ALL)
+            ever_connected = True
+            try:
+                self._serve(conn)
+            except Exception:
+                logger.warning("Invalidation bus connection lost", exc_info=True)
+            finally:
+                self.connected = False
+                try:
+                    conn.close()  # プールの外の接続なので直接閉じる
+                except Exception:
+                    pass
+
+    def _serve(self, conn) -> None:
+        while not self._stop.is_set():
+            self._send(conn)
+            for notify in conn.notifies(timeout=INVALIDATION_POLL_INTERVAL):
+                self._receive(notify.payload)
+        self._send(conn)  # 停止前に残りを送る
+
+    def _send(self, conn) -> None:
+        pending: list[frozenset[str] | None] = []
+        while True:
+            try:
+                pending.append(self._outbox.get_nowait())
+            except queue.Empty:
+                break
+        if not pending:
+            return
+        try:
+            for payload in _encode(self.origin, pending):
+                conn.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, payload))
+        except Exception:
+            # 張り直した後にもう一度送る
+            for keys in pending:
+                self._outbox.put(keys)
+            raise
+
+    def _receive(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Invalid invalidation payload: %.200s", payload)
+            return
+        if message.get("o") == self.origin:
+            return  # 自分が出したもの（publish の時点で消してある）
+        if message.get("all"):
+            self.dispatch(_ALL)
+        else:
+            self.dispatch(frozenset(message.get("k") or ()))
+
+
+def _encode(origin: str, pending: list[frozenset[str] | None]) -> list[str]:
+    """送るキーをまとめて、上限に収まる JSON ペイロードに分ける。"""
+    if any(keys is _ALL for keys in pending):
+        return [json.dumps({"o": origin, "all": True})]
+    keys = sorted(set().union(*pending))
+    if len(keys) > INVALIDATION_MAX_KEYS:
+        return [json.dumps({"o": origin, "all": True})]
+    payloads = []
+    chunk: list[str] = []
+    size = 0
+    for key in keys:
+        if chunk and size + len(key) + 4 > _MAX_PAYLOAD - 40:
+            payloads.append(json.dumps({"o": origin, "k": chunk}, separators=(",", ":")))
+            chunk, size = [], 0
+        chunk.append(key)
+        size += len(key) + 4
+    if chunk:
+        payloads.append(json.dumps({"o": origin, "k": chunk}, separators=(",", ":")))
+    return payloads
+
+
+bus = InvalidationBus()
+
+
+def invalidate(*keys: str) -> None:
+    """書き込みをコミットした後に呼ぶ。ローカルのキャッシュ / CDN / ほかのワーカーをまとめて無効化する。"""
+    if not keys:
+        return
+    bus.publish(keys)
+    cdn.purge(*keys)
+
+
+def invalidate_all() -> None:
+    """どれが変わったか分からないとき（一括インポートなど）。"""
+    bus.publish(None)
+    cdn.purge_all()
+
+
+def notify_workers(engine, keys: Iterable[str] | None = None) -> None:
+    """
+    バスを動かしていないプロセス（CLI など）から、ワーカーたちに無効化を送る。
+    engine の DB に NOTIFY してすぐ戻る。keys が None なら全消し。
+    """
+    from sqlalchemy import text
+
+    pending = [frozenset(keys) if keys is not None else _ALL]
+    origin = uuid.uuid4().hex[:12]
+    with engine.begin() as conn:
+        for payload in _encode(origin, pending):
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": INVALIDATION_CHANNEL, "payload": payload})
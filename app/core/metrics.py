@@ -0,0 +1,173 @@
+# app/core/metrics.py
+# Prometheus 形式のメトリクス定義と /metrics の出力。
+# - 複数ワーカー（uvicorn --workers / gunicorn）のときは PROMETHEUS_MULTIPROC_DIR を
+#   空のディレクトリに設定して起動する。各ワーカーが mmap ファイルに書き、スクレイプ時に合算される
+# - ホットパスでは inc / observe だけ。プール状態などはスクレイプ時にまとめて取る
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# --- HTTP ---
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP リクエスト数",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP リクエストの処理時間",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "処理中の HTTP リクエスト数",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# --- スレッドプール（同期ルートは anyio のスレッドで動く） ---
+THREADPOOL_IN_USE = Gauge(
+    "threadpool_tokens_in_use",
+    "使用中のワーカースレッド数",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_CAPACITY = Gauge(
+    "threadpool_tokens_total",
+    "ワーカースレッドの上限",
+    multiprocess_mode="livesum",
+)
+
+# --- DB プール ---
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "貸し出し中のコネクション数",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "プールサイズ（overflow を除く）",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "プールの overflow 数",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+# --- キャッシュ（ヒット率は hit / (hit + miss) を PromQL で） ---
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "アプリ内キャッシュの参照数",
+    ["cache", "result"],
+)
+
+# --- 閲覧数バッファ（app/core/view_counter.py） ---
+VIEW_EVENTS = Counter(
+    "article_view_events_total",
+    "閲覧数バッファのイベント数（recorded / deduplicated / flushed / dropped）",
+    ["result"],
+)
+
+# --- 監査ログ（app/core/audit.py） ---
+AUDIT_EVENTS = Counter(
+    "audit_log_events_total",
+    "監査ログのイベント数（queued / written / dropped）",
+    ["result"],
+)
+
+# --- レート制限（app/core/rate_limit.py） ---
+RATE_LIMITED = Counter(
+    "rate_limited_total",
+    "レート制限で 429 を返した数",
+    ["rule", "scope"],
+)
+
+# --- レスポンス圧縮（app/core/compression.py）。CPU 時間はキャッシュヒット分を含まない ---
+COMPRESSION_SECONDS = Histogram(
+    "compression_seconds",
+    "レスポンス 1 件の圧縮にかかった CPU 時間",
+    ["encoding"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+COMPRESSION_BYTES = Counter(
+    "compression_bytes_total",
+    "圧縮前（in）/ 圧縮後（out）のバイト数",
+    ["encoding", "direction"],
+)
+
+# --- Markdown ---
+MARKDOWN_RENDER = Histogram(
+    "markdown_render_seconds",
+    "Markdown → サニタイズ済み HTML の変換時間",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+@contextmanager
+def observe(histogram: Histogram):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+def _collect_runtime_gauges() -> None:
+    """スクレイプ時にだけ取れば足りる値をまとめて更新する。"""
+    from app.database import engine, replica_engine
+
+    try:
+        from anyio import to_thread
+
+        limiter = to_thread.current_default_thread_limiter()
+        THREADPOOL_IN_USE.set(limiter.borrowed_tokens)
+        THREADPOOL_CAPACITY.set(limiter.total_tokens)
+    except Exception:
+        pass
+
+    for name, eng in (("primary", engine), ("replica", replica_engine)):
+        if eng is None:
+            continue
+        pool = eng.pool
+        for gauge, attr in (
+            (DB_POOL_CHECKED_OUT, "checkedout"),
+            (DB_POOL_SIZE, "size"),
+            (DB_POOL_OVERFLOW, "overflow"),
+        ):
+            fn = getattr(pool, attr, None)
+            if fn is not None:
+                gauge.labels(name).set(fn())
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Prometheus のテキスト形式で全メトリクスを返す。"""
+    _collect_runtime_gauges()
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
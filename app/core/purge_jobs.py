@@ -0,0 +1,281 @@
+# app/core/purge_jobs.py
+# 管理者のユーザーデータ削除（purge）をバックグラウンドで小分けに実行する。
+# - 1 バッチ = 1 トランザクション（削除 + 進捗の更新）。ロックはバッチの間しか持たない
+# - 順番は いいね → コメント → 記事。記事の削除は ON DELETE CASCADE に任せる
+#   （article_tags / 他人のいいね・コメント / 急上昇の集計はまとめて消える）
+# - 進捗は purge_jobs に残るので、途中で落ちても続きから再開できる
+#     * 停止時: 実行中のジョブは pending に戻す
+#     * プロセスが落ちた: updated_at が PURGE_STALE_SECONDS より古い running を拾い直す
+# - 拾うたびに claim_token を振り直す。進捗 / 完了 / 中断 / 失敗の UPDATE は自分の token のときだけ効き、
+#   外れていたら（1 バッチが長すぎて他のワーカーに拾い直された）そのバッチを巻き戻して手を引く
+#   （削除件数の二重計上や、完了の監査ログ / パージが 2 回出るのを防ぐ）
+# - 複数ワーカーでも FOR UPDATE SKIP LOCKED で 1 ジョブは 1 つのワーカーだけが動かす
+import logging
+import os
+import threading
+import uuid
+
+from sqlalchemy import text
+
+from app.core.audit import audit_writer
+from app.core.invalidation import invalidate
+
+logger = logging.getLogger(__name__)
+
+PURGE_WORKER_ENABLED = os.getenv("PURGE_WORKER_ENABLED", "1").lower() not in ("0", "false", "no")
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+# 記事は 1 行ごとにカスケードが走るので小さめ
+PURGE_ARTICLE_BATCH_SIZE = int(os.getenv("PURGE_ARTICLE_BATCH_SIZE", "100"))
+# バッチの間に空ける時間（秒）。他のトランザクションにロックを譲る
+PURGE_BATCH_PAUSE = float(os.getenv("PURGE_BATCH_PAUSE", "0.05"))
+PURGE_POLL_INTERVAL = float(os.getenv("PURGE_POLL_INTERVAL", "5"))
+PURGE_STALE_SECONDS = int(os.getenv("PURGE_STALE_SECONDS", "120"))
+
+# phase → (削除 SQL, 削除件数のカラム, 次の phase, バッチサイズ)
+# 削除 SQL は「消した件数」を 1 行で返す
+_PHASES = {
+    "likes": (
+        text(
+            """
+            WITH del AS (
+                DELETE FROM likes AS l
+                USING (
+                    SELECT article_id FROM likes WHERE user_id = :user_id
+                    ORDER BY article_id LIMIT :n
+                ) AS s
+                WHERE l.user_id = :user_id AND l.article_id = s.article_id
+                RETURNING l.article_id
+            ), upd AS (
+                UPDATE articles AS a SET likes_count = a.likes_count - 1
+                FROM del WHERE a.id = del.article_id
+                RETURNING 1
+            )
+            SELECT count(*) FROM del
+            """
+        ),
+        "likes_deleted",
+        "comments",
+        PURGE_BATCH_SIZE,
+    ),
+    "comments": (
+        text(
+            """
+            WITH del AS (
+                DELETE FROM comments WHERE id IN (
+                    SELECT id FROM comments WHERE author_id = :user_id ORDER BY id LIMIT :n
+                )
+                RETURNING 1
+            )
+            SELECT count(*) FROM del
+            """
+        ),
+        "comments_deleted",
+        "articles",
+        PURGE_BATCH_SIZE,
+    ),
+    "articles": (
+        text(
+            """
+            WITH del AS (
+                DELETE FROM articles WHERE id IN (
+                    SELECT id FROM articles WHERE author_id = :user_id ORDER BY id LIMIT :n
+                )
+                RETURNING 1
+            )
+            SELECT count(*) FROM del
+            """
+        ),
+        "articles_deleted",
+        "done",
+        PURGE_ARTICLE_BATCH_SIZE,
+    ),
+}
+
+# 同じユーザーの pending / running があれば作らない（ux_purge_jobs_active_user）
+_ENQUEUE_SQL = text(
+    """
+    INSERT INTO purge_jobs (user_id, requested_by, status, phase)
+    SELECT id, :requested_by, 'pending', 'likes' FROM users WHERE id = ANY(:user_ids)
+    ON CONFLICT (user_id) WHERE status IN ('pending','running') DO NOTHING
+    """
+)
+
+_CLAIM_SQL = text(
+    """
+    UPDATE purge_jobs SET status = 'running', claim_token = :token, error = NULL, updated_at = now()
+    WHERE id = (
+        SELECT id FROM purge_jobs
+        WHERE status = 'pending'
+           OR (status = 'running' AND updated_at < now() - make_interval(secs => :stale))
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, user_id, phase
+    """
+)
+
+_INIT_TOTALS_SQL = text(
+    """
+    UPDATE purge_jobs SET
+        likes_total    = (SELECT count(*) FROM likes WHERE user_id = :user_id),
+        comments_total = (SELECT count(*) FROM comments WHERE author_id = :user_id),
+        articles_total = (SELECT count(*) FROM articles WHERE author_id = :user_id)
+    WHERE id = :job_id AND likes_total IS NULL
+    """
+)
+
+
+def enqueue(db, user_ids: list[int], requested_by: int | None) -> list[int]:
+    """ジョブを登録し、対象ユーザーの実行中 / 待ちのジョブ ID を返す（既存があればそれ）。"""
+    if not user_ids:
+        return []
+    select_sql = text(
+        "SELECT id FROM purge_jobs WHERE user_id = ANY(:user_ids) "
+        "AND status IN ('pending','running') ORDER BY id"
+    )
+    db.execute(_ENQUEUE_SQL, {"user_ids": list(user_ids), "requested_by": requested_by})
+    job_ids = db.execute(select_sql, {"user_ids": list(user_ids)}).scalars().all()
+    if len(job_ids) < len(set(user_ids)):
+        # INSERT が既存のジョブとぶつかって何もしなかった後、SELECT までの間にそのジョブが終わった。
+        # もう一度登録する（今度は終わったジョブとはぶつからない）
+        db.execute(_ENQUEUE_SQL, {"user_ids": list(user_ids), "requested_by": requested_by})
+        job_ids = db.execute(select_sql, {"user_ids": list(user_ids)}).scalars().all()
+    db.commit()
+    purge_worker.wake()
+    return list(job_ids)
+
+
+class ClaimLost(Exception):
+    """ジョブが他のワーカーに拾い直された（claim_token が変わった）。"""
+
+
+def _update_owned(conn, sql: str, params: dict) -> None:
+    """自分が拾ったジョブのときだけ UPDATE する。外れていたら ClaimLost（呼び出し側のトランザクションは巻き戻る）。"""
+    if conn.execute(text(f"{sql} AND claim_token = :token RETURNING id"), params).first() is None:
+        raise ClaimLost(params["job_id"])
+
+
+def run_batch(engine, job_id: int, user_id: int | None, phase: str, token: str) -> str:
+    """1 バッチ分を削除して進捗を書き、次に実行する phase を返す。"""
+    if user_id is None or phase == "done":
+        next_phase = "done"
+    else:
+        sql, column, after, size = _PHASES[phase]
+        with engine.begin() as conn:
+            deleted = conn.execute(sql, {"user_id": user_id, "n": size}).scalar() or 0
+            next_phase = phase if deleted >= size else after
+            _update_owned(
+                conn,
+                f"UPDATE purge_jobs SET {column} = {column} + :deleted, phase = :phase, updated_at = now() "
+                "WHERE id = :job_id",
+                {"deleted": deleted, "phase": next_phase, "job_id": job_id, "token": token},
+            )
+    if next_phase == "done":
+        with engine.begin() as conn:
+            _update_owned(
+                conn,
+                "UPDATE purge_jobs SET status = 'done', phase = 'done', updated_at = now(), finished_at = now() "
+                "WHERE id = :job_id",
+                {"job_id": job_id, "token": token},
+            )
+    return next_phase
+
+
+class PurgeWorker:
+    """pending のジョブを拾って最後まで（または停止まで）実行するバックグラウンドスレッド。"""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="purge-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def run_once(self, engine=None) -> int | None:
+        """ジョブを 1 つ拾って実行する。拾えなければ None。"""
+        if engine is None:
+            from app.database import engine
+
+        token = uuid.uuid4().hex
+        with engine.begin() as conn:
+            row = conn.execute(_CLAIM_SQL, {"stale": PURGE_STALE_SECONDS, "token": token}).first()
+            if row is None:
+                return None
+            job_id, user_id, phase = row
+            if user_id is not None:
+                conn.execute(_INIT_TOTALS_SQL, {"job_id": job_id, "user_id": user_id})
+
+        logger.info("Purge job %d started (user_id=%s, phase=%s)", job_id, user_id, phase)
+        try:
+            while True:
+                if self._stop.is_set():
+                    # 続きは次の起動時（または他のワーカー）に
+                    with engine.begin() as conn:
+                        _update_owned(
+                            conn,
+                            "UPDATE purge_jobs SET status = 'pending', claim_token = NULL, updated_at = now() "
+                            "WHERE id = :job_id",
+                            {"job_id": job_id, "token": token},
+                        )
+                    logger.info("Purge job %d paused at phase %s", job_id, phase)
+                    return job_id
+                # phase が done でも status の更新前に落ちた場合があるので 1 回は run_batch を通す
+                phase = run_batch(engine, job_id, user_id, phase, token)
+                if phase == "done":
+                    break
+                if PURGE_BATCH_PAUSE > 0:
+                    self._stop.wait(PURGE_BATCH_PAUSE)
+        except ClaimLost:
+            # 続き（完了の記録 / 監査ログ / パージ）は拾い直したワーカーが行う
+            logger.warning("Purge job %d was reclaimed by another worker; giving it up", job_id)
+            return job_id
+        except Exception as exc:
+            logger.exception("Purge job %d failed", job_id)
+            try:
+                with engine.begin() as conn:
+                    _update_owned(
+                        conn,
+                        "UPDATE purge_jobs SET status = 'failed', error = :error, updated_at = now() WHERE id = :job_id",
+                        {"job_id": job_id, "error": repr(exc)[:2000], "token": token},
+                    )
+            except ClaimLost:
+                logger.warning("Purge job %d was reclaimed by another worker; not marking it failed", job_id)
+                return job_id
+            audit_writer.record("user_purge_failed", "user", user_id, meta={"job_id": job_id, "phase": phase})
+            return job_id
+
+        logger.info("Purge job %d finished", job_id)
+        if user_id is not None:
+            invalidate("articles", f"user-{user_id}")
+        audit_writer.record("user_purge_finished", "user", user_id, meta={"job_id": job_id})
+        return job_id
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job_id = self.run_once()
+            except Exception:
+                logger.exception("Purge worker crashed")
+                job_id = None
+            if job_id is None:
+                self._wakeup.wait(PURGE_POLL_INTERVAL)
+                self._wakeup.clear()
+
+
+purge_worker = PurgeWorker()
@@ -0,0 +1,113 @@
+# app/core/query_stats.py
+# リクエスト単位の SQL 計測。
+# - SQLAlchemy のイベントでクエリ数 / DB 時間 / 同一ステートメントの繰り返し回数を数える
+# - 同じ形のクエリが SQL_N_PLUS_ONE_THRESHOLD 回以上出たら N+1 として警告
+# - SQL_QUERY_BUDGET_STRICT=1 なら、予算超過のクエリで QueryBudgetExceeded を投げる（テスト用）
+# 集計の出力は app/middleware/query_stats.py が担当する。
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 同一フィンガープリントがこの回数以上なら N+1 とみなす
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+# ルートに query_budget が無いときの 1 リクエストあたりのクエリ上限
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "50"))
+# 予算超過を例外にする（CI / テスト向け）
+SQL_QUERY_BUDGET_STRICT = os.getenv("SQL_QUERY_BUDGET_STRICT", "").lower() in ("1", "true", "yes")
+
+_WS_RE = re.compile(r"\s+")
+# IN (...) の展開数や数値リテラルの違いで別物扱いにならないよう潰す
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def fingerprint(statement: str) -> str:
+    """パラメータ違いを同一視したステートメント形。"""
+    s = _WS_RE.sub(" ", statement).strip()
+    s = _IN_LIST_RE.sub("IN (...)", s)
+    return _NUMBER_RE.sub("?", s)
+
+
+def query_budget(limit: int):
+    """ルート関数に付けるクエリ数の上限（SQL_QUERY_BUDGET を上書き）。"""
+    def decorator(func):
+        func.__query_budget__ = limit
+        return func
+    return decorator
+
+
+class RequestQueryStats:
+    __slots__ = ("scope", "count", "total_ms", "fingerprints")
+
+    def __init__(self, scope: Optional[dict] = None) -> None:
+        self.scope = scope
+        self.count = 0
+        self.total_ms = 0.0
+        self.fingerprints: Counter = Counter()
+
+    @property
+    def budget(self) -> int:
+        endpoint = (self.scope or {}).get("endpoint")
+        return getattr(endpoint, "__query_budget__", SQL_QUERY_BUDGET)
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request(scope: Optional[dict] = None) -> tuple[RequestQueryStats, object]:
+    stats = RequestQueryStats(scope)
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    if SQL_QUERY_BUDGET_STRICT and stats.count + 1 > stats.budget:
+        raise QueryBudgetExceeded(
+            f"query budget {stats.budget} exceeded by {stats.scope.get('path') if stats.scope else '?'}: "
+            f"{fingerprint(statement)[:200]}"
+        )
+    conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_stats_start")
+    if not starts:
+        return
+    stats.count += 1
+    stats.total_ms += (time.perf_counter() - starts.pop()) * 1000.0
+    stats.fingerprints[fingerprint(statement)] += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_stats_start"):
+        conn.info["query_stats_start"].pop()
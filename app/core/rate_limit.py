@@ -0,0 +1,268 @@
+# app/core/rate_limit.py
+# 書き込み系エンドポイントのレート制限（トークンバケット）。
+# - ルールごとに「ユーザー単位」と「IP 単位」のバケットを持てる。両方あれば両方から 1 つずつ取る
+#   （大学のネットワークは NAT で多くの人が同じ IP になるので、IP の上限はユーザーより大きめに）
+# - 上限は "回数/秒数"（例: 10/60 = 60 秒で 10 回、まとめて 10 回まで）。ルールごとに環境変数で変えられる
+#     RATE_LIMIT_<ルール名>_USER / RATE_LIMIT_<ルール名>_IP（空か 0 でそのバケットは無し）
+# - 超えたら 429 と Retry-After（次の 1 回が通るまでの秒数）
+# - バケットの置き場所は RATE_LIMIT_BACKEND で選ぶ:
+#     memory    プロセス内（既定）。ワーカーごとに数えるので、実質の上限はワーカー数倍になる
+#     postgres  rate_limit_buckets テーブル（UNLOGGED）で全ワーカー共通。1 回 1 クエリ
+# - memory は満タンに戻ったバケットを RATE_LIMIT_SWEEP_INTERVAL 秒ごとに捨てる（満タン = バケット無しと同じ）。
+#   それでも RATE_LIMIT_MAX_BUCKETS を超えたら最後に使ったのが古いものから捨てる
+# - バックエンドのエラーでは止めない（通してログを残す）
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.metrics import RATE_LIMITED
+from app.dependencies import get_current_user
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))
+# postgres: これより長く使われていない行を消す（どのルールでも満タンに戻っている長さにする）
+RATE_LIMIT_IDLE_SECONDS = int(os.getenv("RATE_LIMIT_IDLE_SECONDS", "3600"))
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: float  # まとめて使える回数
+    rate: float  # 1 秒あたりの回復量
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit | None":
+        spec = (spec or "").strip()
+        if not spec or spec == "0":
+            return None
+        count, _, seconds = spec.partition("/")
+        capacity, period = float(count), float(seconds or 1)
+        if capacity < 1 or period <= 0:
+            raise ValueError(f"invalid rate limit: {spec!r}")
+        return cls(capacity, capacity / period)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    user: Limit | None
+    ip: Limit | None
+
+
+# ルール名 → (ユーザー単位, IP 単位) の既定値
+_DEFAULTS = {
+    "article_create": ("10/60", "30/60"),
+    "comment_create": ("20/60", "60/60"),
+    "like": ("60/60", "300/60"),
+    "login": ("", "20/60"),
+}
+
+
+def _load_rules() -> dict[str, Rule]:
+    rules = {}
+    for name, (user, ip) in _DEFAULTS.items():
+        env = f"RATE_LIMIT_{name.upper()}"
+        rules[name] = Rule(
+            name,
+            Limit.parse(os.getenv(f"{env}_USER", user)),
+            Limit.parse(os.getenv(f"{env}_IP", ip)),
+        )
+    return rules
+
+
+RULES = _load_rules()
+
+
+# --------------------------------------------------
+# バケットの置き場所
+# --------------------------------------------------
+
+class MemoryStore:
+    """プロセス内のバケット。key → [残りトークン, 最後に更新した時刻（monotonic）, 満タンに戻る時刻]。"""
+
+    blocking = False  # イベントループでそのまま呼べる
+
+    def __init__(self, max_buckets: int = RATE_LIMIT_MAX_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + RATE_LIMIT_SWEEP_INTERVAL
+
+    def take(self, key: str, limit: Limit) -> float:
+        """1 つ取る。取れたら 0、取れなければ次に取れるまでの秒数を返す。"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = limit.capacity
+            else:
+                tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / limit.rate
+            full_at = now + (limit.capacity - tokens) / limit.rate
+            if bucket is None:
+                self._buckets[key] = [tokens, now, full_at]
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                bucket[0], bucket[1], bucket[2] = tokens, now, full_at
+                self._buckets.move_to_end(key)
+            if now >= self._next_sweep:
+                self._sweep(now)
+        return wait
+
+    def _sweep(self, now: float) -> None:
+        for key in [k for k, b in self._buckets.items() if b[2] <= now]:
+            del self._buckets[key]
+        self._next_sweep = now + RATE_LIMIT_SWEEP_INTERVAL
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class PostgresStore:
+    """rate_limit_buckets テーブル（UNLOGGED）に置く。全ワーカーで共通の上限になる。"""
+
+    blocking = True  # スレッドプールで呼ぶ
+
+    # 回復させてから 1 つ取る。取れたかどうかは allowed に残して返す（1 文で完結するので競合しない）
+    _TAKE_SQL = """
+        INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+        VALUES (:key, CAST(:capacity AS double precision) - 1, true, now())
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN {refill} >= 1 THEN {refill} - 1 ELSE {refill} END,
+            allowed = {refill} >= 1,
+            updated_at = now()
+        RETURNING tokens, allowed
+    """.format(
+        refill="LEAST(CAST(:capacity AS double precision), "
+        "b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at)::double precision * CAST(:rate AS double precision))"
+    )
+
+    def __init__(self) -> None:
+        self._next_sweep = time.monotonic() + RATE_LIMIT_SWEEP_INTERVAL
+        self._sweep_lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        from sqlalchemy import text
+
+        from app.database import engine
+
+        with engine.connect() as conn:
+            tokens, allowed = conn.execute(
+                text(self._TAKE_SQL), {"key": key, "capacity": limit.capacity, "rate": limit.rate}
+            ).one()
+            conn.commit()
+        self._maybe_sweep()
+        return 0.0 if allowed else (1 - tokens) / limit.rate
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + RATE_LIMIT_SWEEP_INTERVAL
+            from sqlalchemy import text
+
+            from app.database import engine
+
+            with engine.begin() as conn:
+                conn.execute(
+                    text("DELETE FROM rate_limit_buckets WHERE updated_at < now() - make_interval(secs => :idle)"),
+                    {"idle": RATE_LIMIT_IDLE_SECONDS},
+                )
+        except Exception:
+            logger.warning("Rate limit sweep failed", exc_info=True)
+        finally:
+            self._sweep_lock.release()
+
+
+def _make_store():
+    if RATE_LIMIT_BACKEND == "postgres":
+        return PostgresStore()
+    if RATE_LIMIT_BACKEND != "memory":
+        logger.warning("Unknown RATE_LIMIT_BACKEND=%s; using memory", RATE_LIMIT_BACKEND)
+    return MemoryStore()
+
+
+store = _make_store()
+
+
+def set_store(s):
+    """バケットの置き場所を差し替える（テストなど）。前のものを返す。"""
+    global store
+    previous, store = store, s
+    return previous
+
+
+# --------------------------------------------------
+# FastAPI の依存関数
+# --------------------------------------------------
+
+def _client_ip(request: Request) -> str:
+    # X-Forwarded-For は uvicorn の --proxy-headers / --forwarded-allow-ips で client に反映させる
+    return request.client.host if request.client else "-"
+
+
+async def _take(key: str, limit: Limit) -> float:
+    try:
+        if store.blocking:
+            return await run_in_threadpool(store.take, key, limit)
+        return store.take(key, limit)
+    except Exception:
+        logger.warning("Rate limit check failed for %s; allowing", key, exc_info=True)
+        return 0.0
+
+
+async def check(rule: Rule, request: Request, user_id: int | None) -> None:
+    """ルールのバケットから 1 つずつ取る。足りなければ 429。"""
+    checks = []
+    if rule.user is not None and user_id is not None:
+        checks.append(("user", f"{rule.name}:u:{user_id}", rule.user))
+    if rule.ip is not None:
+        checks.append(("ip", f"{rule.name}:ip:{_client_ip(request)}", rule.ip))
+    for scope, key, limit in checks:
+        wait = await _take(key, limit)
+        if wait > 0:
+            RATE_LIMITED.labels(rule.name, scope).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+
+def rate_limit(name: str):
+    """
+    ルートの dependencies=[Depends(rate_limit("..."))] に付ける。
+    ユーザー単位の上限があるルールは get_current_user を使う（エンドポイントと同じ依存なので 1 回しか解決されない）。
+    """
+    rule = RULES[name]
+
+    if rule.user is None:
+        async def dependency(request: Request) -> None:
+            if RATE_LIMIT_ENABLED:
+                await check(rule, request, None)
+    else:
+        async def dependency(request: Request, current_user=Depends(get_current_user)) -> None:
+            if RATE_LIMIT_ENABLED:
+                await check(rule, request, current_user.id)
+
+    return dependency
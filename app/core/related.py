@@ -0,0 +1,237 @@
+# app/core/related.py
+# 関連記事（タグの重なり）の事前計算。GET /v1/articles/{id}/related は article_related を主キーで 1 行引くだけ。
+# - 類似度は IDF で重み付けしたタグの Jaccard:
+#     score(x, y) = Σ_{t ∈ x∩y} w(t) / Σ_{t ∈ x∪y} w(t)、w(t) = ln(1 + 記事数 / タグ t の付いた記事数)
+#   どの記事にも付いているような一般的なタグほど効きが小さい
+# - 記事ごとに上位 RELATED_TOP_K 件を (related_ids int[], scores real[]) の 1 行で持つ。対象は公開記事どうしだけ
+# - 付いている記事が RELATED_MAX_TAG_ARTICLES 件を超えるタグは候補集めに使わない（重みの分母には入れる）。
+#   そういうタグしか共有していない組は関連記事にならない
+# - タグの付け外し / 公開状態の変更では、その記事と「タグを共有している記事」だけを article_related_dirty に積み、
+#   バックグラウンドで RELATED_BATCH_SIZE 件ずつ計算し直す（同じトランザクションで積むので取りこぼさない）。
+#   記事数が増えてほかのタグの IDF が少しずつずれる分は、cron で python -m app.core.related --rebuild を
+#   回して全件を積み直す（消えた記事は一覧を返すときに外れる）
+# - 複数ワーカーでも FOR UPDATE SKIP LOCKED で同じ記事を同時に計算しない
+# - 計算し直した記事の関連記事一覧は related-<id> で CDN からパージする
+import argparse
+import logging
+import os
+import threading
+from typing import Iterable
+
+from sqlalchemy import text
+
+from app.core.invalidation import invalidate
+
+logger = logging.getLogger(__name__)
+
+RELATED_ENABLED = os.getenv("RELATED_ENABLED", "1").lower() not in ("0", "false", "no")
+RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", "10"))
+RELATED_MAX_TAG_ARTICLES = int(os.getenv("RELATED_MAX_TAG_ARTICLES", "2000"))
+RELATED_BATCH_SIZE = int(os.getenv("RELATED_BATCH_SIZE", "200"))
+RELATED_POLL_INTERVAL = float(os.getenv("RELATED_POLL_INTERVAL", "5"))
+
+
+def cdn_key(article_id: int) -> str:
+    return f"related-{article_id}"
+
+
+# 記事 + 「その記事と（付け外したタグを含めて）タグを共有している記事」を積む。
+# 付けた直後 / 外す直前に呼べば、新旧どちらのタグでつながる記事も入る
+_MARK_SQL = text(
+    """
+    WITH touched AS (
+        SELECT unnest(CAST(:tag_ids AS int[])) AS tag_id
+        UNION
+        SELECT tag_id FROM article_tags WHERE article_id = ANY(CAST(:article_ids AS int[]))
+    ), narrow AS (
+        SELECT t.tag_id FROM touched AS t
+        WHERE (
+            SELECT count(*) FROM (
+                SELECT 1 FROM article_tags AS c WHERE c.tag_id = t.tag_id LIMIT :max_df + 1
+            ) AS s
+        ) <= :max_df
+    )
+    INSERT INTO article_related_dirty (article_id)
+    SELECT id FROM unnest(CAST(:article_ids AS int[])) AS id
+    UNION
+    SELECT at.article_id FROM article_tags AS at JOIN narrow USING (tag_id)
+    ON CONFLICT (article_id) DO NOTHING
+    """
+)
+
+_ENQUEUE_ALL_SQL = text(
+    """
+    INSERT INTO article_related_dirty (article_id)
+    SELECT id FROM articles WHERE is_published
+    ON CONFLICT (article_id) DO NOTHING
+    """
+)
+
+_CLAIM_SQL = text(
+    """
+    DELETE FROM article_related_dirty
+    WHERE article_id IN (
+        SELECT article_id FROM article_related_dirty
+        ORDER BY queued_at, article_id
+        LIMIT :n
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING article_id
+    """
+)
+
+# 記事が無くなった / 非公開になった / 関連が 0 件になったものは行ごと消える（DELETE してから入れ直す）
+_CLEAR_SQL = text("DELETE FROM article_related WHERE article_id = ANY(CAST(:ids AS int[]))")
+
+_RECOMPUTE_SQL = text(
+    """
+    WITH src AS (
+        SELECT id FROM articles WHERE id = ANY(CAST(:ids AS int[])) AND is_published
+    ), src_tags AS (
+        SELECT at.article_id, at.tag_id FROM article_tags AS at JOIN src ON src.id = at.article_id
+    ), df AS (
+        SELECT at.tag_id, count(*) AS n
+        FROM article_tags AS at
+        WHERE at.tag_id IN (SELECT tag_id FROM src_tags)
+        GROUP BY at.tag_id
+    ), cand AS (
+        SELECT DISTINCT st.article_id AS src, at.article_id AS dst
+        FROM src_tags AS st
+        JOIN df ON df.tag_id = st.tag_id AND df.n <= :max_df
+        JOIN article_tags AS at ON at.tag_id = st.tag_id AND at.article_id <> st.article_id
+        JOIN articles AS a ON a.id = at.article_id AND a.is_published
+    ), members AS (
+        SELECT id FROM src UNION SELECT dst FROM cand
+    ), member_tags AS (
+        SELECT at.article_id, at.tag_id FROM article_tags AS at JOIN members ON members.id = at.article_id
+    ), weight AS (
+        SELECT at.tag_id, ln(1 + total.n::float8 / count(*)) AS w
+        FROM article_tags AS at
+        CROSS JOIN (SELECT count(*) AS n FROM articles WHERE is_published) AS total
+        WHERE at.tag_id IN (SELECT tag_id FROM member_tags)
+        GROUP BY at.tag_id, total.n
+    ), weight_sum AS (
+        SELECT mt.article_id, sum(weight.w) AS w FROM member_tags AS mt JOIN weight USING (tag_id)
+        GROUP BY mt.article_id
+    ), shared AS (
+        SELECT cand.src, cand.dst, sum(weight.w) AS w
+        FROM cand
+        JOIN src_tags AS s ON s.article_id = cand.src
+        JOIN member_tags AS d ON d.article_id = cand.dst AND d.tag_id = s.tag_id
+        JOIN weight ON weight.tag_id = s.tag_id
+        GROUP BY cand.src, cand.dst
+    ), ranked AS (
+        SELECT shared.src, shared.dst,
+               shared.w / NULLIF(ws.w + wd.w - shared.w, 0) AS score,
+               row_number() OVER (
+                   PARTITION BY shared.src
+                   ORDER BY shared.w / NULLIF(ws.w + wd.w - shared.w, 0) DESC NULLS LAST, shared.dst DESC
+               ) AS rank
+        FROM shared
+        JOIN weight_sum AS ws ON ws.article_id = shared.src
+        JOIN weight_sum AS wd ON wd.article_id = shared.dst
+    )
+    INSERT INTO article_related (article_id, related_ids, scores, computed_at)
+    SELECT src, array_agg(dst ORDER BY rank), array_agg(COALESCE(score, 0)::real ORDER BY rank), now()
+    FROM ranked
+    WHERE rank <= :k
+    GROUP BY src
+    """
+)
+
+
+def mark_dirty(conn, article_ids: Iterable[int], tag_ids: Iterable[int] = ()) -> None:
+    """
+    タグを付け外しした記事（と付け外したタグ）を計算し直しの対象に積む。書き込みと同じトランザクションで呼ぶ。
+    conn は Session / Connection のどちらでもよい。
+    """
+    article_ids = sorted(set(article_ids))
+    if not article_ids:
+        return
+    conn.execute(
+        _MARK_SQL,
+        {"article_ids": article_ids, "tag_ids": sorted(set(tag_ids)), "max_df": RELATED_MAX_TAG_ARTICLES},
+    )
+
+
+def enqueue_all(engine=None) -> None:
+    """公開記事を全部積み直す（IDF のずれの解消 / 初回の作成）。"""
+    if engine is None:
+        from app.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(_ENQUEUE_ALL_SQL)
+
+
+def recompute(conn, article_ids: list[int]) -> None:
+    conn.execute(_CLEAR_SQL, {"ids": article_ids})
+    conn.execute(_RECOMPUTE_SQL, {"ids": article_ids, "k": RELATED_TOP_K, "max_df": RELATED_MAX_TAG_ARTICLES})
+
+
+def process_batch(engine=None, n: int = RELATED_BATCH_SIZE) -> int:
+    """積まれている記事を最大 n 件計算し直す。計算した件数を返す（0 = 空）。"""
+    if engine is None:
+        from app.database import engine
+
+    with engine.begin() as conn:
+        ids = sorted(conn.execute(_CLAIM_SQL, {"n": n}).scalars())
+        if ids:
+            recompute(conn, ids)
+    if ids:
+        invalidate(*(cdn_key(i) for i in ids))
+    return len(ids)
+
+
+def drain(engine=None) -> int:
+    total = 0
+    while (done := process_batch(engine)) > 0:
+        total += done
+    return total
+
+
+class RelatedWorker:
+    """積まれた記事が無くなるまで process_batch() を回し、RELATED_POLL_INTERVAL 秒待つ、を繰り返すスレッド。"""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="related-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while not self._stop.is_set() and process_batch() > 0:
+                    pass
+            except Exception:
+                logger.exception("Related articles refresh failed")
+            self._stop.wait(RELATED_POLL_INTERVAL)
+
+
+related_worker = RelatedWorker()
+
+
+def main() -> None:
+    # cron などから単発で回す用: python -m app.core.related [--rebuild]
+    parser = argparse.ArgumentParser(description="積まれている記事の関連記事を計算し直す")
+    parser.add_argument("--rebuild", action="store_true", help="公開記事を全部積み直してから計算する")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.rebuild:
+        enqueue_all()
+    logger.info("related articles: recomputed %d articles", drain())
+
+
+if __name__ == "__main__":
+    main()
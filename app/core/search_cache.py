@@ -0,0 +1,196 @@
+# app/core/search_cache.py
+# 記事検索（GET /v1/articles?query=）の結果キャッシュと、よく検索される条件の記録。
+# - キーは検索条件（キーワード / タグ / 並び / 大学 / 件数 / カーソル）を正規化したもの。値は並び順どおりの記事 ID のリスト
+#   キャッシュに当たったら ILIKE の全件スキャンをせず、ID で記事だけ引き直す（いいね数などはその時点の値）
+# - キャッシュするのは sort=recent だけ。いいね / コメントでは無効化しないので、件数順の並びは古くなる
+# - SEARCH_CACHE_TTL 秒で切れる。記事の作成 / 更新 / 削除 / タグ付け（invalidate("articles")）で全部捨てる
+#   （どの検索結果に効くか分からないので。ほかのワーカーにも invalidation バスで届く）
+# - 結果が SEARCH_CACHE_MAX_IDS 件を超える検索はキャッシュしない
+# - 検索条件ごとの回数を貯めて search_queries テーブルにまとめて書く（SEARCH_LOG_FLUSH_INTERVAL 秒ごと）。
+#   起動時のウォームアップで、直近によく検索された上位 SEARCH_WARMUP_QUERIES 件を先に実行してキャッシュに載せる
+#   数えるのは 1 ページ目（カーソル無し）だけ。key の列に入らない長さの条件は数えない
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from app.core.invalidation import bus
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "60"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+SEARCH_CACHE_MAX_IDS = int(os.getenv("SEARCH_CACHE_MAX_IDS", "500"))
+SEARCH_LOG_FLUSH_INTERVAL = float(os.getenv("SEARCH_LOG_FLUSH_INTERVAL", "60"))
+# 貯めておく検索条件の種類の上限。超えた新しい条件は数えない
+SEARCH_LOG_MAX_PENDING = int(os.getenv("SEARCH_LOG_MAX_PENDING", "10000"))
+# search_queries.key の長さ（String(500)）。これより長い条件を 1 つでも混ぜると flush の INSERT 全体が失敗する
+SEARCH_LOG_MAX_KEY_LENGTH = 500
+SEARCH_WARMUP_QUERIES = int(os.getenv("SEARCH_WARMUP_QUERIES", "20"))
+SEARCH_WARMUP_DAYS = int(os.getenv("SEARCH_WARMUP_DAYS", "7"))
+
+# (キーワード, タグ, 並び, 大学 ID, 件数（None = 全件）, カーソル)
+SearchKey = tuple[str, tuple[str, ...], str, int | None, int | None, str | None]
+
+
+def make_key(
+    query: str, tags: list[str], sort: str, university_id: int | None, limit: int | None, cursor: str | None = None
+) -> SearchKey:
+    """ILIKE は大文字小文字を区別しないので小文字に。タグは順不同なので並べ替える。"""
+    return (query.lower(), tuple(sorted(tags)), sort, university_id, limit, cursor)
+
+
+def key_to_text(key: SearchKey) -> str:
+    return json.dumps([key[0], list(key[1]), *key[2:]], ensure_ascii=False, separators=(",", ":"))
+
+
+def key_from_text(value: str) -> SearchKey:
+    query, tags, sort, university_id, limit, cursor = json.loads(value)
+    return (query, tuple(tags), sort, university_id, limit, cursor)
+
+
+# --------------------------------------------------
+# 結果キャッシュ
+# --------------------------------------------------
+
+class SearchCache:
+    """検索条件 → (期限, 記事 ID のリスト) の LRU。"""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, ttl: float = SEARCH_CACHE_TTL) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[SearchKey, tuple[float, list[int]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: SearchKey) -> list[int] | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache("search_results", entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, key: SearchKey, ids: list[int]) -> None:
+        if len(ids) > SEARCH_CACHE_MAX_IDS:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, keys: frozenset[str] | None) -> None:
+        """invalidation バスのハンドラ。記事一覧が変わったら（"articles"）全部捨てる。"""
+        if keys is None or "articles" in keys:
+            self.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+search_cache = SearchCache()
+bus.register("search_results", search_cache.invalidate)
+
+
+# --------------------------------------------------
+# よく検索される条件の記録
+# --------------------------------------------------
+
+_LOG_UPSERT_SQL = text(
+    """
+    INSERT INTO search_queries (key, hits, last_seen_at)
+    SELECT k, n, now() FROM unnest(CAST(:keys AS text[]), CAST(:hits AS bigint[])) AS v(k, n)
+    ON CONFLICT (key) DO UPDATE SET
+        hits = search_queries.hits + EXCLUDED.hits,
+        last_seen_at = EXCLUDED.last_seen_at
+    """
+)
+
+_TOP_QUERIES_SQL = text(
+    """
+    SELECT key FROM search_queries
+    WHERE last_seen_at > now() - make_interval(days => :days)
+    ORDER BY hits DESC
+    LIMIT :n
+    """
+)
+
+
+class SearchLog:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[SearchKey, int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, key: SearchKey) -> None:
+        """1 回分数える。2 ページ目以降（カーソル付き）と、search_queries.key に入らない長さの条件は数えない。"""
+        if key[5] is not None or len(key_to_text(key)) > SEARCH_LOG_MAX_KEY_LENGTH:
+            return
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] += 1
+            elif len(self._pending) < SEARCH_LOG_MAX_PENDING:
+                self._pending[key] = 1
+
+    def flush(self) -> int:
+        """貯まった回数を search_queries に足す。書いた条件の数を返す（失敗したら捨てる）。"""
+        from app.database import engine
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        items = sorted((key_to_text(k), n) for k, n in pending.items())
+        try:
+            with engine.begin() as conn:
+                conn.execute(_LOG_UPSERT_SQL, {"keys": [k for k, _ in items], "hits": [n for _, n in items]})
+        except Exception:
+            logger.warning("Search log flush failed; dropping %d queries", len(items), exc_info=True)
+            return 0
+        return len(items)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="search-log", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(SEARCH_LOG_FLUSH_INTERVAL):
+            self.flush()
+
+
+search_log = SearchLog()
+
+
+def top_queries(conn, n: int = SEARCH_WARMUP_QUERIES, days: int = SEARCH_WARMUP_DAYS) -> list[SearchKey]:
+    keys = []
+    for (k,) in conn.execute(_TOP_QUERIES_SQL, {"n": n, "days": days}):
+        try:
+            keys.append(key_from_text(k))
+        except ValueError:
+            pass  # 件数 / カーソルを入れる前の形式の行
+    return keys
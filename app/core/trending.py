@@ -0,0 +1,230 @@
+# app/core/trending.py
+# 急上昇記事（直近 24 時間 / 7 日のいいね・コメント）の集計。
+# - likes.created_at / comments.created_at を 1 時間単位のバケット（article_engagement_hourly）に積む
+# - span ごとのローリング合計（article_trending）は差分で更新する
+#     * 前回以降に増えたイベント → 窓の中のバケットなら足す
+#     * 窓の開始が進んで外れたバケット → 引く
+#   毎回全イベントを数え直さないので、イベント量が増えても 1 回の更新は新規分 + 外れた分だけで済む
+# - 取り込みは now() - TRENDING_SETTLE_SECONDS まで。コミットが遅れたトランザクションの
+#   created_at を取りこぼさないように少し待つ
+# - いいねの取り消しは引かない（「いいねされた回数」で数える）
+# - 複数ワーカーで動かしても、アドバイザリロックを取れた 1 つだけが更新する
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+TRENDING_ENABLED = os.getenv("TRENDING_ENABLED", "1").lower() not in ("0", "false", "no")
+TRENDING_REFRESH_INTERVAL = float(os.getenv("TRENDING_REFRESH_INTERVAL", "60"))
+TRENDING_SETTLE_SECONDS = int(os.getenv("TRENDING_SETTLE_SECONDS", "30"))
+TRENDING_LIKE_WEIGHT = int(os.getenv("TRENDING_LIKE_WEIGHT", "1"))
+TRENDING_COMMENT_WEIGHT = int(os.getenv("TRENDING_COMMENT_WEIGHT", "2"))
+
+# span 名 → 窓の長さ（時間）。窓は「現在のバケットを含む直近 N バケット」
+WINDOWS = {"24h": 24, "7d": 24 * 7}
+
+_LOCK_KEY = 0x7472656E64  # "trend"
+
+_WATERMARK = "watermark"
+
+
+def _span_key(span: str) -> str:
+    return f"span:{span}"
+
+
+def _window_start(until: datetime, hours: int) -> datetime:
+    return until.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+
+
+# 新規イベントをバケット単位にまとめた一時テーブル
+_COLLECT_SQL = text(
+    """
+    CREATE TEMP TABLE trending_delta ON COMMIT DROP AS
+    SELECT article_id, bucket, sum(likes)::int AS likes, sum(comments)::int AS comments
+    FROM (
+        SELECT article_id, date_trunc('hour', created_at) AS bucket, 1 AS likes, 0 AS comments
+        FROM likes WHERE created_at > :since AND created_at <= :until
+        UNION ALL
+        SELECT article_id, date_trunc('hour', created_at), 0, 1
+        FROM comments WHERE created_at > :since AND created_at <= :until
+    ) AS ev
+    GROUP BY article_id, bucket
+    """
+)
+
+# 窓から外れたバケットを引く（新規分を積む前のバケットで引くこと）
+_EXPIRE_SQL = text(
+    """
+    UPDATE article_trending AS t
+    SET likes = t.likes - x.likes, comments = t.comments - x.comments
+    FROM (
+        SELECT article_id, sum(likes)::int AS likes, sum(comments)::int AS comments
+        FROM article_engagement_hourly
+        WHERE bucket >= :old_start AND bucket < :new_start
+        GROUP BY article_id
+    ) AS x
+    WHERE t.span = :span AND t.article_id = x.article_id
+    """
+)
+
+_ADD_SQL = text(
+    """
+    INSERT INTO article_trending (span, article_id, likes, comments, score)
+    SELECT :span, article_id, sum(likes)::int, sum(comments)::int, 0
+    FROM trending_delta
+    WHERE bucket >= :new_start
+    GROUP BY article_id
+    ON CONFLICT (span, article_id) DO UPDATE
+    SET likes = article_trending.likes + EXCLUDED.likes,
+        comments = article_trending.comments + EXCLUDED.comments
+    """
+)
+
+# 初回 / 窓が丸ごと入れ替わるほど間が空いたときはバケットから作り直す
+_REBUILD_SQL = text(
+    """
+    INSERT INTO article_trending (span, article_id, likes, comments, score)
+    SELECT :span, article_id, sum(likes)::int, sum(comments)::int, 0
+    FROM article_engagement_hourly
+    WHERE bucket >= :new_start
+    GROUP BY article_id
+    """
+)
+
+_MERGE_BUCKETS_SQL = text(
+    """
+    INSERT INTO article_engagement_hourly (article_id, bucket, likes, comments)
+    SELECT article_id, bucket, likes, comments FROM trending_delta
+    WHERE bucket >= :keep_from
+    ON CONFLICT (article_id, bucket) DO UPDATE
+    SET likes = article_engagement_hourly.likes + EXCLUDED.likes,
+        comments = article_engagement_hourly.comments + EXCLUDED.comments
+    """
+)
+
+_RESCORE_SQL = text(
+    """
+    UPDATE article_trending
+    SET score = likes * :like_weight + comments * :comment_weight
+    WHERE span = :span AND score <> likes * :like_weight + comments * :comment_weight
+    """
+)
+
+_SET_STATE_SQL = text(
+    """
+    INSERT INTO trending_state (name, value) VALUES (:name, :value)
+    ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+    """
+)
+
+
+def refresh(engine=None) -> dict | None:
+    """新しいイベントを取り込み、各 span の合計を更新する。他のワーカーが更新中なら None。"""
+    if engine is None:
+        from app.database import engine
+
+    longest = max(WINDOWS.values())
+    with engine.begin() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": _LOCK_KEY}).scalar():
+            return None
+
+        until = conn.execute(
+            text("SELECT now() - make_interval(secs => :s)"), {"s": TRENDING_SETTLE_SECONDS}
+        ).scalar()
+        state = dict(conn.execute(text("SELECT name, value FROM trending_state")).all())
+        keep_from = _window_start(until, longest)
+        since = state.get(_WATERMARK)
+        if since is None:
+            # 初回（または状態を消した）: バケットも作り直す
+            conn.execute(text("DELETE FROM article_engagement_hourly"))
+            since = keep_from
+        elif since < keep_from:
+            since = keep_from  # 長く止まっていた: 窓より古いイベントは要らない
+
+        conn.execute(_COLLECT_SQL, {"since": since, "until": until})
+        stats = {"events_since": since, "until": until, "spans": {}}
+
+        for span, hours in WINDOWS.items():
+            new_start = _window_start(until, hours)
+            old_start = state.get(_span_key(span))
+            rebuild = (
+                since == keep_from
+                or old_start is None
+                or old_start > new_start
+                or new_start - old_start >= timedelta(hours=hours)
+            )
+            if not rebuild and old_start < new_start:
+                conn.execute(_EXPIRE_SQL, {"span": span, "old_start": old_start, "new_start": new_start})
+            stats["spans"][span] = {"rebuild": rebuild}
+
+        conn.execute(_MERGE_BUCKETS_SQL, {"keep_from": keep_from})
+        conn.execute(
+            text("DELETE FROM article_engagement_hourly WHERE bucket < :keep_from"), {"keep_from": keep_from}
+        )
+
+        for span, hours in WINDOWS.items():
+            new_start = _window_start(until, hours)
+            params = {"span": span, "new_start": new_start}
+            if stats["spans"][span]["rebuild"]:
+                conn.execute(text("DELETE FROM article_trending WHERE span = :span"), params)
+                conn.execute(_REBUILD_SQL, params)
+            else:
+                conn.execute(_ADD_SQL, params)
+            conn.execute(
+                text("DELETE FROM article_trending WHERE span = :span AND likes <= 0 AND comments <= 0"), params
+            )
+            conn.execute(
+                _RESCORE_SQL,
+                {**params, "like_weight": TRENDING_LIKE_WEIGHT, "comment_weight": TRENDING_COMMENT_WEIGHT},
+            )
+            conn.execute(_SET_STATE_SQL, {"name": _span_key(span), "value": new_start})
+
+        conn.execute(_SET_STATE_SQL, {"name": _WATERMARK, "value": until})
+    return stats
+
+
+class TrendingRefresher:
+    """refresh() を TRENDING_REFRESH_INTERVAL 秒ごとに回すバックグラウンドスレッド。"""
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="trending-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                refresh()
+            except Exception:
+                logger.exception("Trending refresh failed")
+            self._stop.wait(TRENDING_REFRESH_INTERVAL)
+
+
+trending_refresher = TrendingRefresher()
+
+
+def main() -> None:
+    # cron などから単発で回す用: python -m app.core.trending
+    logging.basicConfig(level=logging.INFO)
+    stats = refresh()
+    logger.info("trending refresh: %s", stats if stats is not None else "skipped (locked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# app/core/universities.py
+# メールのドメイン → 大学 ID（universities テーブル）の対応表。プロセス内に丸ごと持つ。
+# - ログイン時に users.university_id を決めるのと、GET /v1/articles?university=<ドメイン> に使う
+# - サブドメインも同じ大学として扱う（st.u-aizu.ac.jp → u-aizu.ac.jp）。一番長く一致したものを使う
+#   （SQL 側の同じ解決は EMAIL_UNIVERSITY_SQL。インポートとマイグレーションの埋め戻しで使う）
+# - 表を変えたら invalidate("universities") を呼ぶ。全ワーカーが次に引くときに読み直す
+#   表を SQL で直接書き換えたときのために、UNIVERSITY_MAP_TTL 秒ごとにも読み直す
+# - 読み込みに失敗したら前の表のまま（まだ無ければ空）で続け、次に引くときにもう一度読む
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.core.invalidation import bus
+
+logger = logging.getLogger(__name__)
+
+UNIVERSITY_MAP_TTL = float(os.getenv("UNIVERSITY_MAP_TTL", "300"))
+
+INVALIDATION_KEY = "universities"
+
+# email 列から大学 ID を引く SQL 式（{email} に列名を入れる）。resolve_email と同じ規則
+EMAIL_UNIVERSITY_SQL = """(
+    SELECT un.id FROM universities AS un
+    WHERE lower(split_part({email}, '@', 2)) = lower(un.domain)
+       OR lower(split_part({email}, '@', 2)) LIKE '%.' || lower(un.domain)
+    ORDER BY length(un.domain) DESC
+    LIMIT 1
+)"""
+
+_LOAD_SQL = text("SELECT lower(domain), id FROM universities")
+
+
+class UniversityMap:
+    def __init__(self, ttl: float = UNIVERSITY_MAP_TTL) -> None:
+        self.ttl = ttl
+        self._domains: dict[str, int] | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _get(self) -> dict[str, int]:
+        domains = self._domains
+        if domains is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return domains
+        with self._lock:
+            if self._domains is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._load()
+            return self._domains or {}
+
+    def _load(self) -> None:
+        from app.database import engine
+
+        try:
+            with engine.connect() as conn:
+                self._domains = dict(conn.execute(_LOAD_SQL).all())
+            self._loaded_at = time.monotonic()
+        except Exception:
+            logger.warning("Could not load universities; keeping the previous map", exc_info=True)
+
+    def resolve_domain(self, domain: str | None) -> int | None:
+        """ドメイン（サブドメイン可）→ 大学 ID。無ければ None。"""
+        if not domain:
+            return None
+        domains = self._get()
+        labels = domain.strip().lower().split(".")
+        for i in range(len(labels) - 1):
+            university_id = domains.get(".".join(labels[i:]))
+            if university_id is not None:
+                return university_id
+        return None
+
+    def resolve_email(self, email: str | None) -> int | None:
+        if not email or "@" not in email:
+            return None
+        return self.resolve_domain(email.rsplit("@", 1)[1])
+
+    def invalidate(self, keys: frozenset[str] | None) -> None:
+        """invalidation バスのハンドラ。次に引くときに読み直す。"""
+        if keys is None or INVALIDATION_KEY in keys:
+            self._domains = None
+
+
+university_map = UniversityMap()
+bus.register("universities", university_map.invalidate)
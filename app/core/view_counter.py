@@ -0,0 +1,176 @@
+# app/core/view_counter.py
+# 記事の閲覧数（articles.views）をプロセス内で貯めてまとめて書き込む。
+# - 閲覧は POST /v1/articles/{id}/views（ビーコン）で届く。記事詳細の GET は CDN に載るので、そこでは数えない
+# - 閲覧ごとに UPDATE すると一番多い読みに書き込みが乗り、人気記事の行が取り合いになる
+# - 同じ閲覧者の同じ記事は VIEW_DEDUP_SECONDS の間 1 回だけ数える
+# - VIEW_FLUSH_INTERVAL 秒ごと、または貯まった件数が VIEW_FLUSH_THRESHOLD を超えたら
+#   UPDATE ... FROM (VALUES ...) でまとめて反映。停止時にも最後に flush する
+# - 溜め込める記事数の上限を超えた分 / 書き込みに失敗し続けた分は捨てて dropped として数える
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from app.core.metrics import VIEW_EVENTS
+
+logger = logging.getLogger(__name__)
+
+VIEW_COUNTING_ENABLED = os.getenv("VIEW_COUNTING_ENABLED", "1").lower() not in ("0", "false", "no")
+VIEW_DEDUP_SECONDS = float(os.getenv("VIEW_DEDUP_SECONDS", "1800"))
+VIEW_DEDUP_MAX_KEYS = int(os.getenv("VIEW_DEDUP_MAX_KEYS", "200000"))
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "10"))
+VIEW_FLUSH_THRESHOLD = int(os.getenv("VIEW_FLUSH_THRESHOLD", "1000"))
+VIEW_FLUSH_BATCH = int(os.getenv("VIEW_FLUSH_BATCH", "500"))
+VIEW_MAX_PENDING_ARTICLES = int(os.getenv("VIEW_MAX_PENDING_ARTICLES", "50000"))
+# flush 失敗時に次回へ持ち越す回数。超えたら捨てる
+VIEW_FLUSH_RETRIES = int(os.getenv("VIEW_FLUSH_RETRIES", "3"))
+
+
+@lru_cache(maxsize=64)
+def _update_sql(n: int):
+    values = ", ".join(f"(:id{i}, :n{i})" for i in range(n))
+    return text(
+        f"""
+        UPDATE articles AS a
+        SET views = a.views + v.n
+        FROM (VALUES {values}) AS v(id, n)
+        WHERE a.id = v.id
+        """
+    )
+
+
+class ViewCounter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[int, int] = {}
+        self._pending_total = 0
+        self._failures = 0
+        self._seen: OrderedDict[tuple[str, int], float] = OrderedDict()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    # --------------------------------------------------
+    # 記録（リクエストスレッドから呼ばれる）
+    # --------------------------------------------------
+
+    def record(self, article_id: int, viewer: str) -> bool:
+        """閲覧を 1 件記録する。重複 / 捨てた場合は False。"""
+        now = time.monotonic()
+        key = (viewer, article_id)
+        with self._lock:
+            self._expire_seen(now)
+            expires = self._seen.get(key)
+            if expires is not None and expires > now:
+                VIEW_EVENTS.labels("deduplicated").inc()
+                return False
+            self._seen[key] = now + VIEW_DEDUP_SECONDS
+            self._seen.move_to_end(key)
+
+            if article_id not in self._pending and len(self._pending) >= VIEW_MAX_PENDING_ARTICLES:
+                self.dropped += 1
+                VIEW_EVENTS.labels("dropped").inc()
+                return False
+            self._pending[article_id] = self._pending.get(article_id, 0) + 1
+            self._pending_total += 1
+            should_flush = self._pending_total >= VIEW_FLUSH_THRESHOLD
+
+        VIEW_EVENTS.labels("recorded").inc()
+        if should_flush:
+            self._wakeup.set()
+        return True
+
+    def _expire_seen(self, now: float) -> None:
+        # 窓の長さは一定なので、先頭（古い順）から期限切れを落とせばよい
+        seen = self._seen
+        while seen:
+            key, expires = next(iter(seen.items()))
+            if expires > now and len(seen) < VIEW_DEDUP_MAX_KEYS:
+                break
+            seen.popitem(last=False)
+
+    # --------------------------------------------------
+    # 反映
+    # --------------------------------------------------
+
+    def flush(self) -> int:
+        """貯まった閲覧数を DB に書き込む。書き込んだ件数（閲覧数の合計）を返す。"""
+        from app.database import engine
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_total = 0
+        if not pending:
+            return 0
+
+        items = sorted(pending.items())  # 行ロックの順序をそろえてデッドロックを避ける
+        try:
+            with engine.begin() as conn:
+                for lo in range(0, len(items), VIEW_FLUSH_BATCH):
+                    chunk = items[lo:lo + VIEW_FLUSH_BATCH]
+                    params = {}
+                    for i, (article_id, n) in enumerate(chunk):
+                        params[f"id{i}"] = article_id
+                        params[f"n{i}"] = n
+                    conn.execute(_update_sql(len(chunk)), params)
+        except Exception:
+            total = sum(pending.values())
+            self._failures += 1
+            if self._failures > VIEW_FLUSH_RETRIES:
+                logger.exception("View count flush failed; dropping %d views", total)
+                self.dropped += total
+                VIEW_EVENTS.labels("dropped").inc(total)
+                self._failures = 0
+            else:
+                logger.warning("View count flush failed; retrying later", exc_info=True)
+                with self._lock:
+                    for article_id, n in pending.items():
+                        self._pending[article_id] = self._pending.get(article_id, 0) + n
+                    self._pending_total += total
+            return 0
+
+        self._failures = 0
+        total = sum(pending.values())
+        VIEW_EVENTS.labels("flushed").inc(total)
+        return total
+
+    # --------------------------------------------------
+    # バックグラウンドスレッド
+    # --------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="view-counter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """スレッドを止め、残りを flush する。"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+        if self.dropped:
+            logger.warning("View counter dropped %d views in total", self.dropped)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(VIEW_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("View counter flush crashed")
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,217 @@
+# app/core/warmup.py
+# 起動直後のウォームアップ。終わるまで /readyz は 503 を返す（/healthz は常に 200 のまま）。
+# デプロイ直後の最初のリクエストが払っていたコストを先に済ませておく:
+# 1. DB プールに WARMUP_POOL_CONNECTIONS 本の接続を張っておく（プライマリ / レプリカ）
+# 2. ホットなクエリ（フィード / 記事詳細 / いいね状態 / コメント一覧 / 急上昇）を一度実行し、
+#    SQLAlchemy のコンパイル済みキャッシュ（エンジンごと）に載せる。
+#    クエリは各エンドポイントの関数をそのまま呼んで作る。記事は公開記事を 1 件選んで使う
+#    （存在しない ID だと 404 の前の最初の SELECT しか通らない）。閲覧者はその記事の作者にする
+# 3. 直近によく検索された条件（search_queries の上位）を実行して、検索キャッシュに載せる
+# 4. Markdown のサンプルを変換して、拡張と bleach を読み込んでおく
+# 5. Firebase SDK の初期化（FIREBASE_WARMUP=1 のとき）
+# - DB に繋がらない間は WARMUP_TIMEOUT 秒までやり直す。超えたら諦めて ready にする（ログは残す）
+# - 2〜5 の失敗はログだけ残して先へ進む（最初のリクエストで同じことをするだけなので）
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1").lower() not in ("0", "false", "no")
+WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", "5"))
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+
+# 目次 / 表 / コードブロック / 脚注など、使っている拡張がひと通り動く文書
+_SAMPLE_MARKDOWN = """\
+[TOC]
+
+# ウォームアップ
+
+本文と **強調**、`code`、https://example.com へのリンク。
+
+| 列 | 値 |
+|----|----|
+| a  | 1  |
+
+```python
+print("hello")
+```
+
+1. 番号付き
+2. リスト
+
+> 引用[^1]
+
+[^1]: 脚注
+"""
+
+# 存在しないユーザー / 記事 ID（公開記事が 1 件も無いときの記事にも使う）
+_PROBE_ID = 0
+
+
+def _prefill_pool(engine, n: int) -> int:
+    """n 本の接続を同時に借りてから返し、プールに残す。張った本数を返す。"""
+    size = getattr(engine.pool, "size", None)
+    if size is not None:
+        n = min(n, size())  # overflow 分は返した時点で閉じられるので張っても無駄
+    conns = []
+    try:
+        for _ in range(n):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+def _probe_article(session_factory) -> tuple[int, int]:
+    """(記事 ID, 作者 ID)。公開記事が無ければ存在しない ID。"""
+    from sqlalchemy import text
+
+    from app.database import LazySession
+
+    db = LazySession(session_factory)
+    try:
+        row = db.execute(text("SELECT id, author_id FROM articles WHERE is_published ORDER BY id LIMIT 1")).first()
+    finally:
+        db.release()
+    return (row.id, row.author_id) if row is not None else (_PROBE_ID, _PROBE_ID)
+
+
+def _stub_request() -> SimpleNamespace:
+    # get_article が触る分だけ（クライアント / セッションクッキー / 圧縮キャッシュのキーを置く state）
+    return SimpleNamespace(client=None, cookies={}, state=SimpleNamespace())
+
+
+def _compile_hot_queries(session_factory) -> None:
+    from app.database import LazySession
+    from app.routers import articles, feed
+
+    article_id, author_id = _probe_article(session_factory)
+    nobody = SimpleNamespace(id=_PROBE_ID, role="student")
+    author = SimpleNamespace(id=author_id, role="student")
+    calls = (
+        ("feed", lambda db: feed.get_feed(cursor=None, limit=20, db=db, current_user=nobody)),
+        (
+            "article_detail",
+            lambda db: articles.get_article(article_id=article_id, request=_stub_request(), db=db, current_user=author),
+        ),
+        ("like_status", lambda db: articles.get_like_status(article_id=article_id, db=db, current_user=nobody)),
+        ("comments", lambda db: articles.list_comments(article_id=article_id, db=db)),
+        ("trending", lambda db: articles.list_trending_articles(window="24h", limit=20, db=db)),
+    )
+    for name, call in calls:
+        db = LazySession(session_factory)
+        try:
+            call(db)
+        except HTTPException:
+            pass  # 404（公開記事が無い）。そこまでのクエリはコンパイル済み
+        except Exception:
+            logger.warning("Warm-up query %s failed", name, exc_info=True)
+        finally:
+            db.release()
+
+
+def _warm_search_cache(session_factory) -> int:
+    """よく検索される条件で一覧を実行して、検索キャッシュに入れる（回数の記録には足さない）。実行した数を返す。"""
+    from app.core.search_cache import SEARCH_CACHE_ENABLED, SEARCH_WARMUP_QUERIES, search_cache, top_queries
+    from app.database import LazySession
+    from app.routers import articles
+
+    if not SEARCH_CACHE_ENABLED or SEARCH_WARMUP_QUERIES <= 0:
+        return 0
+    db = LazySession(session_factory)
+    try:
+        keys = top_queries(db)
+    finally:
+        db.release()
+    for key in keys:
+        query, tags, sort, university_id, limit, cursor = key
+        db = LazySession(session_factory)
+        try:
+            rows = articles._query_articles(db, query, list(tags), sort, university_id, limit, cursor)
+            search_cache.put(key, [a.id for a, _, _ in rows])
+        except Exception:
+            logger.warning("Warm-up search %r failed", query, exc_info=True)
+        finally:
+            db.release()
+    return len(keys)
+
+
+class Warmup:
+    def __init__(self) -> None:
+        self.ready = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.duration: float | None = None
+
+    def start(self) -> None:
+        """バックグラウンドでウォームアップを始める（無効なら即 ready）。"""
+        if not WARMUP_ENABLED:
+            self.ready.set()
+            return
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止の始まりに呼ぶ。以降 /readyz は 503 になり、ロードバランサが新しいリクエストを外す。"""
+        self.ready.clear()
+
+    def run(self) -> None:
+        started = time.monotonic()
+        try:
+            self._run_steps(started)
+        except Exception:
+            logger.exception("Warm-up failed")
+        finally:
+            self.duration = time.monotonic() - started
+            self.ready.set()
+            logger.info("Warm-up finished in %.2fs", self.duration)
+
+    def _run_steps(self, started: float) -> None:
+        from app.core.firebase import FIREBASE_WARMUP, warm_up as warm_up_firebase
+        from app.database import ReplicaSessionLocal, SessionLocal, engine, replica_engine
+        from app.utils.markdown import render_and_sanitize
+
+        targets = [(engine, SessionLocal)]
+        if replica_engine is not None:
+            targets.append((replica_engine, ReplicaSessionLocal))
+
+        for eng, session_factory in targets:
+            delay = 0.5
+            while True:
+                try:
+                    opened = _prefill_pool(eng, WARMUP_POOL_CONNECTIONS)
+                    break
+                except Exception:
+                    if time.monotonic() - started + delay > WARMUP_TIMEOUT:
+                        logger.error("Warm-up gave up connecting to %s", eng.url.render_as_string(), exc_info=True)
+                        return
+                    logger.warning("Warm-up could not connect; retrying in %.1fs", delay, exc_info=True)
+                    time.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+            logger.info("Warm-up opened %d connections to %s", opened, eng.url.render_as_string())
+            _compile_hot_queries(session_factory)
+
+        try:
+            logger.info("Warm-up ran %d popular searches", _warm_search_cache(targets[-1][1]))
+        except Exception:
+            logger.warning("Warm-up search cache failed", exc_info=True)
+
+        try:
+            render_and_sanitize(_SAMPLE_MARKDOWN)
+        except Exception:
+            logger.warning("Warm-up markdown render failed", exc_info=True)
+
+        if FIREBASE_WARMUP:
+            warm_up_firebase()
+
+
+warmup = Warmup()
@@ -1,7 +1,14 @@
 # app/database.py
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+import logging
+import threading
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker, Session
+
+logger = logging.getLogger(__name__)
 
 # Docker用のデフォルト。必要なら .env で上書き
 DATABASE_URL = os.getenv(
@@ -9,12 +16,159 @@ DATABASE_URL = os.getenv(
     "postgresql+psycopg2://postgres:postgres@db:5432/postgres"
 )
 
+# 読み取り専用レプリカ（任意）。未設定なら全リクエストがプライマリに行く
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+# これ以上遅れているレプリカには読みを流さない（秒）
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+# 遅延の測定間隔（秒）。毎リクエスト測らないためのキャッシュ
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+# 書き込み後、そのクライアントの読みをプライマリへ寄せる時間（秒）
+# REPLICA_MAX_LAG_SECONDS 以上にしておくこと
+PRIMARY_STICKY_SECONDS = int(os.getenv("PRIMARY_STICKY_SECONDS", "10"))
+PRIMARY_STICKY_COOKIE_NAME = os.getenv("PRIMARY_STICKY_COOKIE_NAME", "db_primary_until")
+
+# レプリカに流してよいメソッド
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
+replica_engine = (
+    create_engine(DATABASE_REPLICA_URL, pool_pre_ping=True, connect_args={"connect_timeout": 3})
+    if DATABASE_REPLICA_URL
+    else None
+)
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    if replica_engine is not None
+    else None
+)
+
+# スタンバイでなければ遅延 0。WAL を全部適用済みなら 0。それ以外は最終適用からの経過秒
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class _ReplicaHealth:
+    """
+    レプリカの遅延を一定間隔でだけ測り、結果をキャッシュする。
+    - 測定失敗 / 遅延超過ならプライマリにフォールバック
+    - 測定中に来た他スレッドは待たずに前回の結果を使う
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._usable = False
+        self.lag_seconds: float | None = None
+
+    def usable(self) -> bool:
+        if replica_engine is None:
+            return False
+        if time.monotonic() - self._checked_at < REPLICA_LAG_CHECK_INTERVAL:
+            return self._usable
+        if not self._lock.acquire(blocking=False):
+            return self._usable
+        try:
+            self._usable = self._probe()
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return self._usable
+
+    def _probe(self) -> bool:
+        try:
+            with replica_engine.connect() as conn:
+                lag = float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0)
+        except Exception:
+            logger.warning("Replica lag check failed; falling back to primary", exc_info=True)
+            self.lag_seconds = None
+            return False
+        self.lag_seconds = lag
+        if lag > REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Replica lag %.1fs exceeds %.1fs; falling back to primary", lag, REPLICA_MAX_LAG_SECONDS)
+            return False
+        return True
+
+
+replica_health = _ReplicaHealth()
+
+
+def _is_primary_sticky(request: Request) -> bool:
+    """直近に書き込んだクライアントか（read-your-writes 用クッキー）。"""
+    raw = request.cookies.get(PRIMARY_STICKY_COOKIE_NAME)
+    if not raw:
+        return False
+    try:
+        return float(raw) > time.time()
+    except ValueError:
+        return False
+
+
+def session_for_request(request: Request) -> Session:
+    """
+    リクエストに応じてセッションを選ぶ。
+    - 書き込みメソッド / 書き込み直後のクライアント → プライマリ
+    - それ以外の GET 等 → レプリカ（健全な場合のみ）
+    """
+    if (
+        ReplicaSessionLocal is None
+        or request.method not in READ_METHODS
+        or _is_primary_sticky(request)
+        or not replica_health.usable()
+    ):
+        return SessionLocal()
+    return ReplicaSessionLocal()
+
+
+class LazySession:
+    """
+    最初に使われた時点で初めて Session を作る（= 接続を借りる）プロキシ。
+    - クッキー無しの get_current_user_optional やバリデーションエラーでは DB に触らない
+    - release() で接続をプールへ返せる。以降また使えば取り直す
+    それ以外は Session と同じように使える。
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._session: Session | None = None
+
+    def _get(self) -> Session:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    @property
+    def acquired(self) -> bool:
+        return self._session is not None
+
+    def release(self) -> None:
+        """
+        DB 作業が終わった時点で呼ぶ（レスポンス組み立ての前など）。
+        読み込み済みのオブジェクトは detach されるが、ロード済み属性はそのまま読める。
+        """
+        if self._session is not None:
+            session, self._session = self._session, None
+            session.close()
+
+    close = release
+
+
+def get_db(request: Request):
+    db = LazySession(lambda: session_for_request(request))
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.release()
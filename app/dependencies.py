@@ -15,11 +15,12 @@ def _ensure_user_exists(
     name: str,
     email: str,
     avatar: str | None = None,
+    university_id: int | None = None,
 ) -> User:
     """
     Firebase ログイン時などに DB のユーザーを安全に upsert する共通関数。
     - 既存ユーザーの role は上書きしない
-    - display 情報（name, avatar）は更新する
+    - display 情報（name, avatar）と大学（university_id。None なら触らない）は更新する
     """
     if user_id is not None:
         u = db.query(User).filter(User.id == user_id).first()
@@ -29,11 +30,13 @@ def _ensure_user_exists(
                 u.name = name; changed = True
             if avatar is not None and hasattr(u, "avatar") and u.avatar != avatar:
                 u.avatar = avatar; changed = True
+            if university_id is not None and u.university_id != university_id:
+                u.university_id = university_id; changed = True
             if changed:
                 db.commit(); db.refresh(u)
             return u
 
-        u = User(id=user_id, name=name, email=email, role="student")
+        u = User(id=user_id, name=name, email=email, role="student", university_id=university_id)
         if avatar is not None and hasattr(u, "avatar"):
             u.avatar = avatar
         db.add(u); db.commit(); db.refresh(u)
@@ -42,7 +45,7 @@ def _ensure_user_exists(
     # user_id 未指定: email で検索
     u = db.query(User).filter(User.email == email).first()
     if not u:
-        u = User(name=name, email=email, role="student")
+        u = User(name=name, email=email, role="student", university_id=university_id)
         if avatar is not None and hasattr(u, "avatar"):
             u.avatar = avatar
         db.add(u); db.commit(); db.refresh(u)
@@ -54,6 +57,8 @@ def _ensure_user_exists(
         u.name = name; changed = True
     if avatar is not None and hasattr(u, "avatar") and u.avatar != avatar:
         u.avatar = avatar; changed = True
+    if university_id is not None and u.university_id != university_id:
+        u.university_id = university_id; changed = True
     if changed:
         db.commit(); db.refresh(u)
     return u
@@ -1,12 +1,75 @@
 # app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import auth, tags, admin
+from app.routers import auth, tags, admin, feed, reports, search
+from app.middleware.primary_sticky import PrimaryStickyMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.cache_control import CacheControlMiddleware
+from app.core.metrics import render_latest
+from app.core.compression import COMPRESS_ENABLED
+from app.core import cdn
+from app.core.invalidation import INVALIDATION_ENABLED, bus as invalidation_bus
+from app.core.search_cache import SEARCH_CACHE_ENABLED, search_log
+from app.core.warmup import warmup
+from app.core.view_counter import VIEW_COUNTING_ENABLED, view_counter
+from app.core.trending import TRENDING_ENABLED, trending_refresher
+from app.core.related import RELATED_ENABLED, related_worker
+from app.core.purge_jobs import PURGE_WORKER_ENABLED, purge_worker
+from app.core.audit import AUDIT_ENABLED, audit_writer
+from app.core.importer import shutdown_pool as shutdown_import_pool
 from app.routers.articles import router as articles_router
 
-app = FastAPI(title="UniQiita API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 起動時: バックグラウンドスレッド（監査ログ / 閲覧数の書き出し / 急上昇の集計 / 関連記事の計算 / 削除ジョブ /
+    # CDN パージ / キャッシュ無効化のバス / 検索条件の記録）を開始
+    if AUDIT_ENABLED:
+        audit_writer.start()
+    if VIEW_COUNTING_ENABLED:
+        view_counter.start()
+    if TRENDING_ENABLED:
+        trending_refresher.start()
+    if RELATED_ENABLED:
+        related_worker.start()
+    if PURGE_WORKER_ENABLED:
+        purge_worker.start()
+    cdn.purger.start()
+    if INVALIDATION_ENABLED:
+        invalidation_bus.start()
+    if SEARCH_CACHE_ENABLED:
+        search_log.start()
+    # 接続 / クエリのコンパイル / markdown / Firebase SDK の初期化は別スレッドで。終わるまで /readyz は 503
+    warmup.start()
+    yield
+    warmup.stop()
+    # 停止時: 実行中の削除ジョブは pending に戻し、貯めている閲覧数 / CDN パージ / 監査ログを書き出してから終了
+    if PURGE_WORKER_ENABLED:
+        await run_in_threadpool(purge_worker.stop)
+    if TRENDING_ENABLED:
+        await run_in_threadpool(trending_refresher.stop)
+    if RELATED_ENABLED:
+        await run_in_threadpool(related_worker.stop)
+    if VIEW_COUNTING_ENABLED:
+        await run_in_threadpool(view_counter.stop)
+    await run_in_threadpool(shutdown_import_pool)
+    if SEARCH_CACHE_ENABLED:
+        await run_in_threadpool(search_log.stop)
+    if INVALIDATION_ENABLED:
+        await run_in_threadpool(invalidation_bus.stop)  # 送信待ちの NOTIFY を送り切る
+    await run_in_threadpool(cdn.purger.stop)  # 削除ジョブ / インポートのパージも含めて送り切る
+    if AUDIT_ENABLED:
+        await run_in_threadpool(audit_writer.stop)  # 削除ジョブ / インポートの記録も含めて最後に書き切る
+
+
+app = FastAPI(title="UniQiita API", version="0.1.0", lifespan=lifespan)
 
 # ★ CORS：本番Vercelとプレビューを正規表現で許可
 app.add_middleware(
@@ -20,14 +83,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    # 記事一覧（sort=recent）の次ページのカーソル
+    expose_headers=["X-Next-Cursor"],
 )
 
+# 書き込み直後の読みをプライマリへ寄せる（レプリカ設定時のみ有効）
+app.add_middleware(PrimaryStickyMiddleware)
+
+# リクエストごとのクエリ数 / DB 時間（Server-Timing ヘッダ + ログ、N+1 検出）
+app.add_middleware(QueryStatsMiddleware)
+
+# Cache-Control の無いレスポンスは CDN にキャッシュさせない（public にするのは app/core/cdn.py）
+app.add_middleware(CacheControlMiddleware)
+
+# gzip / brotli 圧縮（記事詳細は圧縮結果をキャッシュ）。レイテンシには圧縮時間も含めて測る
+if COMPRESS_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# ルート単位のリクエスト数 / レイテンシ（/metrics で公開）
+app.add_middleware(MetricsMiddleware)
+
 # ルーター登録
 app.include_router(auth.router)
 app.include_router(articles_router)
 app.include_router(tags.router)
+app.include_router(feed.router)
+app.include_router(reports.router)
+app.include_router(search.router)
 app.include_router(admin.router)
 
 @app.api_route("/healthz", methods=["GET", "HEAD"])
 def healthz():
     return PlainTextResponse("ok", status_code=200)
+
+# /healthz は生存確認（プロセスが応答するか）。/readyz はウォームアップが終わってから 200
+@app.api_route("/readyz", methods=["GET", "HEAD"], include_in_schema=False)
+async def readyz():
+    if not warmup.ready.is_set():
+        return PlainTextResponse("warming up", status_code=503)
+    return PlainTextResponse("ready", status_code=200)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # async にしておくとスレッドプールを使わず、プールの使用状況も正しく取れる
+    body, content_type = render_latest()
+    return Response(body, media_type=content_type)
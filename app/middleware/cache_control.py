@@ -0,0 +1,29 @@
+# app/middleware/cache_control.py
+from starlette.datastructures import MutableHeaders
+
+from app.core.cdn import NO_STORE
+
+
+class CacheControlMiddleware:
+    """
+    Cache-Control の付いていないレスポンスを private, no-store にする。
+    CDN は Cache-Control が無いと既定の TTL でキャッシュすることがあるので、
+    キャッシュしてよいもの（app/core/cdn.py の set_public_cache）以外は明示的に止める。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache_control(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    headers["cache-control"] = NO_STORE
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_control)
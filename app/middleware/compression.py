@@ -0,0 +1,79 @@
+# app/middleware/compression.py
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.compression import (
+    CACHE_KEY_STATE,
+    COMPRESS_MIN_BYTES,
+    COMPRESS_OFFLOAD_BYTES,
+    choose_encoding,
+    compress,
+    compressed_cache,
+    is_compressible,
+)
+
+
+class CompressionMiddleware:
+    """
+    レスポンスを gzip / brotli で圧縮する（判定と圧縮は app/core/compression.py）。
+    - ボディが 1 回で送られるレスポンスだけが対象。ストリーミング（エクスポートなど）はそのまま流す
+    - 既に Content-Encoding が付いているものは触らない
+    - エンドポイントが set_cache_key() していれば、圧縮結果をキャッシュから使う
+    - COMPRESS_OFFLOAD_BYTES 以上のボディはスレッドプールで圧縮する
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # ボディを見るまでヘッダは送らない
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type"))
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+                await send(start)
+                await send(message)
+                return
+
+            cache_key = scope.get("state", {}).get(CACHE_KEY_STATE)
+            if cache_key is not None:
+                work = (compressed_cache.get_or_compress, cache_key[0], cache_key[1], body, encoding)
+            else:
+                work = (compress, body, encoding)
+            if len(body) >= COMPRESS_OFFLOAD_BYTES:
+                # 大きな一覧などはイベントループを止めないように
+                data = await run_in_threadpool(*work)
+            else:
+                data = work[0](*work[1:])
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(data))
+            await send(start)
+            await send({"type": "http.response.body", "body": data, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,44 @@
+# app/middleware/primary_sticky.py
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.database import (
+    PRIMARY_STICKY_COOKIE_NAME,
+    PRIMARY_STICKY_SECONDS,
+    READ_METHODS,
+    ReplicaSessionLocal,
+)
+
+
+class PrimaryStickyMiddleware:
+    """
+    書き込みが成功したレスポンスに「この時刻まではプライマリで読む」クッキーを付ける。
+    update_article の直後の get_article がレプリカの古いデータを返さないようにするため。
+    レプリカ未設定なら何もしない。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            ReplicaSessionLocal is None
+            or scope["type"] != "http"
+            or scope["method"] in READ_METHODS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + PRIMARY_STICKY_SECONDS
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{PRIMARY_STICKY_COOKIE_NAME}={until}; Max-Age={PRIMARY_STICKY_SECONDS}; "
+                    "Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
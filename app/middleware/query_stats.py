@@ -0,0 +1,71 @@
+# app/middleware/query_stats.py
+import json
+import logging
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.query_stats import SQL_N_PLUS_ONE_THRESHOLD, end_request, start_request
+
+logger = logging.getLogger("app.sql")
+
+
+class QueryStatsMiddleware:
+    """
+    リクエストごとの SQL 集計を Server-Timing ヘッダとログに出す。
+    - Server-Timing: db;dur=<ms>;desc="<件数> queries"
+    - N+1 の疑い / 予算超過は WARNING、それ以外は DEBUG で JSON 1 行
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request(scope)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "server-timing",
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            _log(scope, status_code, stats)
+
+
+def _log(scope, status_code, stats) -> None:
+    route = scope.get("route")
+    repeated = stats.repeated(SQL_N_PLUS_ONE_THRESHOLD)
+    over_budget = stats.count > stats.budget
+    level = logging.WARNING if (repeated or over_budget) else logging.DEBUG
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(
+        level,
+        json.dumps(
+            {
+                "event": "sql_stats",
+                "method": scope.get("method"),
+                "route": getattr(route, "path", scope.get("path")),
+                "status": status_code,
+                "queries": stats.count,
+                "db_ms": round(stats.total_ms, 1),
+                "budget": stats.budget,
+                "over_budget": over_budget,
+                "n_plus_one": [{"count": n, "statement": fp[:300]} for fp, n in repeated],
+            },
+            ensure_ascii=False,
+        ),
+    )
@@ -1,72 +1,365 @@
 # app/routers/admin.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import os
+from datetime import datetime
+from typing import List, Literal, Optional
 
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app.core import purge_jobs
+from app.core.audit import audit_writer
+from app.core.export import export_until, stream_articles
+from app.core.importer import import_ndjson, iter_lines
+from app.database import engine, get_db
 from app.dependencies import require_admin
 from src.models.user import User as UserModel
+from src.models.purge_job import PurgeJob
 from src.models.article import Article
 from src.models.comment import Comment
-from src.models.like import Like
-from src.models.article_tag import article_tags
+from app.schemas.report import ReportResolve
 
 router = APIRouter(prefix="/v1/admin", tags=["admin"], redirect_slashes=False)
 
-def _purge_user_data(db: Session, user_id: int) -> int:
-    """
-    指定ユーザーが関わるデータを削除。
-    - いいね
-    - コメント
-    - 記事（記事に紐づく中間テーブルも先に削除）
-    戻り値: 削除した記事数（目安用）
-    """
-    # いいね（自分が付けたもの）
-    db.query(Like).filter(Like.user_id == user_id).delete(synchronize_session=False)
-    # コメント（自分が書いたもの）
-    db.query(Comment).filter(Comment.author_id == user_id).delete(synchronize_session=False)
-
-    # 自分の記事に紐づく中間テーブル（article_tags, likes, comments）を先に削除
-    my_articles = db.query(Article).filter(Article.author_id == user_id).all()
-    article_ids = [a.id for a in my_articles]
-    if article_ids:
-        db.execute(article_tags.delete().where(article_tags.c.article_id.in_(article_ids)))
-        db.query(Like).filter(Like.article_id.in_(article_ids)).delete(synchronize_session=False)
-        db.query(Comment).filter(Comment.article_id.in_(article_ids)).delete(synchronize_session=False)
-        db.query(Article).filter(Article.id.in_(article_ids)).delete(synchronize_session=False)
+# 一括インポートで受け付ける本文の上限（バイト、gzip なら圧縮後）
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
 
-    db.commit()
-    return len(article_ids)
+def _serialize_job(j: PurgeJob) -> dict:
+    def progress(deleted: int, total: int | None) -> dict:
+        return {"deleted": deleted, "total": total}
+
+    return {
+        "id": j.id,
+        "user_id": j.user_id,
+        "requested_by": j.requested_by,
+        "status": j.status,
+        "phase": j.phase,
+        "likes": progress(j.likes_deleted, j.likes_total),
+        "comments": progress(j.comments_deleted, j.comments_total),
+        "articles": progress(j.articles_deleted, j.articles_total),
+        "error": j.error,
+        "created_at": j.created_at.isoformat() if j.created_at else None,
+        "updated_at": j.updated_at.isoformat() if j.updated_at else None,
+        "finished_at": j.finished_at.isoformat() if j.finished_at else None,
+    }
+
+
+def _jobs_by_id(db: Session, job_ids: list[int]) -> list[dict]:
+    if not job_ids:
+        return []
+    rows = db.query(PurgeJob).filter(PurgeJob.id.in_(job_ids)).order_by(PurgeJob.id).all()
+    return [_serialize_job(j) for j in rows]
 
 
-@router.delete("/purge/by-email", status_code=status.HTTP_204_NO_CONTENT)
-@router.delete("/purge/by-email/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
+# 削除はバックグラウンドのジョブ（app/core/purge_jobs.py）で小分けに行う。
+# ここではジョブを登録して 202 を返すだけ。進捗は /v1/admin/purge/jobs/{id} で見る
+
+@router.delete("/purge/by-email", status_code=status.HTTP_202_ACCEPTED)
+@router.delete("/purge/by-email/", status_code=status.HTTP_202_ACCEPTED, include_in_schema=False)
 def purge_by_email(
     email: str = Query(..., description="削除対象ユーザーのメールアドレス"),
     db: Session = Depends(get_db),
     admin=Depends(require_admin),
 ):
-    """管理者専用: 指定メールアドレスのユーザーの投稿/コメント/いいねを全削除。"""
+    """管理者専用: 指定メールアドレスのユーザーの投稿/コメント/いいねを全削除するジョブを登録。"""
     user = db.query(UserModel).filter(UserModel.email == email).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # 自分自身のデータも削除可能だが、誤操作防止で警告したい場合はここでブロック可
-    _purge_user_data(db, user.id)
-    return None
+    job_ids = purge_jobs.enqueue(db, [user.id], requested_by=admin.id)
+    jobs = _jobs_by_id(db, job_ids)
+    if not jobs:
+        # 登録し直してもジョブが見えなかった（直後に終わった）。もう一度呼んでもらう
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Purge job finished concurrently; retry")
+    audit_writer.record(
+        "user_purge_requested", "user", user.id,
+        actor_id=admin.id, meta={"email": email, "job_id": jobs[0]["id"]},
+    )
+    return jobs[0]
 
 
-@router.delete("/purge/dummy", status_code=status.HTTP_204_NO_CONTENT)
-@router.delete("/purge/dummy/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
+@router.delete("/purge/dummy", status_code=status.HTTP_202_ACCEPTED)
+@router.delete("/purge/dummy/", status_code=status.HTTP_202_ACCEPTED, include_in_schema=False)
 def purge_dummy(
     db: Session = Depends(get_db),
     admin=Depends(require_admin),
 ):
     """
-    管理者専用: 典型的なダミー条件で一括削除。
+    管理者専用: 典型的なダミー条件のユーザーごとに削除ジョブを登録。
     必要に応じて条件を調整（例: name='Dummy' など）。
     """
-    targets = db.query(UserModel).filter(UserModel.email.like("dummy%@%")).all()
-    for u in targets:
-        _purge_user_data(db, u.id)
-    return None
+    user_ids = [uid for (uid,) in db.query(UserModel.id).filter(UserModel.email.like("dummy%@%")).all()]
+    job_ids = purge_jobs.enqueue(db, user_ids, requested_by=admin.id)
+    jobs = _jobs_by_id(db, job_ids)
+    for job in jobs:
+        audit_writer.record(
+            "user_purge_requested", "user", job["user_id"],
+            actor_id=admin.id, meta={"job_id": job["id"], "bulk": "dummy"},
+        )
+    return {"jobs": jobs}
+
+
+@router.get("/purge/jobs", response_model=List[dict])
+@router.get("/purge/jobs/", response_model=List[dict], include_in_schema=False)
+def list_purge_jobs(
+    status_: Optional[str] = Query(None, alias="status", description="pending | running | done | failed"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    q = db.query(PurgeJob)
+    if status_:
+        q = q.filter(PurgeJob.status == status_)
+    rows = q.order_by(PurgeJob.id.desc()).limit(limit).all()
+    db.release()
+    return [_serialize_job(j) for j in rows]
+
+
+@router.get("/purge/jobs/{job_id}", response_model=dict)
+@router.get("/purge/jobs/{job_id}/", response_model=dict, include_in_schema=False)
+def get_purge_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    job = db.get(PurgeJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    db.release()
+    return _serialize_job(job)
+
+
+@router.post("/purge/jobs/{job_id}/resume", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+@router.post("/purge/jobs/{job_id}/resume/", response_model=dict, status_code=status.HTTP_202_ACCEPTED, include_in_schema=False)
+def resume_purge_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    """失敗したジョブを止まった phase から再開する。"""
+    job = db.get(PurgeJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    job.status = "pending"
+    job.error = None
+    try:
+        db.commit()
+    except IntegrityError:
+        # 同じユーザーの別ジョブが既に動いている
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Another purge job for this user is active")
+    purge_jobs.purge_worker.wake()
+    audit_writer.record("purge_job_resumed", "purge_job", job_id, actor_id=admin.id, meta={"user_id": job.user_id})
+    db.refresh(job)
+    return _serialize_job(job)
+
+
+# ======================================================
+# モデレーションキュー（通報を対象ごとにまとめて重い順に）
+# ======================================================
+# - 重さ = 未処理の通報数（同じ人の重複通報は ux_reports_active_target_reporter で弾いている）。
+#   同数なら最後の通報が新しい順
+# - ページングは (report_count, latest_id) のキーセット。cursor は "件数:最後の通報 ID"
+# - 対象の記事 / コメントはページ分まとめて 1 クエリずつで引く
+
+_QUEUE_SQL = """
+    SELECT target_type, target_id, report_count, latest_id, first_reported_at, last_reported_at, latest_reason
+    FROM (
+        SELECT
+            target_type,
+            target_id,
+            count(*) AS report_count,
+            max(id) AS latest_id,
+            min(created_at) AS first_reported_at,
+            max(created_at) AS last_reported_at,
+            (array_agg(reason ORDER BY id DESC))[1] AS latest_reason
+        FROM reports
+        WHERE status = :status {type_filter}
+        GROUP BY target_type, target_id
+    ) AS g
+    {cursor_filter}
+    ORDER BY report_count DESC, latest_id DESC
+    LIMIT :n
+"""
+
+
+def _parse_queue_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        count, latest_id = cursor.split(":", 1)
+        return int(count), int(latest_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _hydrate_targets(db: Session, rows) -> dict[tuple[str, int], Optional[dict]]:
+    article_ids = [r.target_id for r in rows if r.target_type == "article"]
+    comment_ids = [r.target_id for r in rows if r.target_type == "comment"]
+    targets: dict[tuple[str, int], Optional[dict]] = {}
+
+    def user(u: Optional[UserModel]) -> Optional[dict]:
+        return {"id": u.id, "name": u.name, "email": u.email} if u else None
+
+    if article_ids:
+        for a in db.query(Article).options(joinedload(Article.author)).filter(Article.id.in_(article_ids)):
+            targets[("article", a.id)] = {
+                "id": a.id,
+                "title": a.title,
+                "is_published": a.is_published,
+                "author": user(a.author),
+                "created_at": a.created_at.isoformat() if a.created_at else None,
+            }
+    if comment_ids:
+        q = (
+            db.query(Comment, UserModel)
+            .outerjoin(UserModel, UserModel.id == Comment.author_id)
+            .filter(Comment.id.in_(comment_ids))
+        )
+        for c, u in q:
+            targets[("comment", c.id)] = {
+                "id": c.id,
+                "article_id": c.article_id,
+                "body": c.body_md,
+                "author": user(u),
+                "created_at": c.created_at.isoformat() if c.created_at else None,
+            }
+    return targets
+
+
+@router.get("/moderation/queue", response_model=dict)
+@router.get("/moderation/queue/", response_model=dict, include_in_schema=False)
+def moderation_queue(
+    status_: Literal["open", "triage"] = Query("open", alias="status"),
+    target_type: Optional[Literal["article", "comment"]] = Query(None),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    params: dict = {"status": status_, "n": limit + 1}
+    type_filter = cursor_filter = ""
+    if target_type:
+        type_filter = "AND target_type = :target_type"
+        params["target_type"] = target_type
+    if cursor:
+        params["after_count"], params["after_id"] = _parse_queue_cursor(cursor)
+        cursor_filter = "WHERE (report_count, latest_id) < (:after_count, :after_id)"
+
+    rows = db.execute(text(_QUEUE_SQL.format(type_filter=type_filter, cursor_filter=cursor_filter)), params).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    targets = _hydrate_targets(db, rows)
+    db.release()
+
+    items = [
+        {
+            "target_type": r.target_type,
+            "target_id": r.target_id,
+            "report_count": r.report_count,
+            "latest_reason": r.latest_reason,
+            "first_reported_at": r.first_reported_at.isoformat() if r.first_reported_at else None,
+            "last_reported_at": r.last_reported_at.isoformat() if r.last_reported_at else None,
+            "target": targets.get((r.target_type, r.target_id)),  # 削除済みなら None
+        }
+        for r in rows
+    ]
+    return {
+        "items": items,
+        "next_cursor": f"{rows[-1].report_count}:{rows[-1].latest_id}" if has_more else None,
+    }
+
+
+@router.post("/moderation/{target_type}/{target_id}", response_model=dict)
+@router.post("/moderation/{target_type}/{target_id}/", response_model=dict, include_in_schema=False)
+def resolve_reports(
+    target_type: Literal["article", "comment"],
+    target_id: int,
+    payload: ReportResolve,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    """対象への未処理の通報をまとめて triage / closed にする。"""
+    from_statuses = ["open"] if payload.status == "triage" else ["open", "triage"]
+    updated = db.execute(
+        text(
+            "UPDATE reports SET status = :status "
+            "WHERE target_type = :target_type AND target_id = :target_id AND status = ANY(:from_statuses)"
+        ),
+        {"status": payload.status, "target_type": target_type, "target_id": target_id, "from_statuses": from_statuses},
+    ).rowcount
+    if not updated:
+        raise HTTPException(status_code=404, detail="No reports to update")
+    db.commit()
+    audit_writer.record(
+        f"reports_{payload.status}", target_type, target_id,
+        actor_id=admin.id, meta={"reports": updated},
+    )
+    return {"target_type": target_type, "target_id": target_id, "status": payload.status, "updated": updated}
+
+
+# ======================================================
+# エクスポート（NDJSON を流しながら返す）
+# ======================================================
+
+@router.get("/export/articles")
+@router.get("/export/articles/", include_in_schema=False)
+def export_articles(
+    since: Optional[datetime] = Query(None, description="差分: これより後に更新された記事だけ（前回の X-Export-Until）"),
+    gzip: bool = Query(False, description="gzip で圧縮した .ndjson.gz を返す"),
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin),
+):
+    """管理者専用: 全記事（著者・タグ・件数付き）を 1 行 1 記事の NDJSON で返す。"""
+    until = export_until(db)
+    db.release()  # 本体は stream_articles が自前の接続で読む
+    audit_writer.record(
+        "articles_export", "article", None,
+        actor_id=admin.id, meta={"since": since.isoformat() if since else None, "until": until.isoformat()},
+    )
+    filename = "articles.ndjson.gz" if gzip else "articles.ndjson"
+    return StreamingResponse(
+        stream_articles(engine, until, since, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Until": until.isoformat(),
+        },
+    )
+
+
+# ======================================================
+# インポート（NDJSON をまとめて取り込む）
+# ======================================================
+
+@router.post("/import/articles", response_model=dict)
+@router.post("/import/articles/", response_model=dict, include_in_schema=False)
+async def import_articles(
+    request: Request,
+    admin=Depends(require_admin),
+):
+    """
+    管理者専用: 1 行 1 記事の NDJSON（gzip 可）を一括インポート。
+    external_id が同じ記事は更新（中身が同じなら何もしない）。行ごとのエラーは errors に返す。
+    """
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Body exceeds {IMPORT_MAX_BYTES} bytes")
+        chunks.append(chunk)
+
+    # Markdown の変換と DB 書き込みは同期処理なのでスレッドで
+    result = await run_in_threadpool(import_ndjson, engine, iter_lines(b"".join(chunks)))
+    audit_writer.record(
+        "articles_import", "article", None,
+        actor_id=admin.id,
+        meta={k: v for k, v in result.as_dict().items() if k != "errors"},
+    )
+    return result.as_dict()
@@ -2,15 +2,28 @@
 from __future__ import annotations
 
 from typing import List, Literal, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Request, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, insert
+from sqlalchemy import Float, Integer, func, insert, text, tuple_
 
 from app.database import get_db
 from app.dependencies import get_current_user, get_current_user_optional, is_admin
 from app.utils.markdown import render_and_sanitize
+from app.core.query_stats import query_budget
+from app.core.view_counter import VIEW_COUNTING_ENABLED, view_counter
+from app.core.trending import WINDOWS as TRENDING_WINDOWS
+from app.core.audit import audit_writer
+from app.core.fastjson import FastJSONResponse
+from app.core.compression import set_cache_key as set_compression_cache_key
+from app.core import cdn
+from app.core.invalidation import invalidate
+from app.core.rate_limit import rate_limit
+from app.core.universities import university_map
+from app.core.search_cache import SEARCH_CACHE_ENABLED, make_key as make_search_key, search_cache, search_log
+from app.core import related
+from app.schemas.article import ArticleWithAuthorOut, CommentOut, RelatedArticleOut, TrendingArticleOut
 
 # --- Models ---
 from src.models.article import Article
@@ -19,6 +32,7 @@ from src.models.tag import Tag
 from src.models.article_tag import article_tags
 from src.models.comment import Comment as CommentModel
 from src.models.like import Like
+from src.models.trending import ArticleTrending
 
 # スラ自動リダイレクト(307)を無効化
 router = APIRouter(
@@ -36,6 +50,7 @@ def _serialize_user(u: Optional[UserModel]) -> Optional[dict]:
         return None
     return {"id": u.id, "name": u.name, "email": u.email, "avatar": getattr(u, "avatar", None)}
 
+# 日時は datetime のまま入れる（FastJSONResponse の orjson が isoformat() と同じ形で書く）
 def _serialize_article(a: Article, likes_count: Optional[int] = None, comments_count: Optional[int] = None) -> dict:
     return {
         "id": a.id,
@@ -44,8 +59,9 @@ def _serialize_article(a: Article, likes_count: Optional[int] = None, comments_c
         "body_md": a.body_md,
         "body_html": a.body_html,
         "is_published": a.is_published,
-        "created_at": a.created_at.isoformat() if a.created_at else None,
-        "updated_at": a.updated_at.isoformat() if a.updated_at else None,
+        "university_id": a.university_id,
+        "created_at": a.created_at,
+        "updated_at": a.updated_at,
         "likes_count": int(likes_count if likes_count is not None else getattr(a, "likes_count", 0) or 0),
         "comments_count": int(comments_count if comments_count is not None else getattr(a, "comments_count", 0) or 0),
         "author": _serialize_user(getattr(a, "author", None)),
@@ -74,14 +90,51 @@ def _serialize_comment(c: CommentModel, db: Session) -> dict:
         "updatedAt": _iso(getattr(c, "updated_at", None)),
     }
 
-def _count_likes(db: Session, article_id: int) -> int:
-    return (db.query(func.count(Like.user_id)).filter(Like.article_id == article_id).scalar() or 0)
+# いいね / 取り消しは likes の書き込みと articles.likes_count の増減を 1 文で行う。
+# - 記事が無ければ 0 行（→ 404）
+# - 既にいいね済み / 未いいねなら記事行は更新せず、現在のカウンタを返す
+_LIKE_SQL = text(
+    """
+    WITH ins AS (
+        INSERT INTO likes (article_id, user_id)
+        SELECT id, :user_id FROM articles WHERE id = :article_id
+        ON CONFLICT DO NOTHING
+        RETURNING article_id
+    ), upd AS (
+        UPDATE articles SET likes_count = likes_count + 1
+        WHERE id = :article_id AND EXISTS (SELECT 1 FROM ins)
+        RETURNING likes_count
+    )
+    SELECT likes_count FROM upd
+    UNION ALL
+    SELECT likes_count FROM articles WHERE id = :article_id AND NOT EXISTS (SELECT 1 FROM ins)
+    """
+)
+
+_UNLIKE_SQL = text(
+    """
+    WITH del AS (
+        DELETE FROM likes
+        WHERE article_id = :article_id AND user_id = :user_id
+        RETURNING article_id
+    ), upd AS (
+        UPDATE articles SET likes_count = likes_count - 1
+        WHERE id = :article_id AND EXISTS (SELECT 1 FROM del)
+        RETURNING likes_count
+    )
+    SELECT likes_count FROM upd
+    UNION ALL
+    SELECT likes_count FROM articles WHERE id = :article_id AND NOT EXISTS (SELECT 1 FROM del)
+    """
+)
 
 # =======================
 # 記事: 作成
 # =======================
 
-@router.post("/", response_model=dict)
+_limit_article_create = [Depends(rate_limit("article_create"))]
+
+@router.post("/", response_model=ArticleWithAuthorOut, dependencies=_limit_article_create)
 def create_article(
     data: Dict[str, Any] = Body(...),
     db: Session = Depends(get_db),
@@ -101,15 +154,18 @@ def create_article(
         body_md=body_md,
         body_html=body_html,
         is_published=is_published,
+        university_id=current_user.university_id,
     )
     db.add(article)
     db.commit()
 
+    invalidate("articles")
+
     a = db.query(Article).options(joinedload(Article.author)).filter(Article.id == article.id).first()
-    return _serialize_article(a or article)
+    return FastJSONResponse(_serialize_article(a or article))
 
 # スラ無しでも作成OK（スキーマ非表示）
-@router.post("", response_model=dict, include_in_schema=False)
+@router.post("", response_model=ArticleWithAuthorOut, dependencies=_limit_article_create, include_in_schema=False)
 def create_article_no_slash(
     data: Dict[str, Any] = Body(...),
     db: Session = Depends(get_db),
@@ -138,43 +194,79 @@ def _normalize_tags(raw: Optional[List[str]]) -> List[str]:
     return normalized
 
 
-@router.get("/", response_model=List[dict])
-def list_articles(
-    query: str | None = Query(None, description="キーワード全文検索"),
-    tag: List[str] | None = Query(None, description="タグ名で絞り込み"),
-    sort: Literal["popular", "recent", "comments"] = Query("popular", description="並び替え"),
-    db: Session = Depends(get_db),
+def _resolve_university(value: str | None) -> int | None:
+    """?university= の値（大学 ID か、u-aizu.ac.jp のようなドメイン）→ 大学 ID。"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    university_id = university_map.resolve_domain(value)
+    if university_id is None:
+        raise HTTPException(status_code=404, detail="University not found")
+    return university_id
+
+
+# ?limit= の上限。指定が無ければ従来どおり全件を返す。
+# sort=recent で limit を付けると、続きがあれば X-Next-Cursor ヘッダを返すので ?cursor= に渡す
+LIST_MAX_LIMIT = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _encode_cursor(a: Article) -> str:
+    """sort=recent の次ページ用カーソル: "<created_at の UNIX マイクロ秒>_<記事 ID>"。"""
+    return f"{(a.created_at - _EPOCH) // timedelta(microseconds=1)}_{a.id}"
+
+
+def _decode_cursor(value: str) -> tuple[datetime, int]:
+    try:
+        micros, _, article_id = value.partition("_")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(article_id)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _query_articles(
+    db: Session,
+    query: str | None,
+    tags: List[str],
+    sort: str,
+    university_id: int | None,
+    limit: int | None = None,
+    cursor: str | None = None,
 ):
-    # いいね数 / コメント数のサブクエリ
-    likes_sq = (
-        db.query(Like.article_id.label("article_id"), func.count(Like.user_id).label("likes_count"))
-        .group_by(Like.article_id)
-        .subquery()
-    )
-    comments_sq = (
-        db.query(CommentModel.article_id.label("article_id"), func.count(CommentModel.id).label("comments_count"))
-        .group_by(CommentModel.article_id)
-        .subquery()
+    """
+    一覧の本体。(Article, likes_count, comments_count) を並び順どおりに返す。
+    limit があれば最大 limit + 1 件（次ページの有無の判定用）、無ければ全件。
+    いいね数は articles.likes_count、コメント数は記事ごとの相関サブクエリ（ix_comments_article_id）で、
+    どちらも likes / comments 全体の集計はしない。
+    cursor は sort=recent のときだけ（created_at, id）のキーセットで続きから読む。
+    """
+    comments_count = (
+        db.query(func.count(CommentModel.id))
+        .filter(CommentModel.article_id == Article.id)
+        .correlate(Article)
+        .scalar_subquery()
     )
 
-    # 公開記事のみ + author を eager load
+    # 公開記事のみ + author を eager load（JOIN なのでクエリは増えない）
     q = (
-        db.query(
-            Article,
-            func.coalesce(likes_sq.c.likes_count, 0).label("likes_count"),
-            func.coalesce(comments_sq.c.comments_count, 0).label("comments_count"),
-        )
-        .outerjoin(likes_sq, likes_sq.c.article_id == Article.id)
-        .outerjoin(comments_sq, comments_sq.c.article_id == Article.id)
+        db.query(Article, Article.likes_count, comments_count.label("comments_count"))
         .options(joinedload(Article.author))
         .filter(Article.is_published == True)  # noqa: E712
     )
 
+    if university_id is not None:
+        # sort=recent なら ix_articles_university_recent (university_id, created_at DESC, id DESC) WHERE is_published
+        # を先頭から読む（limit があれば limit + 1 件で止まる）
+        q = q.filter(Article.university_id == university_id)
+
     if query:
         like = f"%{query}%"
         q = q.filter((Article.title.ilike(like)) | (Article.body_md.ilike(like)))
 
-    tags = _normalize_tags(tag)
     if tags:
         tags_subquery = (
             db.query(article_tags.c.article_id)
@@ -185,32 +277,114 @@ def list_articles(
         )
         q = q.filter(Article.id.in_(tags_subquery))
 
+    if cursor is not None:
+        created_at, article_id = _decode_cursor(cursor)
+        q = q.filter(tuple_(Article.created_at, Article.id) < tuple_(created_at, article_id))
+
     if sort == "popular":
-        q = q.order_by(func.coalesce(likes_sq.c.likes_count, 0).desc(), Article.created_at.desc())
+        q = q.order_by(Article.likes_count.desc(), Article.created_at.desc(), Article.id.desc())
     elif sort == "comments":
-        q = q.order_by(func.coalesce(comments_sq.c.comments_count, 0).desc(), Article.created_at.desc())
+        q = q.order_by(comments_count.desc(), Article.created_at.desc(), Article.id.desc())
     else:
-        q = q.order_by(Article.created_at.desc())
+        q = q.order_by(Article.created_at.desc(), Article.id.desc())
+
+    if limit is not None:
+        q = q.limit(limit + 1)
+    return q.all()
+
+
+def _articles_by_ids(db: Session, ids: List[int]):
+    """検索キャッシュに当たったとき用。ID の順に (Article, likes_count, comments_count) を返す（消えた / 非公開は除く）。"""
+    if not ids:
+        return []
+    comments_count = (
+        db.query(func.count(CommentModel.id))
+        .filter(CommentModel.article_id == Article.id)
+        .correlate(Article)
+        .scalar_subquery()
+    )
+    found = (
+        db.query(Article, Article.likes_count, comments_count)
+        .options(joinedload(Article.author))
+        .filter(Article.id.in_(ids), Article.is_published == True)  # noqa: E712
+        .all()
+    )
+    by_id = {row[0].id: row for row in found}
+    return [by_id[i] for i in ids if i in by_id]
 
-    rows = q.all()
-    return [_serialize_article(a, likes_count, comments_count) for a, likes_count, comments_count in rows]
+
+@router.get("/", response_model=List[ArticleWithAuthorOut])
+@query_budget(2)  # 一覧本体 + ?university=<ドメイン> のときの大学の対応表の読み直し（TTL ごと）
+def list_articles(
+    query: str | None = Query(None, max_length=200, description="キーワード全文検索"),
+    tag: List[str] | None = Query(None, description="タグ名で絞り込み"),
+    sort: Literal["popular", "recent", "comments"] = Query("popular", description="並び替え"),
+    university: str | None = Query(None, description="大学（ID かドメイン）で絞り込み"),
+    limit: int | None = Query(None, ge=1, le=LIST_MAX_LIMIT, description="件数（省略時は全件）"),
+    cursor: str | None = Query(None, description="前ページの X-Next-Cursor（sort=recent のみ）"),
+    db: Session = Depends(get_db),
+):
+    if cursor is not None and sort != "recent":
+        raise HTTPException(status_code=400, detail="cursor is only supported with sort=recent")
+    university_id = _resolve_university(university)
+    tags = _normalize_tags(tag)
+
+    if query and SEARCH_CACHE_ENABLED and sort == "recent":
+        # キーワード検索は同じ条件が繰り返されるので、並び順の ID をキャッシュする（app/core/search_cache.py）。
+        # いいね / コメントでは "articles" を無効化しないので、件数で並べる popular / comments はキャッシュしない
+        # （並びと表示する件数が食い違う）
+        key = make_search_key(query, tags, sort, university_id, limit, cursor)
+        search_log.record(key)
+        ids = search_cache.get(key)
+        if ids is not None:
+            rows = _articles_by_ids(db, ids)
+        else:
+            rows = _query_articles(db, query, tags, sort, university_id, limit, cursor)
+            search_cache.put(key, [a.id for a, _, _ in rows])
+    else:
+        rows = _query_articles(db, query, tags, sort, university_id, limit, cursor)
+    db.release()  # 以降は DB を使わないので、シリアライズ前に接続を返す
+
+    headers = {}
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    if has_more and sort == "recent":
+        headers[NEXT_CURSOR_HEADER] = _encode_cursor(rows[-1][0])
+    # 一覧はどの記事が変わっても古くなるので "articles" を先頭に（個々のキーは入り切る分だけ）
+    keys = ["articles"]
+    for a, _, _ in rows:
+        keys.extend(cdn.article_keys(a.id, a.author_id))
+    return cdn.set_public_cache(
+        FastJSONResponse(
+            [_serialize_article(a, likes_count, comments_count) for a, likes_count, comments_count in rows],
+            headers=headers,
+        ),
+        keys,
+    )
 
 # スラ無しでも一覧OK（スキーマ非表示）
-@router.get("", response_model=List[dict], include_in_schema=False)
+@router.get("", response_model=List[ArticleWithAuthorOut], include_in_schema=False)
 def list_articles_no_slash(
-    query: str | None = Query(None),
+    query: str | None = Query(None, max_length=200),
     tag: List[str] | None = Query(None),
     sort: Literal["popular", "recent", "comments"] = Query("popular"),
+    university: str | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
 ):
-    return list_articles(query=query, tag=tag, sort=sort, db=db)
+    return list_articles(
+        query=query, tag=tag, sort=sort, university=university,
+        limit=limit, cursor=cursor, db=db,
+    )
 
 # =======================
 # 記事: 自分の投稿
 # =======================
 
-@router.get("/me", response_model=List[dict])
-@router.get("/me/", response_model=List[dict], include_in_schema=False)
+@router.get("/me", response_model=List[ArticleWithAuthorOut])
+@router.get("/me/", response_model=List[ArticleWithAuthorOut], include_in_schema=False)
 def list_my_articles(
     is_published: bool | None = None,
     db: Session = Depends(get_db),
@@ -223,19 +397,64 @@ def list_my_articles(
 
     out: List[dict] = []
     for a in rows:
-        likes = _count_likes(db, a.id)
         comments = (db.query(func.count(CommentModel.id)).filter(CommentModel.article_id == a.id).scalar() or 0)
-        out.append(_serialize_article(a, likes, comments))
-    return out
+        out.append(_serialize_article(a, a.likes_count, comments))
+    db.release()
+    return FastJSONResponse(out)
+
+# =======================
+# 記事: 急上昇
+# =======================
+
+@router.get("/trending", response_model=List[TrendingArticleOut])
+@router.get("/trending/", response_model=List[TrendingArticleOut], include_in_schema=False)
+@query_budget(1)
+def list_trending_articles(
+    window: Literal["24h", "7d"] = Query("24h", description="集計期間"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    # article_trending は app/core/trending.py が差分で更新している。
+    # ix_article_trending_rank を上から読み、記事 / 著者は主キーで引くだけの 1 クエリ
+    comments_count = (
+        db.query(func.count(CommentModel.id))
+        .filter(CommentModel.article_id == Article.id)
+        .correlate(Article)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(Article, ArticleTrending, comments_count)
+        .join(ArticleTrending, ArticleTrending.article_id == Article.id)
+        .options(joinedload(Article.author))
+        .filter(ArticleTrending.span == window, Article.is_published == True)  # noqa: E712
+        .order_by(ArticleTrending.score.desc(), ArticleTrending.article_id.desc())
+        .limit(limit)
+        .all()
+    )
+    db.release()
+
+    out: List[dict] = []
+    for a, t, comments in rows:
+        item = _serialize_article(a, a.likes_count, comments)
+        item["trending"] = {
+            "window": window,
+            "hours": TRENDING_WINDOWS[window],
+            "likes": t.likes,
+            "comments": t.comments,
+            "score": t.score,
+        }
+        out.append(item)
+    return FastJSONResponse(out)
 
 # =======================
 # 記事: 取得
 # =======================
 
-@router.get("/{article_id}", response_model=dict)
-@router.get("/{article_id}/", response_model=dict, include_in_schema=False)
+@router.get("/{article_id}", response_model=ArticleWithAuthorOut)
+@router.get("/{article_id}/", response_model=ArticleWithAuthorOut, include_in_schema=False)
 def get_article(
     article_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Optional[UserModel] = Depends(get_current_user_optional),
 ):
@@ -249,16 +468,100 @@ def get_article(
         if a.author_id != current_user.id and not is_admin(current_user):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
-    likes = _count_likes(db, article_id)
     comments = (db.query(func.count(CommentModel.id)).filter(CommentModel.article_id == article_id).scalar() or 0)
-    return _serialize_article(a, likes, comments)
+    db.release()
+
+    # 閲覧数はここでは数えない（CDN に当たったリクエストは届かないので）。POST /{id}/views で数える
+    # 本文が大きいので、同じ版なら圧縮済みのボディを使い回す（app/core/compression.py）
+    set_compression_cache_key(request, f"article:{a.id}", a.updated_at)
+    # 下書きはログイン状態で見え方が変わるので、セッション付きのリクエストは CDN に載せない
+    return cdn.set_public_cache(
+        FastJSONResponse(_serialize_article(a, a.likes_count, comments)),
+        cdn.article_keys(a.id, a.author_id),
+        request=request,
+    )
+
+# article_related の 1 行を (関連記事 ID, スコア, 順位) に展開する
+_RELATED_SQL = (
+    text(
+        """
+        SELECT u.id, u.score, u.rank
+        FROM article_related AS r
+        CROSS JOIN LATERAL unnest(r.related_ids, r.scores) WITH ORDINALITY AS u(id, score, rank)
+        WHERE r.article_id = :article_id
+        """
+    )
+    .columns(id=Integer, score=Float, rank=Integer)
+    .subquery("related")
+)
+
+@router.get("/{article_id}/related", response_model=List[RelatedArticleOut])
+@router.get("/{article_id}/related/", response_model=List[RelatedArticleOut], include_in_schema=False)
+@query_budget(1)
+def list_related_articles(
+    article_id: int,
+    limit: int = Query(related.RELATED_TOP_K, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    # 関連記事は app/core/related.py が事前計算している。article_related を主キーで 1 行引き、
+    # 並んでいる記事 / 著者を主キーで引くだけの 1 クエリ。無い記事 / 下書き / まだ計算していない記事は空
+    comments_count = (
+        db.query(func.count(CommentModel.id))
+        .filter(CommentModel.article_id == Article.id)
+        .correlate(Article)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(Article, _RELATED_SQL.c.score, comments_count)
+        .join(_RELATED_SQL, _RELATED_SQL.c.id == Article.id)
+        .options(joinedload(Article.author))
+        .filter(Article.is_published == True)  # noqa: E712
+        .order_by(_RELATED_SQL.c.rank)
+        .limit(limit)
+        .params(article_id=article_id)
+        .all()
+    )
+    db.release()
+
+    out: List[dict] = []
+    keys = [related.cdn_key(article_id)]
+    for a, score, comments in rows:
+        item = _serialize_article(a, a.likes_count, comments)
+        item["related_score"] = round(float(score), 4)
+        out.append(item)
+        keys += cdn.article_keys(a.id, a.author_id)
+    return cdn.set_public_cache(FastJSONResponse(out), keys)
+
+_VIEW_TARGET_SQL = text("SELECT author_id FROM articles WHERE id = :article_id AND is_published")
+
+@router.post("/{article_id}/views", status_code=status.HTTP_204_NO_CONTENT)
+@router.post("/{article_id}/views/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
+@query_budget(2)  # ログインユーザーの取得（セッション付きのとき）+ 記事の確認
+def record_article_view(
+    article_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[UserModel] = Depends(get_current_user_optional),
+):
+    """
+    閲覧数のビーコン。記事詳細を表示したクライアントが呼ぶ（GET /{id} は CDN に載るので、そこでは数えない）。
+    キャッシュさせない（no-store）。バッファに積むだけで、DB への反映は app/core/view_counter.py がまとめて行う。
+    """
+    author_id = db.execute(_VIEW_TARGET_SQL, {"article_id": article_id}).scalar()
+    db.release()
+    if author_id is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    if VIEW_COUNTING_ENABLED and (current_user is None or current_user.id != author_id):
+        viewer = f"u:{current_user.id}" if current_user is not None else f"ip:{request.client.host if request.client else '-'}"
+        view_counter.record(article_id, viewer)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # =======================
 # 記事: 更新 / 削除
 # =======================
 
-@router.patch("/{article_id}", response_model=dict)
-@router.patch("/{article_id}/", response_model=dict, include_in_schema=False)
+@router.patch("/{article_id}", response_model=ArticleWithAuthorOut)
+@router.patch("/{article_id}/", response_model=ArticleWithAuthorOut, include_in_schema=False)
 def update_article(
     article_id: int,
     data: Dict[str, Any] = Body(...),
@@ -280,15 +583,17 @@ def update_article(
     if body_md is not None:
         a.body_md = body_md
         a.body_html = render_and_sanitize(body_md)
-    if is_published is not None:
+    if is_published is not None and bool(is_published) != a.is_published:
         a.is_published = bool(is_published)
+        # 関連記事の候補に入る / 外れる
+        related.mark_dirty(db, [article_id])
 
     db.commit()
+    invalidate("articles", f"article-{article_id}")
 
     a = db.query(Article).options(joinedload(Article.author)).filter(Article.id == article_id).first()
-    likes = _count_likes(db, article_id)
     comments = (db.query(func.count(CommentModel.id)).filter(CommentModel.article_id == article_id).scalar() or 0)
-    return _serialize_article(a, likes, comments)
+    return FastJSONResponse(_serialize_article(a, a.likes_count, comments))
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
 @router.delete("/{article_id}/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
@@ -302,8 +607,16 @@ def delete_article(
         raise HTTPException(status_code=404, detail="Article not found")
     if article.author_id != current_user.id and not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not allowed")
+    author_id, title = article.author_id, article.title
     db.delete(article)
     db.commit()
+    invalidate("articles", f"article-{article_id}", f"comments-{article_id}")
+    if author_id != current_user.id:
+        # 管理者による他人の記事の削除は監査ログに残す
+        audit_writer.record(
+            "article_delete", "article", article_id,
+            actor_id=current_user.id, meta={"author_id": author_id, "title": title},
+        )
     return None
 
 # =======================
@@ -333,16 +646,19 @@ def attach_tag_to_article(
 
     try:
         db.execute(insert(article_tags).values(article_id=article_id, tag_id=payload.tag_id))
+        related.mark_dirty(db, [article_id], [payload.tag_id])
         db.commit()
     except Exception:
         db.rollback()
+        return None
+    invalidate("articles", f"article-{article_id}")
     return None
 
 class CommentCreate(BaseModel):
     body: str = Field(..., min_length=1, max_length=5000)
 
-@router.get("/{article_id}/comments", response_model=List[dict])
-@router.get("/{article_id}/comments/", response_model=List[dict], include_in_schema=False)
+@router.get("/{article_id}/comments", response_model=List[CommentOut])
+@router.get("/{article_id}/comments/", response_model=List[CommentOut], include_in_schema=False)
 def list_comments(
     article_id: int,
     db: Session = Depends(get_db),
@@ -353,10 +669,15 @@ def list_comments(
         .order_by(CommentModel.created_at.asc())
         .all()
     )
-    return [_serialize_comment(c, db) for c in comments]
+    items = [_serialize_comment(c, db) for c in comments]
+    keys = [f"comments-{article_id}", f"article-{article_id}"]
+    keys.extend(f"user-{c['author']['id']}" for c in items if c["author"])
+    return cdn.set_public_cache(FastJSONResponse(items), keys)
+
+_limit_comment_create = [Depends(rate_limit("comment_create"))]
 
-@router.post("/{article_id}/comments", response_model=dict, status_code=status.HTTP_201_CREATED)
-@router.post("/{article_id}/comments/", response_model=dict, status_code=status.HTTP_201_CREATED, include_in_schema=False)
+@router.post("/{article_id}/comments", response_model=CommentOut, status_code=status.HTTP_201_CREATED, dependencies=_limit_comment_create)
+@router.post("/{article_id}/comments/", response_model=CommentOut, status_code=status.HTTP_201_CREATED, dependencies=_limit_comment_create, include_in_schema=False)
 def create_comment(
     article_id: int,
     payload: CommentCreate,
@@ -389,7 +710,8 @@ def create_comment(
     db.add(c)
     db.commit()
     db.refresh(c)
-    return _serialize_comment(c, db)
+    invalidate(f"comments-{article_id}", f"article-{article_id}")  # 記事詳細の comments_count も変わる
+    return FastJSONResponse(_serialize_comment(c, db), status_code=status.HTTP_201_CREATED)
 
 @router.get("/{article_id}/likes", response_model=dict)
 @router.get("/{article_id}/likes/", response_model=dict, include_in_schema=False)
@@ -410,24 +732,22 @@ def get_like_status(
             .first()
             is not None
         )
-    return {"liked": liked, "likes_count": _count_likes(db, article_id)}
+    return {"liked": liked, "likes_count": a.likes_count}
+
+_limit_like = [Depends(rate_limit("like"))]
 
-@router.post("/{article_id}/likes", response_model=dict, status_code=status.HTTP_201_CREATED)
-@router.post("/{article_id}/likes/", response_model=dict, status_code=status.HTTP_201_CREATED, include_in_schema=False)
+@router.post("/{article_id}/likes", response_model=dict, status_code=status.HTTP_201_CREATED, dependencies=_limit_like)
+@router.post("/{article_id}/likes/", response_model=dict, status_code=status.HTTP_201_CREATED, dependencies=_limit_like, include_in_schema=False)
 def like_article(
     article_id: int,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
-    a = db.query(Article).filter(Article.id == article_id).first()
-    if not a:
+    likes_count = db.execute(_LIKE_SQL, {"article_id": article_id, "user_id": current_user.id}).scalar()
+    if likes_count is None:
         raise HTTPException(status_code=404, detail="Article not found")
-
-    exists = db.query(Like).filter(Like.article_id == article_id, Like.user_id == current_user.id).first()
-    if not exists:
-        db.add(Like(article_id=article_id, user_id=current_user.id))
-        db.commit()
-    return {"liked": True, "likes_count": _count_likes(db, article_id)}
+    db.commit()
+    return {"liked": True, "likes_count": likes_count}
 
 @router.delete("/{article_id}/likes", response_model=dict)
 @router.delete("/{article_id}/likes/", response_model=dict, include_in_schema=False)
@@ -436,15 +756,11 @@ def unlike_article(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
-    a = db.query(Article).filter(Article.id == article_id).first()
-    if not a:
+    likes_count = db.execute(_UNLIKE_SQL, {"article_id": article_id, "user_id": current_user.id}).scalar()
+    if likes_count is None:
         raise HTTPException(status_code=404, detail="Article not found")
-
-    like = db.query(Like).filter(Like.article_id == article_id, Like.user_id == current_user.id).first()
-    if like:
-        db.delete(like)
-        db.commit()
-    return {"liked": False, "likes_count": _count_likes(db, article_id)}
+    db.commit()
+    return {"liked": False, "likes_count": likes_count}
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
 @router.delete("/{article_id}/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
@@ -458,6 +774,14 @@ def delete_article(
         raise HTTPException(status_code=404, detail="Article not found")
     if article.author_id != current_user.id and not is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not allowed")
+    author_id, title = article.author_id, article.title
     db.delete(article)
     db.commit()
+    invalidate("articles", f"article-{article_id}", f"comments-{article_id}")
+    if author_id != current_user.id:
+        # 管理者による他人の記事の削除は監査ログに残す
+        audit_writer.record(
+            "article_delete", "article", article_id,
+            actor_id=current_user.id, meta={"author_id": author_id, "title": title},
+        )
     return None
@@ -4,30 +4,33 @@ import os
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies import get_current_user, _ensure_user_exists
+from app.core.rate_limit import rate_limit
+from app.core.universities import university_map
 from src.models.user import User as UserModel
 
-# Firebase Admin SDK（初期化は app/core/firebase.py 側で実施）
-from app.core.firebase import ensure_firebase_ready
+# Firebase Admin SDK（import / 初期化は app/core/firebase.py 側で、最初に使うときに行う）
+from app.core.firebase import ensure_firebase_ready, get_auth, sdk_available
 
-try:
-    from firebase_admin import auth as firebase_auth  # type: ignore
-    _FIREBASE_AVAILABLE = True
-except Exception:
-    firebase_auth = None  # type: ignore
-    _FIREBASE_AVAILABLE = False
+_FIREBASE_AVAILABLE = sdk_available()
+# firebase_admin.auth。None なら初回ログイン時に get_auth() で読み込む（ベンチではスタブを入れる）
+firebase_auth = None
 
 router = APIRouter(prefix="/auth", tags=["auth"], redirect_slashes=False)
 
 SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "session")
 
 
-@router.post("/firebase-login")
-@router.post("/firebase-login/", include_in_schema=False)
+# トークン検証は Firebase への問い合わせを含むので、IP ごとに回数を絞る
+_limit_login = [Depends(rate_limit("login"))]
+
+@router.post("/firebase-login", dependencies=_limit_login)
+@router.post("/firebase-login/", dependencies=_limit_login, include_in_schema=False)
 async def firebase_login(request: Request, db: Session = Depends(get_db)):
     """
     フロントから { idToken } を受け取り、Firebase で検証。
@@ -36,7 +39,9 @@ async def firebase_login(request: Request, db: Session = Depends(get_db)):
     if not _FIREBASE_AVAILABLE:
         raise HTTPException(status_code=500, detail="Firebase Admin SDK is not available")
 
-    if not ensure_firebase_ready():
+    # 初回は SDK の import / 認証情報の読み込みがあり、ウォームアップのスレッドとロックを取り合うこともあるので、
+    # イベントループを止めないようにスレッドプールで
+    if not await run_in_threadpool(ensure_firebase_ready):
         raise HTTPException(status_code=500, detail="Firebase credentials are not configured")
 
     try:
@@ -49,9 +54,10 @@ async def firebase_login(request: Request, db: Session = Depends(get_db)):
     if not id_token:
         raise HTTPException(status_code=400, detail="idToken (or id_token) is required")
 
+    verifier = firebase_auth or await run_in_threadpool(get_auth)
     try:
-        # 多少の時刻ズレを許容（最大60秒）
-        decoded = firebase_auth.verify_id_token(id_token, clock_skew_seconds=60)
+        # 多少の時刻ズレを許容（最大60秒）。公開鍵の取得で Google に問い合わせることがあるのでスレッドプールで
+        decoded = await run_in_threadpool(verifier.verify_id_token, id_token, clock_skew_seconds=60)
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Invalid ID token: {str(e)}")
 
@@ -62,8 +68,10 @@ async def firebase_login(request: Request, db: Session = Depends(get_db)):
     if not email:
         raise HTTPException(status_code=400, detail="Email not provided by identity provider")
 
-    # DB upsert（role は保持）
-    user = _ensure_user_exists(db, None, name=name, email=email, avatar=picture)
+    # DB upsert（role は保持）。大学はメールのドメインから。対応表の読み直し（初回 / 無効化後 / TTL 切れ）で
+    # DB を引くことがあるのでスレッドプールで
+    university_id = await run_in_threadpool(university_map.resolve_email, email)
+    user = _ensure_user_exists(db, None, name=name, email=email, avatar=picture, university_id=university_id)
 
     # セッションクッキー発行
     session_value = f"USER:{user.id}"
@@ -75,6 +83,7 @@ async def firebase_login(request: Request, db: Session = Depends(get_db)):
             "email": user.email,
             "avatar": getattr(user, "avatar", None),
             "role": getattr(user, "role", "student"),
+            "university_id": user.university_id,
         },
     )
     resp.set_cookie(
@@ -108,4 +117,5 @@ def get_me(user: UserModel = Depends(get_current_user)):
         "email": user.email,
         "avatar": getattr(user, "avatar", None),
         "role": getattr(user, "role", "student"),
+        "university_id": user.university_id,
     }
@@ -0,0 +1,94 @@
+# app/routers/feed.py
+# フォロー中のタグ（どれか 1 つでも付いている）記事を新しい順に返すフィード。
+# - 並びは記事 ID の降順（= 投稿順）。cursor には前ページ最後の記事 ID を渡す
+# - タグごとに ix_article_tags_tag_id (tag_id, article_id) を新しい側から limit+1 件だけ読み、
+#   それを ID 降順でマージ・重複除去する。フォロー数 × (limit+1) 行しか触らないので、
+#   タグを何十個フォローしていても article_tags 全体の JOIN → ソートにはならない
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import Integer, func, text
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.core.query_stats import query_budget
+from app.core.fastjson import FastJSONResponse
+from app.routers.articles import _serialize_article
+from app.schemas.article import ArticlePage
+from src.models.article import Article
+from src.models.comment import Comment as CommentModel
+from src.models.user import User as UserModel
+
+router = APIRouter(
+    prefix="/v1/feed",
+    tags=["feed"],
+    redirect_slashes=False,
+)
+
+_FEED_IDS_SQL = text(
+    """
+    SELECT DISTINCT t.article_id
+    FROM tag_follows AS f
+    CROSS JOIN LATERAL (
+        SELECT at.article_id
+        FROM article_tags AS at
+        JOIN articles AS a ON a.id = at.article_id
+        WHERE at.tag_id = f.tag_id
+          AND at.article_id < :cursor
+          AND a.is_published
+        ORDER BY at.article_id DESC
+        LIMIT :n
+    ) AS t
+    WHERE f.user_id = :user_id
+    ORDER BY t.article_id DESC
+    LIMIT :n
+    """
+).columns(article_id=Integer)
+
+
+@router.get("/", response_model=ArticlePage)
+@query_budget(2)  # ログインユーザーの取得 + フィード本体
+def get_feed(
+    cursor: Optional[int] = Query(None, description="前ページの next_cursor"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    # limit+1 件取って、次ページがあるかを判定する
+    ids = _FEED_IDS_SQL.bindparams(
+        user_id=current_user.id,
+        cursor=cursor if cursor is not None else 2**31 - 1,
+        n=limit + 1,
+    ).subquery()
+    comments_count = (
+        db.query(func.count(CommentModel.id))
+        .filter(CommentModel.article_id == Article.id)
+        .correlate(Article)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(Article, comments_count)
+        .join(ids, ids.c.article_id == Article.id)
+        .options(joinedload(Article.author))
+        .order_by(Article.id.desc())
+        .all()
+    )
+    db.release()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return FastJSONResponse({
+        "items": [_serialize_article(a, a.likes_count, comments) for a, comments in rows],
+        "next_cursor": rows[-1][0].id if has_more else None,
+    })
+
+
+@router.get("", response_model=ArticlePage, include_in_schema=False)
+def get_feed_no_slash(
+    cursor: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    return get_feed(cursor=cursor, limit=limit, db=db, current_user=current_user)
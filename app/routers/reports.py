@@ -0,0 +1,81 @@
+# app/routers/reports.py
+# 記事 / コメントの通報。処理（モデレーションキュー）は app/routers/admin.py 側
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.schemas.report import ReportCreate
+from src.models.user import User as UserModel
+
+router = APIRouter(
+    prefix="/v1/reports",
+    tags=["reports"],
+    redirect_slashes=False,
+)
+
+# 対象が存在するときだけ入れる。同じ人の未処理の通報が既にあれば何もしない
+# （ux_reports_active_target_reporter）
+_TARGET_TABLES = {"article": "articles", "comment": "comments"}
+
+_CREATE_SQL = {
+    target_type: text(
+        f"""
+        INSERT INTO reports (target_type, target_id, reporter_id, reason, status)
+        SELECT :target_type, t.id, :reporter_id, :reason, 'open' FROM {table} AS t WHERE t.id = :target_id
+        ON CONFLICT (target_type, target_id, reporter_id) WHERE status IN ('open','triage') DO NOTHING
+        RETURNING id, created_at
+        """
+    )
+    for target_type, table in _TARGET_TABLES.items()
+}
+
+
+@router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
+def create_report(
+    payload: ReportCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    reason = payload.reason.strip()
+    if not reason:
+        raise HTTPException(status_code=400, detail="Reason is required")
+
+    row = db.execute(
+        _CREATE_SQL[payload.target_type],
+        {
+            "target_type": payload.target_type,
+            "target_id": payload.target_id,
+            "reporter_id": current_user.id,
+            "reason": reason,
+        },
+    ).first()
+    if row is None:
+        exists = db.execute(
+            text(f"SELECT 1 FROM {_TARGET_TABLES[payload.target_type]} WHERE id = :id"),
+            {"id": payload.target_id},
+        ).first()
+        if exists is None:
+            raise HTTPException(status_code=404, detail=f"{payload.target_type.capitalize()} not found")
+        raise HTTPException(status_code=409, detail="Already reported")
+    db.commit()
+
+    return {
+        "id": row.id,
+        "target_type": payload.target_type,
+        "target_id": payload.target_id,
+        "reason": reason,
+        "status": "open",
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+# スラ無しでも通報OK（スキーマ非表示）
+@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED, include_in_schema=False)
+def create_report_no_slash(
+    payload: ReportCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    return create_report(payload=payload, db=db, current_user=current_user)
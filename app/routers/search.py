@@ -0,0 +1,83 @@
+# app/routers/search.py
+# 検索の「もしかして」候補。キーワードに似た記事タイトル / タグ名を pg_trgm の類似度で返す。
+# - 記事タイトルは word_similarity（長いタイトルの一部に似ていればよい）、タグ名は similarity
+#   どちらも % / <% 演算子で ix_articles_title_trgm / ix_tags_name_trgm（GIN）を使う
+#   しきい値は pg_trgm.similarity_threshold / pg_trgm.word_similarity_threshold（既定 0.3 / 0.6）
+# - pg_trgm が入っていない DB では候補は空（起動後の最初の 1 回だけ確認して警告を出す）
+import logging
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core import cdn
+from app.core.query_stats import query_budget
+from app.database import get_db
+from app.schemas.search import SuggestionsOut
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/v1/search",
+    tags=["search"],
+    redirect_slashes=False,
+)
+
+
+_SUGGEST_SQL = text(
+    """
+    (
+        SELECT a.title AS text, 'title' AS kind, word_similarity(:q, a.title) AS score
+        FROM articles AS a
+        WHERE a.is_published AND :q <% a.title
+        ORDER BY score DESC, a.id DESC
+        LIMIT :n
+    )
+    UNION ALL
+    (
+        SELECT t.name, 'tag', similarity(t.name, :q) AS score
+        FROM tags AS t
+        WHERE t.name % :q
+        ORDER BY score DESC, t.id
+        LIMIT :n
+    )
+    ORDER BY score DESC
+    """
+)
+
+# None = まだ確認していない
+_trgm_available: bool | None = None
+
+
+def _has_trgm(db: Session) -> bool:
+    global _trgm_available
+    if _trgm_available is None:
+        _trgm_available = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+        if not _trgm_available:
+            logger.warning("pg_trgm is not installed; search suggestions are disabled")
+    return _trgm_available
+
+
+@router.get("/suggestions", response_model=SuggestionsOut)
+@router.get("/suggestions/", response_model=SuggestionsOut, include_in_schema=False)
+@query_budget(2)  # pg_trgm の確認（最初の 1 回だけ）+ 候補
+def get_suggestions(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100, description="検索キーワード（0 件だったもの）"),
+    limit: int = Query(5, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    q = q.strip()
+    suggestions: list[dict] = []
+    if q and _has_trgm(db):
+        seen = set()
+        for row in db.execute(_SUGGEST_SQL, {"q": q, "n": limit}):
+            # タイトルとタグで同じ文字列なら 1 つに。キーワードそのものは候補にしない
+            if row.text in seen or row.text.lower() == q.lower():
+                continue
+            seen.add(row.text)
+            suggestions.append({"text": row.text, "kind": row.kind, "score": round(float(row.score), 3)})
+            if len(suggestions) >= limit:
+                break
+    cdn.set_public_cache(response, ["articles", "tags"])
+    return {"query": q, "suggestions": suggestions}
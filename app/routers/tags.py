@@ -1,11 +1,17 @@
 # app/routers/tags.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.core import cdn
+from app.core.invalidation import invalidate
 from app.database import get_db
+from app.dependencies import get_current_user
 from app.schemas.tag import TagCreate, TagOut
 from src.models.tag import Tag
+from src.models.tag_follow import TagFollow
+from src.models.user import User as UserModel
 
 router = APIRouter(
     prefix="/v1/tags",
@@ -27,6 +33,7 @@ def create_tag(
     db.add(tag)
     db.commit()
     db.refresh(tag)
+    invalidate("tags")
     return tag
 
 # スラ無しでも作成OK（スキーマ非表示）
@@ -40,6 +47,7 @@ def create_tag_no_slash(
 # ---------- List/Search ----------
 @router.get("/", response_model=List[TagOut])
 def list_tags(
+    response: Response,
     query: Optional[str] = Query(None, description="タグ名の部分一致検索"),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
@@ -48,13 +56,69 @@ def list_tags(
     if query:
         q = q.filter(Tag.name.ilike(f"%{query}%"))
     rows = q.order_by(Tag.created_at.desc()).limit(limit).all()
+    db.release()  # TagOut への変換は DB 不要なので先に接続を返す
+    cdn.set_public_cache(response, ["tags", *(f"tag-{t.id}" for t in rows)])
     return rows
 
 # スラ無しでも一覧OK（スキーマ非表示）
 @router.get("", response_model=List[TagOut], include_in_schema=False)
 def list_tags_no_slash(
+    response: Response,
     query: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
 ):
-    return list_tags(query=query, limit=limit, db=db)
+    return list_tags(response=response, query=query, limit=limit, db=db)
+
+# ---------- Follow ----------
+# フォロー中のタグは /v1/feed の元になる
+_FOLLOW_SQL = text(
+    """
+    INSERT INTO tag_follows (user_id, tag_id)
+    SELECT :user_id, id FROM tags WHERE id = :tag_id
+    ON CONFLICT DO NOTHING
+    RETURNING tag_id
+    """
+)
+
+@router.get("/following", response_model=List[TagOut])
+@router.get("/following/", response_model=List[TagOut], include_in_schema=False)
+def list_following_tags(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    rows = (
+        db.query(Tag)
+        .join(TagFollow, TagFollow.tag_id == Tag.id)
+        .filter(TagFollow.user_id == current_user.id)
+        .order_by(Tag.name)
+        .all()
+    )
+    db.release()
+    return rows
+
+@router.post("/{tag_id}/follow", status_code=status.HTTP_204_NO_CONTENT)
+@router.post("/{tag_id}/follow/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
+def follow_tag(
+    tag_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    inserted = db.execute(_FOLLOW_SQL, {"user_id": current_user.id, "tag_id": tag_id}).first()
+    if inserted is None and db.get(Tag, tag_id) is None:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    db.commit()  # 既にフォロー済みでも 204
+    return None
+
+@router.delete("/{tag_id}/follow", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{tag_id}/follow/", status_code=status.HTTP_204_NO_CONTENT, include_in_schema=False)
+def unfollow_tag(
+    tag_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    db.query(TagFollow).filter(
+        TagFollow.user_id == current_user.id, TagFollow.tag_id == tag_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    return None
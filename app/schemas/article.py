@@ -1,6 +1,6 @@
 # app/schemas/article.py ルールをかいている
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import ConfigDict
 # 記事作成用
@@ -26,10 +26,54 @@ class ArticleOut(BaseModel):
     body_md: str
     body_html: str
     is_published: bool
+    university_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     likes_count: int = 0 
     comments_count: int = 0
 
 
-   
\ No newline at end of file
+   
+
+# ---- レスポンスのスキーマ（/docs 用）----
+# 実際の JSON は app/routers/articles.py の _serialize_article が組み立てて
+# app/core/fastjson.FastJSONResponse で返す（FastAPI の検証は通らない）ので、形を変えるときは両方直す
+
+class AuthorOut(BaseModel):
+    id: int
+    name: str
+    email: str
+    avatar: Optional[str] = None
+
+# 一覧 / 詳細 / フィードの 1 記事
+class ArticleWithAuthorOut(ArticleOut):
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    author: Optional[AuthorOut] = None
+
+class TrendingInfo(BaseModel):
+    window: str
+    hours: int
+    likes: int
+    comments: int
+    score: int
+
+class TrendingArticleOut(ArticleWithAuthorOut):
+    trending: TrendingInfo
+
+# GET /v1/articles/{id}/related
+class RelatedArticleOut(ArticleWithAuthorOut):
+    related_score: float  # IDF 重み付きのタグの Jaccard（0〜1）
+
+# GET /v1/feed
+class ArticlePage(BaseModel):
+    items: List[ArticleWithAuthorOut]
+    next_cursor: Optional[int] = None
+
+class CommentOut(BaseModel):
+    id: int
+    body: str
+    author: Optional[AuthorOut] = None
+    article_id: int
+    createdAt: datetime
+    updatedAt: datetime
@@ -0,0 +1,13 @@
+# app/schemas/report.py 通報まわりの入力
+from typing import Literal
+from pydantic import BaseModel, Field
+
+# 通報の作成
+class ReportCreate(BaseModel):
+    target_type: Literal["article", "comment"]
+    target_id: int
+    reason: str = Field(..., min_length=1, max_length=1000)
+
+# モデレーション: 対象の通報をまとめて triage / closed にする
+class ReportResolve(BaseModel):
+    status: Literal["triage", "closed"]
@@ -0,0 +1,16 @@
+# app/schemas/search.py
+from typing import List, Literal
+
+from pydantic import BaseModel
+
+
+# 検索の「もしかして」候補（GET /v1/search/suggestions）
+class Suggestion(BaseModel):
+    text: str
+    kind: Literal["title", "tag"]  # 記事タイトル / タグ名
+    score: float                   # pg_trgm の類似度（0〜1）
+
+
+class SuggestionsOut(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
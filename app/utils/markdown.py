@@ -1,24 +1,42 @@
-from markdown import markdown as md_to_html
-import bleach
+from functools import lru_cache
 
-# 許可タグ
-ALLOWED_TAGS = set(bleach.sanitizer.ALLOWED_TAGS).union({
+from app.core.metrics import MARKDOWN_RENDER, observe
+
+# markdown / bleach は import が重い（html5lib 込み）ので、最初の変換のときに読み込む
+
+# 許可タグ（bleach の既定に足す分）
+EXTRA_ALLOWED_TAGS = {
     "p", "pre", "code", "blockquote", "hr", "br",
     "ul", "ol", "li",
     "h1", "h2", "h3", "h4", "h5", "h6",
     "table", "thead", "tbody", "tr", "th", "td",
     "em", "strong", "a"
-})
+}
 
 # 許可属性
 ALLOWED_ATTRS = {
     "a": ["href", "title", "rel", "target"],
 }
 
+
+@lru_cache(maxsize=None)
+def _libs():
+    from markdown import markdown as md_to_html
+    import bleach
+
+    return md_to_html, bleach, set(bleach.sanitizer.ALLOWED_TAGS).union(EXTRA_ALLOWED_TAGS)
+
 def render_and_sanitize(markdown_text: str) -> str:
     """
     Markdown → HTML 変換後、サニタイズして返す。
     """
+    with observe(MARKDOWN_RENDER):
+        return _render_and_sanitize(markdown_text)
+
+
+def _render_and_sanitize(markdown_text: str) -> str:
+    md_to_html, bleach, allowed_tags = _libs()
+
     # MarkdownをHTMLへ
     html = md_to_html(
         markdown_text or "",
@@ -28,7 +46,7 @@ def render_and_sanitize(markdown_text: str) -> str:
     # 危険なタグを除去
     cleaned = bleach.clean(
         html,
-        tags=ALLOWED_TAGS,
+        tags=allowed_tags,
         attributes=ALLOWED_ATTRS,
         strip=True,
     )
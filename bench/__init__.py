@@ -0,0 +1,4 @@
+# bench: 負荷ベンチマーク（python -m bench.run）
+
+# bench.server のスタブが受け付ける ID トークンの接頭辞（"bench:<email>"）
+BENCH_TOKEN_PREFIX = "bench:"
@@ -0,0 +1,49 @@
+# bench/compare.py
+# 2 回分のベンチ結果 JSON を比べる。
+#   python -m bench.compare bench_results/before.json bench_results/after.json
+import argparse
+import json
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "   n/a"
+    return f"{(after - before) / before * 100.0:+6.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベンチ結果 JSON の差分表示")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    for key in ("scale", "concurrency", "duration", "workers"):
+        if before["meta"].get(key) != after["meta"].get(key):
+            print(f"warning: {key} differs ({before['meta'].get(key)} -> {after['meta'].get(key)})")
+
+    header = f"{'endpoint':<24}" + "".join(f"{m:>26}" for m in METRICS)
+    print(header)
+    print("-" * len(header))
+    names = sorted(set(before["endpoints"]) | set(after["endpoints"]))
+    for name in names:
+        b = before["endpoints"].get(name, {})
+        a = after["endpoints"].get(name, {})
+        cells = []
+        for m in METRICS:
+            bv, av = b.get(m, 0.0), a.get(m, 0.0)
+            cells.append(f"{bv:>9.1f} → {av:>9.1f} {_delta(bv, av)}")
+        print(f"{name:<24}" + "".join(f"{c:>26}" for c in cells))
+    print()
+    print(f"throughput: {before['throughput_rps']:.1f} → {after['throughput_rps']:.1f} rps "
+          f"({_delta(before['throughput_rps'], after['throughput_rps']).strip()})")
+
+
+if __name__ == "__main__":
+    main()
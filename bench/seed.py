@@ -0,0 +1,120 @@
+# bench/seed.py
+# ベンチマーク用 DB を指定スケールで作り直す。
+# - 既存データは TRUNCATE するので、必ずベンチ専用の DB を使うこと（DB 名に "bench" を含むことを要求）
+# - setseed() を使うので、同じ seed / scale なら同じデータになる
+# - 全部 INSERT ... SELECT generate_series で DB 側で生成する（ORM は使わない）
+import argparse
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+# 検索ワークロードで使うキーワード。タイトルに混ぜておく
+SEARCH_WORDS = ("Python", "線形代数", "React", "Docker", "統計", "アルゴリズム", "SQL", "離散数学")
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    articles: int
+    tags: int
+    max_tags_per_article: int
+    max_likes_per_article: int
+    max_comments_per_article: int
+
+
+SCALES = {
+    "small": Scale(users=200, articles=2_000, tags=100, max_tags_per_article=4,
+                   max_likes_per_article=50, max_comments_per_article=10),
+    "medium": Scale(users=2_000, articles=50_000, tags=500, max_tags_per_article=5,
+                    max_likes_per_article=200, max_comments_per_article=30),
+    "large": Scale(users=20_000, articles=300_000, tags=2_000, max_tags_per_article=6,
+                   max_likes_per_article=1_000, max_comments_per_article=50),
+}
+
+_TRUNCATE = "TRUNCATE article_tags, likes, comments, reports, audit_logs, articles, tags, users RESTART IDENTITY CASCADE"
+
+# power(random(), 3) で小さい値に偏らせ、タグ / いいね / コメントをべき分布っぽくする
+_STATEMENTS = (
+    """
+    INSERT INTO users (name, email, role)
+    SELECT 'bench user ' || g, 'bench' || g || '@bench.local', 'student'
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO tags (name)
+    SELECT 'tag' || g FROM generate_series(1, :tags) AS g
+    """,
+    """
+    INSERT INTO articles (author_id, title, body_md, body_html, is_published, score, views, created_at, updated_at)
+    SELECT
+        1 + (g % :users),
+        (CAST(:words AS text[]))[1 + g % cardinality(CAST(:words AS text[]))] || ' のメモ #' || g,
+        '# メモ ' || g || E'\n\n' || repeat((CAST(:words AS text[]))[1 + g % cardinality(CAST(:words AS text[]))] || ' について調べたことを書きます。 ', 20 + g % 200),
+        '<h1>メモ ' || g || '</h1><p>' || repeat((CAST(:words AS text[]))[1 + g % cardinality(CAST(:words AS text[]))] || ' について調べたことを書きます。 ', 20 + g % 200) || '</p>',
+        (g % 10) <> 0,
+        0,
+        0,
+        now() - make_interval(mins => g),
+        now() - make_interval(mins => g)
+    FROM generate_series(1, :articles) AS g
+    """,
+    """
+    INSERT INTO article_tags (article_id, tag_id)
+    SELECT a, 1 + floor(power(random(), 3) * :tags)::int
+    FROM generate_series(1, :articles) AS a,
+         LATERAL generate_series(1, 1 + (a % :max_tags_per_article)) AS k
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO likes (article_id, user_id)
+    SELECT a, 1 + floor(random() * :users)::int
+    FROM generate_series(1, :articles) AS a,
+         LATERAL generate_series(1, floor(power(random(), 3) * :max_likes_per_article)::int + (a * 0)) AS k
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    UPDATE articles AS a SET likes_count = s.n
+    FROM (SELECT article_id, count(*) AS n FROM likes GROUP BY article_id) AS s
+    WHERE a.id = s.article_id
+    """,
+    """
+    INSERT INTO comments (article_id, author_id, body_md, body_html)
+    SELECT a, 1 + floor(random() * :users)::int, 'コメント ' || k, '<p>コメント ' || k || '</p>'
+    FROM generate_series(1, :articles) AS a,
+         LATERAL generate_series(1, floor(power(random(), 3) * :max_comments_per_article)::int + (a * 0)) AS k
+    """,
+)
+
+
+def seed(database_url: str, scale: Scale, seed_value: float = 0.42, force: bool = False) -> None:
+    url = make_url(database_url)
+    if not force and "bench" not in (url.database or ""):
+        raise SystemExit(f"refusing to truncate non-bench database {url.database!r} (use --force)")
+
+    params = {**asdict(scale), "words": list(SEARCH_WORDS)}
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(_TRUNCATE))
+            conn.execute(text("SELECT setseed(:s)"), {"s": seed_value})
+            for stmt in _STATEMENTS:
+                conn.execute(text(stmt), params)
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    finally:
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベンチマーク用 DB を作り直す（TRUNCATE します）")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=float, default=0.42, help="setseed() に渡す値（-1〜1）")
+    parser.add_argument("--force", action="store_true", help="DB 名に bench を含まなくても実行する")
+    args = parser.parse_args()
+    seed(args.database_url, SCALES[args.scale], args.seed, args.force)
+
+
+if __name__ == "__main__":
+    main()
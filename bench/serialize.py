@@ -0,0 +1,116 @@
+# bench/serialize.py
+# 記事 1 件あたりのシリアライズ時間のマイクロベンチ（DB もサーバーも使わない）。
+#   python -m bench.serialize --articles 1000 --rounds 20
+# 同じ記事（ORM オブジェクト）の一覧を、次の 3 通りで JSON バイト列にするまでを測る
+# - fastapi_dict:   _serialize_article → response_model=List[dict] の検証 → JSON（いまの FastAPI の既定経路）
+# - jsonable:       _serialize_article → jsonable_encoder → json.dumps（JSONResponse を返していた頃の経路）
+# - fastjson:       _serialize_article → FastJSONResponse（orjson 1 回）
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+# app.database が import 時に engine を作るので、ドライバのある URL を入れておく（接続はしない）
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://bench@localhost/bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core.fastjson import FastJSONResponse  # noqa: E402
+from app.routers.articles import _serialize_article  # noqa: E402
+from src.models.article import Article  # noqa: E402
+from src.models.user import User  # noqa: E402
+
+
+def make_articles(n: int, body_bytes: int, seed: int = 42) -> list[tuple[Article, int, int]]:
+    rng = random.Random(seed)
+    base = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    authors = [
+        User(id=i, name=f"ユーザー{i}", email=f"user{i}@example.ac.jp", avatar=None if i % 3 else f"https://example.com/{i}.png")
+        for i in range(1, 51)
+    ]
+    paragraph = "線形代数の固有値と固有ベクトルについて。Python で numpy.linalg.eig を使う。\n"
+    body_md = (paragraph * (body_bytes // len(paragraph.encode("utf-8")) + 1))[: body_bytes // 3]
+    body_html = "<p>" + body_md.replace("\n", "</p>\n<p>") + "</p>"
+    rows = []
+    for i in range(1, n + 1):
+        author = authors[i % len(authors)]
+        created = base + timedelta(minutes=i, microseconds=rng.randrange(1_000_000))
+        a = Article(
+            id=i,
+            author_id=author.id,
+            title=f"記事タイトル {i}",
+            body_md=body_md,
+            body_html=body_html,
+            is_published=True,
+            created_at=created,
+            updated_at=created + timedelta(hours=rng.randrange(48)),
+            likes_count=rng.randrange(100),
+        )
+        a.author = author
+        rows.append((a, a.likes_count, rng.randrange(20)))
+    return rows
+
+
+_LIST_DICT = TypeAdapter(List[dict])
+
+
+def _fastapi_dict(rows) -> bytes:
+    value = _LIST_DICT.validate_python([_serialize_article(a, likes, comments) for a, likes, comments in rows])
+    return _LIST_DICT.dump_json(value)
+
+
+def _jsonable(rows) -> bytes:
+    content = jsonable_encoder([_serialize_article(a, likes, comments) for a, likes, comments in rows])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _fastjson(rows) -> bytes:
+    return FastJSONResponse([_serialize_article(a, likes, comments) for a, likes, comments in rows]).body
+
+
+VARIANTS: dict[str, Callable[[list], bytes]] = {
+    "fastapi_dict": _fastapi_dict,
+    "jsonable": _jsonable,
+    "fastjson": _fastjson,
+}
+
+
+def measure(fn: Callable[[list], bytes], rows: list, rounds: int) -> float:
+    """rounds 回のうち最速の 1 回の、記事 1 件あたりのマイクロ秒。"""
+    fn(rows)  # ウォームアップ
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best / len(rows) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="記事一覧の JSON シリアライズのマイクロベンチ")
+    parser.add_argument("--articles", type=int, default=1000, help="1 レスポンスの記事数")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--body-bytes", type=int, default=2000, help="本文（md / html それぞれ）のおおよそのバイト数")
+    args = parser.parse_args()
+
+    rows = make_articles(args.articles, args.body_bytes)
+
+    # API が返す形（jsonable と同じ JSON）になっていることを先に確かめる。
+    # fastapi_dict は UTC の日時を "Z" で書くので比べない
+    if json.loads(_fastjson(rows[:10])) != json.loads(_jsonable(rows[:10])):
+        raise SystemExit("fastjson の出力が jsonable と異なります")
+
+    baseline = None
+    print(f"{'variant':<14}{'us/article':>12}{'vs fastapi_dict':>18}")
+    for name, fn in VARIANTS.items():
+        us = measure(fn, rows, args.rounds)
+        baseline = baseline or us
+        print(f"{name:<14}{us:>12.2f}{baseline / us:>17.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# bench/server.py
+# ベンチマーク用にアプリを起動する。
+# Firebase の ID トークン検証だけをスタブに差し替え、"bench:<email>" 形式のトークンを受け付ける。
+# 本番コードには手を入れず、このモジュール経由で起動したときだけ有効になる。
+import argparse
+
+import uvicorn
+
+import app.routers.auth as auth_router
+from app.main import app
+from bench import BENCH_TOKEN_PREFIX
+
+
+class StubFirebaseAuth:
+    """firebase_admin.auth の verify_id_token だけを真似るスタブ。"""
+
+    @staticmethod
+    def verify_id_token(id_token: str, clock_skew_seconds: int = 0) -> dict:
+        if not id_token.startswith(BENCH_TOKEN_PREFIX):
+            raise ValueError("not a bench token")
+        email = id_token[len(BENCH_TOKEN_PREFIX):]
+        return {"email": email, "name": email.split("@", 1)[0], "picture": None}
+
+
+auth_router.firebase_auth = StubFirebaseAuth()
+auth_router._FIREBASE_AVAILABLE = True
+auth_router.ensure_firebase_ready = lambda: True
+
+__all__ = ["app"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベンチマーク用 API サーバ（Firebase スタブ付き）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run(
+        "bench.server:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
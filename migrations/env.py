@@ -25,6 +25,12 @@ from src.models.comment import Comment           # noqa: F401
 from src.models.report import Report             # noqa: F401
 from src.models.audit_log import AuditLog        # noqa: F401
 from src.models.university import University     # noqa: F401
+from src.models.trending import ArticleEngagementHourly, ArticleTrending, TrendingState  # noqa: F401
+from src.models.tag_follow import TagFollow  # noqa: F401
+from src.models.purge_job import PurgeJob  # noqa: F401
+from src.models.rate_limit import RateLimitBucket  # noqa: F401
+from src.models.search_query import SearchQuery  # noqa: F401
+from src.models.article_related import ArticleRelated, ArticleRelatedDirty  # noqa: F401
 
 
 # 今後、Tag などを追加したらここに import を足す
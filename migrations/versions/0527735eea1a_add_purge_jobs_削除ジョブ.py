@@ -0,0 +1,57 @@
+"""add purge_jobs 削除ジョブ
+
+Revision ID: 0527735eea1a
+Revises: cd6bf42ba0fd
+Create Date: 2026-10-19 17:28:22.834714+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0527735eea1a'
+down_revision: Union[str, Sequence[str], None] = 'cd6bf42ba0fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 管理者のユーザーデータ削除ジョブ（小さなバッチに分けて実行し、進捗をここに残す）
+    op.create_table('purge_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('phase', sa.String(length=20), nullable=False),
+    sa.Column('likes_total', sa.Integer(), nullable=True),
+    sa.Column('comments_total', sa.Integer(), nullable=True),
+    sa.Column('articles_total', sa.Integer(), nullable=True),
+    sa.Column('likes_deleted', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('comments_deleted', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('articles_deleted', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.CheckConstraint("phase IN ('likes','comments','articles','done')", name='ck_purge_jobs_phase'),
+    sa.CheckConstraint("status IN ('pending','running','done','failed')", name='ck_purge_jobs_status'),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_purge_jobs_status', 'purge_jobs', ['status'], unique=False)
+    op.create_index('ux_purge_jobs_active_user', 'purge_jobs', ['user_id'], unique=True, postgresql_where="status IN ('pending','running')")
+    # ユーザー単位で記事を拾うための索引（これまで無かった）
+    op.create_index('ix_articles_author_id', 'articles', ['author_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_articles_author_id', table_name='articles')
+    op.drop_index('ux_purge_jobs_active_user', table_name='purge_jobs', postgresql_where="status IN ('pending','running')")
+    op.drop_index('ix_purge_jobs_status', table_name='purge_jobs')
+    op.drop_table('purge_jobs')
@@ -0,0 +1,50 @@
+"""add search_queries / trgm indexes 検索キャッシュと候補
+
+Revision ID: 5a9f0c2d7e13
+Revises: e41d6a8c0b57
+Create Date: 2026-10-19 18:40:33.918270+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9f0c2d7e13'
+down_revision: Union[str, Sequence[str], None] = 'e41d6a8c0b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 検索条件ごとの回数（起動時に上位を先に実行して検索キャッシュを温める）
+    op.create_table('search_queries',
+    sa.Column('key', sa.String(length=500), nullable=False),
+    sa.Column('hits', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_search_queries_hits', 'search_queries', [sa.literal_column('hits DESC')], unique=False)
+
+    # 「もしかして」候補用のトライグラム索引（タイトルとタグ名だけ。本文は大きいので張らない）。
+    # pg_trgm は 4cedb8aac8c6 で入れているが、使えない DB（拡張が無い）では張らずに進める
+    # （その場合 /v1/search/suggestions は空を返す）
+    bind = op.get_bind()
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if available is None:
+        print("pg_trgm is not available; skipping trigram indexes")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_articles_title_trgm ON articles USING gin (title gin_trgm_ops) WHERE is_published;")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_tags_name_trgm ON tags USING gin (name gin_trgm_ops);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_tags_name_trgm;")
+    op.execute("DROP INDEX IF EXISTS ix_articles_title_trgm;")
+    op.drop_index('ix_search_queries_hits', table_name='search_queries')
+    op.drop_table('search_queries')
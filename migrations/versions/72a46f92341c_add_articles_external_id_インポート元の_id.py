@@ -0,0 +1,31 @@
+"""add articles.external_id インポート元の ID
+
+Revision ID: 72a46f92341c
+Revises: 87a1e66481d9
+Create Date: 2026-10-19 17:35:01.067557+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '72a46f92341c'
+down_revision: Union[str, Sequence[str], None] = '87a1e66481d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 一括インポートの冪等性用。NULL（アプリから書いた記事）は重複してよい
+    op.add_column('articles', sa.Column('external_id', sa.String(length=200), nullable=True))
+    op.create_index('ux_articles_external_id', 'articles', ['external_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_articles_external_id', table_name='articles')
+    op.drop_column('articles', 'external_id')
@@ -0,0 +1,63 @@
+"""add trending tables 急上昇の集計
+
+Revision ID: 8626c54c619f
+Revises: fb3582877348
+Create Date: 2026-10-19 17:24:05.335921+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8626c54c619f'
+down_revision: Union[str, Sequence[str], None] = 'fb3582877348'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 取り込み済みの位置（watermark）と、各 span の窓の開始時刻
+    op.create_table('trending_state',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # 記事 × 1 時間のバケット。最長の窓より古いものは集計ジョブが消す
+    op.create_table('article_engagement_hourly',
+    sa.Column('article_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('likes', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('comments', sa.Integer(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('article_id', 'bucket', name='pk_article_engagement_hourly')
+    )
+    op.create_index('ix_article_engagement_hourly_bucket', 'article_engagement_hourly', ['bucket'], unique=False)
+    # span ごとのローリング合計。一覧は ix_article_trending_rank を順に読むだけ
+    op.create_table('article_trending',
+    sa.Column('span', sa.String(length=8), nullable=False),
+    sa.Column('article_id', sa.Integer(), nullable=False),
+    sa.Column('likes', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('comments', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('score', sa.Integer(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('span', 'article_id', name='pk_article_trending')
+    )
+    op.create_index('ix_article_trending_rank', 'article_trending', ['span', sa.literal_column('score DESC'), sa.literal_column('article_id DESC')], unique=False)
+    # 新しいイベントだけを created_at の範囲で拾うための索引
+    op.create_index('ix_comments_created_at', 'comments', ['created_at'], unique=False)
+    op.create_index('ix_likes_created_at', 'likes', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_likes_created_at', table_name='likes')
+    op.drop_index('ix_comments_created_at', table_name='comments')
+    op.drop_index('ix_article_trending_rank', table_name='article_trending')
+    op.drop_table('article_trending')
+    op.drop_index('ix_article_engagement_hourly_bucket', table_name='article_engagement_hourly')
+    op.drop_table('article_engagement_hourly')
+    op.drop_table('trending_state')
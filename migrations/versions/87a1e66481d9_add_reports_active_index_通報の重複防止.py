@@ -0,0 +1,44 @@
+"""add reports active index 通報の重複防止
+
+Revision ID: 87a1e66481d9
+Revises: 0527735eea1a
+Create Date: 2026-10-19 17:31:27.432484+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '87a1e66481d9'
+down_revision: Union[str, Sequence[str], None] = '0527735eea1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 既に重なっている未処理の通報は、新しい方を残して閉じておく（一意索引を張るため）
+    op.execute(
+        """
+        UPDATE reports AS r SET status = 'closed'
+        WHERE r.status IN ('open','triage')
+          AND EXISTS (
+              SELECT 1 FROM reports AS n
+              WHERE n.target_type = r.target_type AND n.target_id = r.target_id
+                AND n.reporter_id = r.reporter_id AND n.status IN ('open','triage')
+                AND n.id > r.id
+          )
+        """
+    )
+    op.create_index(
+        'ux_reports_active_target_reporter', 'reports', ['target_type', 'target_id', 'reporter_id'],
+        unique=True, postgresql_where="status IN ('open','triage')",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_reports_active_target_reporter', table_name='reports')
@@ -0,0 +1,37 @@
+"""add rate_limit_buckets レート制限
+
+Revision ID: b7c3e91f2a40
+Revises: 72a46f92341c
+Create Date: 2026-10-19 18:02:47.512093+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c3e91f2a40'
+down_revision: Union[str, Sequence[str], None] = '72a46f92341c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # レート制限のバケットを全ワーカーで共有するとき用（RATE_LIMIT_BACKEND=postgres）。
+    # 書き込みが多く、消えても困らないので UNLOGGED
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=200), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('allowed', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,49 @@
+"""add article_related 関連記事
+
+Revision ID: c3e8a1f47b92
+Revises: 5a9f0c2d7e13
+Create Date: 2026-10-19 19:12:47.204518+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f47b92'
+down_revision: Union[str, Sequence[str], None] = '5a9f0c2d7e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 記事ごとの関連記事の上位 K 件（1 記事 1 行、配列で持つ）
+    op.create_table('article_related',
+    sa.Column('article_id', sa.Integer(), nullable=False),
+    sa.Column('related_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('scores', postgresql.ARRAY(sa.REAL()), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['articles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('article_id')
+    )
+    # 計算し直す記事の待ち行列
+    op.create_table('article_related_dirty',
+    sa.Column('article_id', sa.Integer(), nullable=False),
+    sa.Column('queued_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('article_id')
+    )
+    op.create_index('ix_article_related_dirty_queued_at', 'article_related_dirty', ['queued_at', 'article_id'], unique=False)
+
+    # 既存の公開記事は全部積んでおく（起動後にバックグラウンドで計算される）
+    op.execute("INSERT INTO article_related_dirty (article_id) SELECT id FROM articles WHERE is_published;")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_article_related_dirty_queued_at', table_name='article_related_dirty')
+    op.drop_table('article_related_dirty')
+    op.drop_table('article_related')
@@ -0,0 +1,44 @@
+"""add tag_follows タグのフォロー
+
+Revision ID: cd6bf42ba0fd
+Revises: 8626c54c619f
+Create Date: 2026-10-19 17:26:56.339066+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cd6bf42ba0fd'
+down_revision: Union[str, Sequence[str], None] = '8626c54c619f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tag_follows',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'tag_id', name='pk_tag_follows')
+    )
+    op.create_index('ix_tag_follows_tag_id', 'tag_follows', ['tag_id'], unique=False)
+
+    # タグごとに新しい記事から読めるよう、ix_article_tags_tag_id に article_id を足す
+    op.drop_index('ix_article_tags_tag_id', table_name='article_tags')
+    op.create_index('ix_article_tags_tag_id', 'article_tags', ['tag_id', 'article_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_article_tags_tag_id', table_name='article_tags')
+    op.create_index('ix_article_tags_tag_id', 'article_tags', ['tag_id'], unique=False)
+
+    op.drop_index('ix_tag_follows_tag_id', table_name='tag_follows')
+    op.drop_table('tag_follows')
@@ -0,0 +1,29 @@
+"""add purge_jobs.claim_token 削除ジョブの二重実行防止
+
+Revision ID: d9b24e6f1c38
+Revises: c3e8a1f47b92
+Create Date: 2026-10-19 20:05:12.640371+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b24e6f1c38'
+down_revision: Union[str, Sequence[str], None] = 'c3e8a1f47b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 拾ったワーカーの目印。止まったジョブを他のワーカーが拾い直したら、元のワーカーの進捗の更新は効かなくなる
+    op.add_column('purge_jobs', sa.Column('claim_token', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('purge_jobs', 'claim_token')
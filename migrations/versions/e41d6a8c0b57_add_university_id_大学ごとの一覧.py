@@ -0,0 +1,66 @@
+"""add users / articles university_id 大学ごとの一覧
+
+Revision ID: e41d6a8c0b57
+Revises: b7c3e91f2a40
+Create Date: 2026-10-19 18:21:09.384512+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41d6a8c0b57'
+down_revision: Union[str, Sequence[str], None] = 'b7c3e91f2a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ユーザーの大学（メールのドメインから。ログインのたびに app/core/universities.py で決め直す）
+    op.add_column('users', sa.Column('university_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_users_university_id', 'users', 'universities', ['university_id'], ['id'], ondelete='SET NULL')
+    op.create_index('ix_users_university_id', 'users', ['university_id'], unique=False)
+    # 記事には投稿時の作者の大学を複製しておく（一覧を articles だけで絞って並べられるように）
+    op.add_column('articles', sa.Column('university_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_articles_university_id', 'articles', 'universities', ['university_id'], ['id'], ondelete='SET NULL')
+    op.create_index(
+        'ix_articles_university_recent',
+        'articles',
+        ['university_id', sa.literal_column('created_at DESC'), sa.literal_column('id DESC')],
+        unique=False,
+        postgresql_where=sa.text('is_published'),
+    )
+
+    # 既存分の埋め戻し（サブドメインも一致。一番長く一致したドメインの大学）
+    op.execute(
+        """
+        UPDATE users AS u SET university_id = (
+            SELECT un.id FROM universities AS un
+            WHERE lower(split_part(u.email, '@', 2)) = lower(un.domain)
+               OR lower(split_part(u.email, '@', 2)) LIKE '%.' || lower(un.domain)
+            ORDER BY length(un.domain) DESC
+            LIMIT 1
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE articles AS a SET university_id = u.university_id
+        FROM users AS u
+        WHERE u.id = a.author_id AND u.university_id IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_articles_university_recent', table_name='articles', postgresql_where=sa.text('is_published'))
+    op.drop_constraint('fk_articles_university_id', 'articles', type_='foreignkey')
+    op.drop_column('articles', 'university_id')
+    op.drop_index('ix_users_university_id', table_name='users')
+    op.drop_constraint('fk_users_university_id', 'users', type_='foreignkey')
+    op.drop_column('users', 'university_id')
@@ -0,0 +1,42 @@
+"""add articles.likes_count いいね数を記事に持たせる
+
+Revision ID: fb3582877348
+Revises: 4eff25f5001f
+Create Date: 2026-10-19 17:21:33.198709+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fb3582877348'
+down_revision: Union[str, Sequence[str], None] = '4eff25f5001f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # いいね数のカウンタ。like / unlike の書き込みと同じ文で増減させる
+    op.add_column(
+        "articles",
+        sa.Column("likes_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # 既存のいいねから埋める
+    op.execute(
+        """
+        UPDATE articles AS a
+        SET likes_count = s.n
+        FROM (SELECT article_id, count(*) AS n FROM likes GROUP BY article_id) AS s
+        WHERE a.id = s.article_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("articles", "likes_count")
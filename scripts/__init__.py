@@ -0,0 +1 @@
+# scripts: 運用 / 検証用の CLI（python -m scripts.<name>）
@@ -0,0 +1,70 @@
+# scripts/export_articles.py
+# 記事を NDJSON（.gz なら gzip）でファイルに書き出す CLI。
+#   python -m scripts.export_articles --database-url postgresql+psycopg://... --out articles.ndjson.gz
+#   python -m scripts.export_articles --database-url ... --out diff.ndjson --watermark-file .export_watermark
+# - 中身は GET /v1/admin/export/articles と同じ（app/core/export.py）
+# - --watermark-file を渡すと差分モード: ファイルの時刻より後に更新された記事だけを書き、
+#   成功したら今回の until でファイルを更新する（ファイルが無ければ全件）
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+from app.core.export import export_until, stream_articles
+
+
+def _read_watermark(path: str | None) -> datetime | None:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        value = f.read().strip()
+    return datetime.fromisoformat(value) if value else None
+
+
+def _write_watermark(path: str, until: datetime) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(until.isoformat() + "\n")
+    os.replace(tmp, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="記事を NDJSON で書き出す")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="省略時は DATABASE_URL")
+    parser.add_argument("--out", required=True, help="出力先（.gz で終わると gzip、- で標準出力）")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="これより後に更新された記事だけ")
+    parser.add_argument("--watermark-file", default=None, help="差分の起点を読み書きするファイル")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    since = args.since or _read_watermark(args.watermark_file)
+    gzip = args.out.endswith(".gz")
+    engine = create_engine(args.database_url)
+    try:
+        with engine.connect() as conn:
+            until = export_until(conn)
+        chunks = stream_articles(engine, until, since, gzip=gzip)
+        if args.out == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            # 途中で失敗しても壊れたファイルを残さないよう、一時ファイルに書いてから置き換える
+            tmp = args.out + ".part"
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, args.out)
+    finally:
+        engine.dispose()
+
+    if args.watermark_file:
+        _write_watermark(args.watermark_file, until)
+    print(f"exported articles updated {'after ' + since.isoformat() if since else 'ever'} up to {until.isoformat()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+# scripts/generate_data.py
+# スケール検証用の合成データを大量投入する CLI。
+#   python -m scripts.generate_data --users 50000 --articles 300000 --tags 3000 \
+#       --likes 5000000 --comments 1000000 --seed 42 --workers 8
+# - 同じ seed / 件数なら同じデータになる（記事ごとに seed から乱数を派生させるので並列でも決定的）
+# - body_html は worker プロセスで render_and_sanitize を通して事前生成する
+# - 投入は Postgres の COPY（psycopg3）をバッチごとにコミットしながら流し込む
+# - ID は既存の max(id) の後ろから振るので、既存データとは衝突しない（--truncate で全消しも可）
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+
+WORDS = (
+    "Python", "FastAPI", "SQLAlchemy", "Postgres", "インデックス", "線形代数", "微分積分", "離散数学",
+    "アルゴリズム", "データ構造", "統計", "機械学習", "React", "Next.js", "Docker", "Git",
+    "レポート", "課題", "試験", "講義", "ゼミ", "研究室", "実験", "解説", "まとめ", "メモ",
+    "計算量", "再帰", "グラフ", "行列", "確率", "OS", "ネットワーク", "コンパイラ", "型", "テスト",
+)
+CODE_SNIPPETS = (
+    "def f(n):\n    return n if n < 2 else f(n - 1) + f(n - 2)",
+    "SELECT id, title FROM articles ORDER BY created_at DESC LIMIT 20;",
+    "for i in range(10):\n    print(i * i)",
+    "docker compose up --build",
+    "const [state, setState] = useState(0);",
+)
+# 合成データの作成時刻はこの日数の範囲に散らす
+SPAN_DAYS = 365
+
+
+@dataclass(frozen=True)
+class Plan:
+    users: int
+    articles: int
+    tags: int
+    likes: int
+    comments: int
+    seed: int
+    batch_size: int
+    workers: int
+
+
+# ======================================================
+# 乱数 / 分布
+# ======================================================
+
+def _rng(seed: int, *keys: int) -> random.Random:
+    """seed と任意のキーから決定的に派生した乱数生成器。"""
+    h = seed
+    for k in keys:
+        h = (h * 1_000_003) ^ k
+    return random.Random(h)
+
+
+class Zipf:
+    """0..n-1 をべき分布（先頭ほど多い。ランク r の重み 1 / r^s）で引く。"""
+
+    def __init__(self, n: int, s: float = 1.1) -> None:
+        self._cum = list(itertools.accumulate(1.0 / (r ** s) for r in range(1, n + 1)))
+
+    def draw(self, rng: random.Random) -> int:
+        return bisect.bisect_left(self._cum, rng.random() * self._cum[-1])
+
+
+def _spread(total: int, n: int, rng: random.Random, cap: int) -> list[int]:
+    """total 件を n 個にパレート分布っぽく配る（各要素は cap 以下）。n == 0 なら空。"""
+    if n <= 0:
+        return []
+    weights = [rng.paretovariate(1.2) for _ in range(n)]
+    scale = total / sum(weights)
+    return [min(cap, int(w * scale)) for w in weights]
+
+
+# ======================================================
+# 本文生成（worker プロセスで実行）
+# ======================================================
+
+def _markdown(rng: random.Random, title: str) -> str:
+    parts = [f"# {title}", ""]
+    for _ in range(1 + min(8, int(rng.paretovariate(1.5)))):
+        parts.append(f"## {rng.choice(WORDS)}と{rng.choice(WORDS)}")
+        parts.append("")
+        for _ in range(rng.randint(1, 4)):
+            parts.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))) + "。")
+            parts.append("")
+        roll = rng.random()
+        if roll < 0.3:
+            parts.extend(f"- {rng.choice(WORDS)}" for _ in range(rng.randint(2, 6)))
+            parts.append("")
+        elif roll < 0.5:
+            parts.extend(["```", rng.choice(CODE_SNIPPETS), "```", ""])
+        elif roll < 0.6:
+            parts.append(f"参考: https://example.com/{rng.choice(WORDS)}")
+            parts.append("")
+    return "\n".join(parts)
+
+
+def _article_rows(args: tuple[int, int, int, int, list[int]]) -> list[tuple]:
+    """記事 ID の範囲ぶんの行（本文の Markdown → HTML 変換込み）を作る。"""
+    from app.utils.markdown import render_and_sanitize
+
+    seed, first_id, last_id, epoch, authors = args
+    rows = []
+    for aid, author_id in zip(range(first_id, last_id + 1), authors):
+        rng = _rng(seed, 1, aid)
+        title = f"{rng.choice(WORDS)}の{rng.choice(WORDS)}について #{aid}"
+        body_md = _markdown(rng, title)
+        created = datetime.fromtimestamp(epoch - rng.randrange(SPAN_DAYS * 86400), tz=timezone.utc)
+        # score / views は ORM 側 default しか無いので明示する
+        rows.append((aid, author_id, title, body_md, render_and_sanitize(body_md), rng.random() < 0.9, 0, 0, created, created))
+    return rows
+
+
+def _comment_rows(args: tuple[int, list[tuple[int, int, int, datetime]]]) -> list[tuple]:
+    from app.utils.markdown import render_and_sanitize
+
+    seed, specs = args
+    rows = []
+    for cid, article_id, author_id, article_created in specs:
+        rng = _rng(seed, 2, cid)
+        body_md = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+        created = article_created + timedelta(seconds=rng.randrange(30 * 86400))
+        rows.append((cid, article_id, author_id, body_md, render_and_sanitize(body_md), created))
+    return rows
+
+
+def _bounded_map(pool: ProcessPoolExecutor, fn, iterable, max_in_flight: int):
+    """
+    pool.map と同じく順序どおりに結果を返すが、投入済みのジョブ数を max_in_flight に抑える。
+    （pool.map は入力を全部投入するので、COPY が遅いと結果がメモリに溜まり続ける）
+    """
+    pending: deque = deque()
+    for item in iterable:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# ======================================================
+# COPY
+# ======================================================
+
+class Loader:
+    def __init__(self, database_url: str, batch_size: int) -> None:
+        self.engine = create_engine(database_url)
+        self.raw = self.engine.raw_connection()
+        self.conn = self.raw.driver_connection
+        if type(self.conn).__module__.split(".")[0] != "psycopg":
+            raise SystemExit("COPY needs the psycopg (v3) driver: use a postgresql+psycopg:// URL")
+        self.batch_size = batch_size
+
+    def scalar(self, sql: str):
+        with self.conn.cursor() as cur:
+            cur.execute(sql)
+            value = cur.fetchone()[0]
+        self.conn.commit()
+        return value
+
+    def execute(self, sql: str) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(sql)
+        self.conn.commit()
+
+    def copy(self, table: str, columns: tuple[str, ...], rows) -> int:
+        """rows を batch_size ごとに COPY してコミットする。"""
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        total = 0
+        it = iter(rows)
+        while True:
+            batch = list(itertools.islice(it, self.batch_size))
+            if not batch:
+                break
+            with self.conn.cursor() as cur:
+                with cur.copy(sql) as copy:
+                    for row in batch:
+                        copy.write_row(row)
+            self.conn.commit()
+            total += len(batch)
+            print(f"  {table}: {total:,}", file=sys.stderr, end="\r")
+        print(f"  {table}: {total:,}", file=sys.stderr)
+        return total
+
+    def close(self) -> None:
+        self.raw.close()
+        self.engine.dispose()
+
+
+_TRUNCATE = "TRUNCATE article_tags, likes, comments, reports, audit_logs, articles, tags, users RESTART IDENTITY CASCADE"
+_SERIAL_TABLES = ("users", "tags", "articles", "comments")
+
+
+def generate(database_url: str, plan: Plan, truncate: bool = False) -> None:
+    loader = Loader(database_url, plan.batch_size)
+    try:
+        if truncate:
+            loader.execute(_TRUNCATE)
+
+        user0 = loader.scalar("SELECT coalesce(max(id), 0) FROM users")
+        tag0 = loader.scalar("SELECT coalesce(max(id), 0) FROM tags")
+        article0 = loader.scalar("SELECT coalesce(max(id), 0) FROM articles")
+        comment0 = loader.scalar("SELECT coalesce(max(id), 0) FROM comments")
+        epoch = int(time.time())
+        started = time.perf_counter()
+
+        # --- users / tags ---
+        loader.copy(
+            "users", ("id", "name", "email", "role"),
+            ((user0 + i, f"synthetic user {user0 + i}", f"synth{user0 + i}@synthetic.local", "student")
+             for i in range(1, plan.users + 1)),
+        )
+        loader.copy("tags", ("id", "name"), ((tag0 + i, f"synth-tag-{tag0 + i}") for i in range(1, plan.tags + 1)))
+
+        # --- articles（本文レンダリングは並列） ---
+        author_dist = Zipf(plan.users, 1.05)
+        rng = _rng(plan.seed, 0)
+        authors = [user0 + 1 + author_dist.draw(rng) for _ in range(plan.articles)]
+        chunk = max(100, plan.batch_size // 4)
+        jobs = [
+            (plan.seed, article0 + lo + 1, article0 + min(lo + chunk, plan.articles), epoch, authors[lo:lo + chunk])
+            for lo in range(0, plan.articles, chunk)
+        ]
+        article_created: list[datetime] = []
+
+        with ProcessPoolExecutor(max_workers=plan.workers) as pool:
+            def article_stream():
+                for rows in _bounded_map(pool, _article_rows, jobs, plan.workers * 2):
+                    for row in rows:
+                        article_created.append(row[8])
+                        yield row
+
+            loader.copy(
+                "articles",
+                ("id", "author_id", "title", "body_md", "body_html", "is_published", "score", "views", "created_at", "updated_at"),
+                article_stream(),
+            )
+
+            # --- article_tags（タグはべき分布。同じ記事に同じタグは付けない） ---
+            tag_dist = Zipf(plan.tags, 1.0)
+
+            def article_tag_stream():
+                for i in range(plan.articles):
+                    r = _rng(plan.seed, 3, i)
+                    picked = {tag0 + 1 + tag_dist.draw(r) for _ in range(r.randint(1, 5))}
+                    for tag_id in sorted(picked):
+                        yield (article0 + 1 + i, tag_id)
+
+            loader.copy("article_tags", ("article_id", "tag_id"), article_tag_stream())
+
+            # --- likes（記事ごとの件数をパレート分布で決め、ユーザーは重複なしでサンプル） ---
+            like_counts = _spread(plan.likes, plan.articles, _rng(plan.seed, 4), cap=plan.users)
+
+            def like_stream():
+                for i, n in enumerate(like_counts):
+                    if n <= 0:
+                        continue
+                    r = _rng(plan.seed, 5, i)
+                    base = article_created[i]
+                    for uid in r.sample(range(plan.users), n):
+                        yield (article0 + 1 + i, user0 + 1 + uid, base + timedelta(seconds=r.randrange(30 * 86400)))
+
+            loader.copy("likes", ("article_id", "user_id", "created_at"), like_stream())
+            # likes を直接入れたので articles.likes_count を合わせる
+            loader.execute(
+                "UPDATE articles AS a SET likes_count = s.n "
+                "FROM (SELECT article_id, count(*) AS n FROM likes "
+                f"WHERE article_id > {article0} GROUP BY article_id) AS s "
+                "WHERE a.id = s.article_id"
+            )
+
+            # --- comments（本文レンダリングは並列） ---
+            comment_counts = _spread(plan.comments, plan.articles, _rng(plan.seed, 6), cap=10_000)
+
+            def comment_specs():
+                cid = comment0
+                r = _rng(plan.seed, 7)
+                batch = []
+                for i, n in enumerate(comment_counts):
+                    for _ in range(n):
+                        cid += 1
+                        batch.append((cid, article0 + 1 + i, user0 + 1 + r.randrange(plan.users), article_created[i]))
+                        if len(batch) >= chunk:
+                            yield (plan.seed, batch)
+                            batch = []
+                if batch:
+                    yield (plan.seed, batch)
+
+            def comment_stream():
+                for rows in _bounded_map(pool, _comment_rows, comment_specs(), plan.workers * 2):
+                    yield from rows
+
+            loader.copy(
+                "comments",
+                ("id", "article_id", "author_id", "body_md", "body_html", "created_at"),
+                comment_stream(),
+            )
+
+        # 明示 ID で入れたのでシーケンスを追いつかせる
+        for table in _SERIAL_TABLES:
+            loader.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {table}))"
+            )
+        loader.execute("ANALYZE")
+        print(f"done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    finally:
+        loader.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="合成データを COPY で大量投入する")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=1_000)
+    parser.add_argument("--likes", type=int, default=1_000_000)
+    parser.add_argument("--comments", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=20_000, help="COPY 1 回（= 1 トランザクション）の行数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Markdown を変換するプロセス数")
+    parser.add_argument("--truncate", action="store_true", help="投入前に全テーブルを TRUNCATE する")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    if args.users < 1 or args.tags < 1:
+        parser.error("--users and --tags must be >= 1")
+    if min(args.articles, args.likes, args.comments) < 0:
+        parser.error("--articles, --likes and --comments must be >= 0")
+
+    plan = Plan(
+        users=args.users, articles=args.articles, tags=args.tags, likes=args.likes,
+        comments=args.comments, seed=args.seed, batch_size=args.batch_size, workers=args.workers,
+    )
+    generate(args.database_url, plan, truncate=args.truncate)
+
+
+if __name__ == "__main__":
+    main()
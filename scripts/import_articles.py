@@ -0,0 +1,53 @@
+# scripts/import_articles.py
+# NDJSON（.gz 可）の記事を一括インポートする CLI。
+#   python -m scripts.import_articles --database-url postgresql+psycopg://... --file wiki_export.ndjson.gz --workers 8
+# - 形式と挙動は POST /v1/admin/import/articles と同じ（app/core/importer.py）
+# - ファイルは 1 行ずつ読むので、大きなファイルでも全体をメモリに載せない
+# - 記事を作成 / 更新したら、動いているワーカーのキャッシュも NOTIFY で捨てさせる（app/core/invalidation.py）
+# - 結果（件数とエラー）は JSON で標準出力に。失敗した行があれば終了コード 1
+import argparse
+import gzip
+import json
+import os
+import sys
+
+from sqlalchemy import create_engine
+
+from app.core import cdn, importer, invalidation
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NDJSON の記事を一括インポートする")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="省略時は DATABASE_URL")
+    parser.add_argument("--file", required=True, help="入力ファイル（.gz なら gzip、- で標準入力）")
+    parser.add_argument("--batch-size", type=int, default=importer.IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=importer.IMPORT_WORKERS, help="Markdown 変換のプロセス数")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    importer.IMPORT_WORKERS = args.workers
+    engine = create_engine(args.database_url)
+    if args.file == "-":
+        f = sys.stdin.buffer
+    elif args.file.endswith(".gz"):
+        f = gzip.open(args.file, "rb")
+    else:
+        f = open(args.file, "rb")
+    try:
+        result = importer.import_ndjson(engine, f, batch_size=args.batch_size)
+        if result.created or result.updated:
+            invalidation.notify_workers(engine)
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+        importer.shutdown_pool()
+        cdn.purger.stop()  # 溜まっているパージを送ってから終わる
+        engine.dispose()
+
+    print(json.dumps(result.as_dict(), ensure_ascii=False, indent=2))
+    sys.exit(1 if result.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scripts/startup_report.py
+# `import app.main`（= ワーカー起動時の import）にかかる時間のレポートと予算チェック。
+#   python -m scripts.startup_report                 # 重いモジュールの上位を表示
+#   python -m scripts.startup_report --budget-ms 800 # 中央値が予算を超えたら終了コード 1（CI 用）
+# - 別プロセスで python -X importtime を実行して集計する（このプロセスの import 状態に左右されない）
+# - 起動時に読み込んではいけない重いモジュール（--forbid）が import されていても終了コード 1
+#   既定: firebase_admin / markdown / bleach（初回利用時 or 起動後のバックグラウンドで読み込む）
+# - DATABASE_URL が無いと app.database の engine 作成で落ちるので、その場合はダミーを入れる（接続はしない）
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_FORBIDDEN = ("firebase_admin", "markdown", "bleach")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "postgresql+psycopg://startup@localhost/startup")
+    return env
+
+
+def import_profile(target: str) -> list[tuple[str, int, int, int]]:
+    """(モジュール名, self μs, 累積 μs, 深さ) を import 順に返す。"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=_env(),
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def wall_times(target: str, runs: int) -> list[float]:
+    """新しいプロセスで import だけするのにかかった時間（ms。インタプリタの起動を含む）。"""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {target}"], check=True, capture_output=True, env=_env())
+        times.append((time.perf_counter() - started) * 1000.0)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="起動時の import 時間のレポート / 予算チェック")
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--top", type=int, default=20, help="累積時間の上位何件を出すか")
+    parser.add_argument("--runs", type=int, default=5, help="起動時間を測る回数（中央値を使う）")
+    parser.add_argument("--budget-ms", type=float, default=None, help="起動時間（中央値）の上限")
+    parser.add_argument(
+        "--forbid",
+        default=",".join(DEFAULT_FORBIDDEN),
+        help="起動時に import されてはいけないモジュール（カンマ区切り。空で無効）",
+    )
+    args = parser.parse_args()
+
+    rows = import_profile(args.target)
+    target_us = next((cum for name, _, cum, _ in rows if name == args.target), 0)
+
+    # 深さ 2 まで（= target が直接 / 1 段挟んで import したもの）の累積時間の上位
+    print(f"import {args.target}: {target_us / 1000:.1f} ms (-X importtime)")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    shown = sorted((r for r in rows if r[3] <= 2 and r[0] != args.target), key=lambda r: r[2], reverse=True)
+    for name, self_us, cum_us, depth in shown[: args.top]:
+        print(f"{cum_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+    failed = False
+    imported = {name for name, _, _, _ in rows}
+    forbidden = [m.strip() for m in args.forbid.split(",") if m.strip()]
+    leaked = [m for m in forbidden if m in imported]
+    if leaked:
+        failed = True
+        print(f"\nNG: imported at startup: {', '.join(leaked)}")
+
+    times = wall_times(args.target, args.runs)
+    median = statistics.median(times)
+    print(f"\nprocess start + import: median {median:.0f} ms (min {min(times):.0f} / max {max(times):.0f}, {args.runs} runs)")
+    if args.budget_ms is not None:
+        if median > args.budget_ms:
+            failed = True
+            print(f"NG: over budget ({median:.0f} ms > {args.budget_ms:.0f} ms)")
+        else:
+            print(f"OK: within budget ({args.budget_ms:.0f} ms)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
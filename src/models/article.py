@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, func, Index
 from sqlalchemy.orm import relationship
 from . import Base
 
@@ -17,10 +17,24 @@ class Article(Base):
 
     score = Column(Integer, nullable=False, default=0)  # 人気順スコア（簡易キャッシュ）
     views = Column(Integer, nullable=False, default=0)  # 閲覧数（将来の集計用）
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")  # いいね数（like/unlike と同じ文で増減）
+    external_id = Column(String(200), nullable=True)  # 一括インポート元での ID（再インポート時の突き合わせ用）
+    university_id = Column(Integer, ForeignKey("universities.id", ondelete="SET NULL"), nullable=True)  # 投稿時の作者の大学（users から複製。大学で絞った一覧用）
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # リレーション（後でUser側にも対応を追加する）
     author = relationship("User", back_populates="articles")
-    #「記事 ↔ 作者」をオブジェクトで行き来できる近道　自動同期できる。片側を触れば両側が揃う（back_populates の効果）。
\ No newline at end of file
+    #「記事 ↔ 作者」をオブジェクトで行き来できる近道　自動同期できる。片側を触れば両側が揃う（back_populates の効果）。
+
+    __table_args__ = (
+        Index("ix_articles_author_id", "author_id"),  # 自分の投稿一覧 / ユーザー単位の削除用
+        Index("ux_articles_external_id", "external_id", unique=True),
+        # 大学で絞った新着順の一覧（公開記事だけ）
+        Index(
+            "ix_articles_university_recent",
+            "university_id", created_at.desc(), id.desc(),
+            postgresql_where=is_published,
+        ),
+    )
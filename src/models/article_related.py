@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, REAL, DateTime, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from . import Base
+
+# 関連記事（タグの重なり）の事前計算。読み書きは app/core/related.py のみ
+
+
+class ArticleRelated(Base):
+    """記事ごとの関連記事の上位 K 件。related_ids と scores は同じ順（似ている順）"""
+    __tablename__ = "article_related"
+
+    article_id  = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    related_ids = Column(ARRAY(Integer), nullable=False)
+    scores      = Column(ARRAY(REAL), nullable=False)  # IDF 重み付き Jaccard（0〜1）
+    computed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class ArticleRelatedDirty(Base):
+    """計算し直す記事の待ち行列（タグの付け外しで積まれる）。記事が消えても残るが、計算時に読み飛ばす"""
+    __tablename__ = "article_related_dirty"
+
+    article_id = Column(Integer, primary_key=True)
+    queued_at  = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_article_related_dirty_queued_at", "queued_at", "article_id"),
+    )
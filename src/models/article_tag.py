@@ -14,5 +14,6 @@ article_tags = Table(
 
     # よく検索する組み合わせにインデックスを貼っておく（将来のパフォーマンス用）
     Index("ix_article_tags_article_id", "article_id"),
-    Index("ix_article_tags_tag_id", "tag_id"),
+    # (tag_id, article_id) にしておくと「タグごとの新しい順」を索引だけで読める（/v1/feed 用）
+    Index("ix_article_tags_tag_id", "tag_id", "article_id"),
 )
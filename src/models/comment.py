@@ -16,4 +16,5 @@ class Comment(Base):
     __table_args__ = (
         Index("ix_comments_article_id", "article_id"),
         Index("ix_comments_author_id", "author_id"),
+        Index("ix_comments_created_at", "created_at"),  # trending の差分取り込み用
     )
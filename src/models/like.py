@@ -12,4 +12,5 @@ class Like(Base):
         UniqueConstraint("article_id", "user_id", name="uq_like_article_user"),
         Index("ix_likes_article_id", "article_id"),
         Index("ix_likes_user_id", "user_id"),
+        Index("ix_likes_created_at", "created_at"),  # trending の差分取り込み用
     )
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func, CheckConstraint, Index
+from . import Base
+
+
+class PurgeJob(Base):
+    """管理者によるユーザーデータ削除ジョブ。実行と進捗の更新は app/core/purge_jobs.py が行う"""
+    __tablename__ = "purge_jobs"
+
+    id = Column(Integer, primary_key=True)
+
+    user_id      = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # 削除対象
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # 実行した管理者
+
+    status = Column(String(20), nullable=False, default="pending")  # 'pending' | 'running' | 'done' | 'failed'
+    phase  = Column(String(20), nullable=False, default="likes")    # 'likes' → 'comments' → 'articles' → 'done'
+
+    # 開始時点の件数（進捗の分母）と、削除済みの件数
+    likes_total       = Column(Integer, nullable=True)
+    comments_total    = Column(Integer, nullable=True)
+    articles_total    = Column(Integer, nullable=True)
+    likes_deleted     = Column(Integer, nullable=False, default=0, server_default="0")
+    comments_deleted  = Column(Integer, nullable=False, default=0, server_default="0")
+    articles_deleted  = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # 拾ったワーカーの目印（拾うたびに振り直す）。進捗の UPDATE はこれが自分のときだけ効く
+    claim_token = Column(String(32), nullable=True)
+
+    error = Column(Text, nullable=True)
+
+    created_at  = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at  = Column(DateTime(timezone=True), server_default=func.now())  # バッチごとに更新（止まったジョブの検出用）
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("status IN ('pending','running','done','failed')", name="ck_purge_jobs_status"),
+        CheckConstraint("phase IN ('likes','comments','articles','done')", name="ck_purge_jobs_phase"),
+        # 同じユーザーに対して動いているジョブは 1 つだけ
+        Index(
+            "ux_purge_jobs_active_user", "user_id", unique=True,
+            postgresql_where="status IN ('pending','running')",
+        ),
+        Index("ix_purge_jobs_status", "status"),
+    )
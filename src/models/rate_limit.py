@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Float, Boolean, DateTime, func
+from . import Base
+
+
+class RateLimitBucket(Base):
+    """レート制限のトークンバケット（RATE_LIMIT_BACKEND=postgres のとき）。読み書きは app/core/rate_limit.py のみ。
+    消えても困らないので UNLOGGED（WAL を書かない / クラッシュ時は空になる）"""
+    __tablename__ = "rate_limit_buckets"
+
+    key        = Column(String(200), primary_key=True)  # '<ルール名>:u:<user_id>' | '<ルール名>:ip:<IP>'
+    tokens     = Column(Float, nullable=False)           # updated_at 時点の残り
+    allowed    = Column(Boolean, nullable=False)         # 最後の 1 回が通ったか
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
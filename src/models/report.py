@@ -20,4 +20,9 @@ class Report(Base):
         CheckConstraint("status IN ('open','triage','closed')", name="ck_reports_status"),
         Index("ix_reports_target", "target_type", "target_id"),
         Index("ix_reports_reporter_id", "reporter_id"),
+        # 同じ人が同じ対象を未処理のまま重ねて通報できないように（モデレーションキューの集計にも使う）
+        Index(
+            "ux_reports_active_target_reporter", "target_type", "target_id", "reporter_id", unique=True,
+            postgresql_where="status IN ('open','triage')",
+        ),
     )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, func, Index
+from . import Base
+
+
+class SearchQuery(Base):
+    """検索条件ごとの回数（起動時に上位を先に実行して検索キャッシュを温める）。書き込みは app/core/search_cache.py のみ"""
+    __tablename__ = "search_queries"
+
+    key          = Column(String(500), primary_key=True)  # JSON: [キーワード（小文字）, [タグ...], 並び, 大学 ID, 件数, カーソル]
+    hits         = Column(BigInteger, nullable=False, default=0, server_default="0")
+    last_seen_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_search_queries_hits", hits.desc()),
+    )
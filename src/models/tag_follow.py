@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, PrimaryKeyConstraint, func
+from . import Base
+
+
+class TagFollow(Base):
+    """ユーザーがフォローしているタグ（/v1/feed の元になる）"""
+    __tablename__ = "tag_follows"
+
+    user_id    = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    tag_id     = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "tag_id", name="pk_tag_follows"),  # user_id 先頭なので「自分のフォロー一覧」はこれで引ける
+        Index("ix_tag_follows_tag_id", "tag_id"),
+    )
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, PrimaryKeyConstraint
+from . import Base
+
+# 急上昇（trending）用の集計テーブル。更新は app/core/trending.py のみが行う
+
+
+class ArticleEngagementHourly(Base):
+    """記事ごと・1 時間ごとのいいね / コメント発生数（likes.created_at / comments.created_at から集計）"""
+    __tablename__ = "article_engagement_hourly"
+
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), nullable=False)
+    bucket     = Column(DateTime(timezone=True), nullable=False)  # date_trunc('hour', created_at)
+    likes      = Column(Integer, nullable=False, default=0, server_default="0")
+    comments   = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        PrimaryKeyConstraint("article_id", "bucket", name="pk_article_engagement_hourly"),
+        Index("ix_article_engagement_hourly_bucket", "bucket"),
+    )
+
+
+class ArticleTrending(Base):
+    """期間（span: '24h' | '7d'）ごとの記事別ローリング合計。一覧はこのテーブルだけで並べられる"""
+    __tablename__ = "article_trending"
+
+    span       = Column(String(8), nullable=False)
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), nullable=False)
+    likes      = Column(Integer, nullable=False, default=0, server_default="0")
+    comments   = Column(Integer, nullable=False, default=0, server_default="0")
+    score      = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        PrimaryKeyConstraint("span", "article_id", name="pk_article_trending"),
+        Index("ix_article_trending_rank", "span", score.desc(), article_id.desc()),
+    )
+
+
+class TrendingState(Base):
+    """集計の進み具合（どこまでのイベントを取り込んだか / 各 span の窓の開始）"""
+    __tablename__ = "trending_state"
+
+    name  = Column(String(32), primary_key=True)  # 'watermark' | 'span:24h' | 'span:7d'
+    value = Column(DateTime(timezone=True), nullable=False)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship 
 from . import Base  # 同じパッケージ内の Base を使う
+from .university import University  # noqa: F401  university_id の外部キー先をメタデータに載せる
 
 class User(Base):#Python のクラスを使ってusers というテーブルを作り、id, name, email, role, bio, created_at という列を持たせ、制約やデフォルト値も決めている
     __tablename__ = "users" #userクラスがusersテーブルになりますという宣言
@@ -11,5 +12,6 @@ class User(Base):#Python のクラスを使ってusers というテーブルを
     role = Column(String(50), nullable=False, default="student")  # student | mod | admin
     bio = Column(String(500))
     avatar = Column(String(500), nullable=True)  # プロフィール画像URL
+    university_id = Column(Integer, ForeignKey("universities.id", ondelete="SET NULL"), nullable=True, index=True)  # メールのドメインからログイン時に決める
     created_at = Column(DateTime(timezone=True), server_default=func.now())#DateTime(timezone=True) → タイムゾーン付き日時型 server_default=func.now() → DBサーバーが勝手に現在時刻を入れる つまり「ユーザーが登録された時間」が自動で残る
     articles = relationship("Article", back_populates="author", cascade="all, delete-orphan")
\ No newline at end of file
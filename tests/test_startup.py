@@ -0,0 +1,29 @@
+# tests/test_startup.py
+# ワーカー起動時の import の予算（scripts/startup_report.py と同じ測り方）。
+#   pip install -r requirements-dev.txt && python -m pytest tests/test_startup.py
+# - 予算は STARTUP_BUDGET_MS（ms。インタプリタの起動を含む中央値。既定 1500）、測る回数は STARTUP_BUDGET_RUNS
+#   遅いマシンでは fastapi + sqlalchemy の import だけで 500 ms を超えるので、CI の環境に合わせて決める
+# - 重いモジュール（firebase_admin / markdown / bleach）は起動後に読み込むので、import app.main で入ってはいけない
+import os
+import statistics
+
+from scripts.startup_report import DEFAULT_FORBIDDEN, import_profile, wall_times
+
+TARGET = "app.main"
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+STARTUP_BUDGET_RUNS = int(os.getenv("STARTUP_BUDGET_RUNS", "5"))
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    imported = {name for name, _, _, _ in import_profile(TARGET)}
+    leaked = [m for m in DEFAULT_FORBIDDEN if m in imported]
+    assert not leaked, f"imported at startup: {', '.join(leaked)}"
+
+
+def test_startup_time_within_budget():
+    times = wall_times(TARGET, STARTUP_BUDGET_RUNS)
+    median = statistics.median(times)
+    assert median <= STARTUP_BUDGET_MS, (
+        f"import {TARGET}: median {median:.0f} ms > budget {STARTUP_BUDGET_MS:.0f} ms "
+        f"(python -m scripts.startup_report で重いモジュールを確認)"
+    )